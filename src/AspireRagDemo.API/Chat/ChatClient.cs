@@ -1,3 +1,5 @@
+using System.Diagnostics;
+using System.Runtime.CompilerServices;
 using System.Text;
 using AspireRagDemo.API.Models;
 using Microsoft.Extensions.Options;
@@ -41,6 +43,53 @@ public class ChatClient(
         }
     }
 
+    /// <summary>
+    /// Streams the answer token by token. Time to first token and tokens per second are recorded
+    /// on the current activity (the request span).
+    /// </summary>
+    public async IAsyncEnumerable<string> StreamAnswer(string question, bool useAdditionalContext,
+        [EnumeratorCancellation] CancellationToken cancellationToken = default)
+    {
+        var arguments = new KernelArguments
+        {
+            { "question", question }
+        };
+        var promptConfig = PromptConstants.BasicPromptConfig;
+        if (useAdditionalContext)
+        {
+            arguments["context"] = await GetContextFromVectorStore(question);
+            promptConfig = PromptConstants.RagPromptConfig;
+        }
+
+        var kernelFunction = kernel.CreateFunctionFromPrompt(promptConfig);
+        var activity = Activity.Current;
+        var stopwatch = Stopwatch.StartNew();
+        TimeSpan? firstTokenAt = null;
+        var tokens = 0;
+
+        await foreach (var token in kernelFunction.InvokeStreamingAsync<string>(kernel, arguments, cancellationToken))
+        {
+            if (firstTokenAt is null)
+            {
+                firstTokenAt = stopwatch.Elapsed;
+                activity?.SetTag("rag.time_to_first_token_ms", firstTokenAt.Value.TotalMilliseconds);
+            }
+
+            tokens++;
+            yield return token;
+        }
+
+        if (firstTokenAt is not null)
+        {
+            var generationSeconds = (stopwatch.Elapsed - firstTokenAt.Value).TotalSeconds;
+            activity?.SetTag("rag.tokens", tokens);
+            if (generationSeconds > 0)
+            {
+                activity?.SetTag("rag.tokens_per_second", tokens / generationSeconds);
+            }
+        }
+    }
+
     private async Task<string> AnswerWithoutAdditionalContext(string question)
     {
         try
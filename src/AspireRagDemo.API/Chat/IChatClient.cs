@@ -3,4 +3,10 @@
 public interface IChatClient
 {
     Task<string> AnswerQuestion(string question, bool useAdditionalContext);
+
+    /// <summary>
+    /// Streams the answer as the model produces it.
+    /// </summary>
+    IAsyncEnumerable<string> StreamAnswer(string question, bool useAdditionalContext,
+        CancellationToken cancellationToken = default);
 }
\ No newline at end of file
@@ -58,4 +58,29 @@ app.MapGet("/chat", async ([FromQuery] string query, [FromServices] IChatClient
     })
     .WithName("BasicChat");
 
-app.Run();
\ No newline at end of file
+app.MapGet("/chat-with-context/stream", async (HttpContext context, [FromQuery] string query,
+        [FromServices] IChatClient technicalAssistantChat) =>
+    {
+        await StreamAnswer(context, technicalAssistantChat.StreamAnswer(query, true, context.RequestAborted));
+    })
+    .WithName("RagChatStream");
+
+app.MapGet("/chat/stream", async (HttpContext context, [FromQuery] string query,
+        [FromServices] IChatClient technicalAssistantChat) =>
+    {
+        await StreamAnswer(context, technicalAssistantChat.StreamAnswer(query, false, context.RequestAborted));
+    })
+    .WithName("BasicChatStream");
+
+app.Run();
+
+// Writes tokens as plain text and flushes after each one so the UI can render the answer incrementally.
+static async Task StreamAnswer(HttpContext context, IAsyncEnumerable<string> tokens)
+{
+    context.Response.ContentType = "text/plain; charset=utf-8";
+    await foreach (var token in tokens)
+    {
+        await context.Response.WriteAsync(token, context.RequestAborted);
+        await context.Response.Body.FlushAsync(context.RequestAborted);
+    }
+}
\ No newline at end of file
@@ -0,0 +1,87 @@
+"""Deterministic stand-ins for the embedding and chat models, so benchmarks run without Ollama or OpenAI."""
+import re
+import time
+import zlib
+from typing import Any, Iterator, List, Optional
+import numpy as np
+from langchain_core.callbacks import CallbackManagerForLLMRun
+from langchain_core.embeddings import Embeddings
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+from pydantic import PrivateAttr
+
+
+class FakeEmbeddings(Embeddings):
+    """Hashed bag-of-words vectors: the same text always gets the same vector and similar texts are close.
+
+    latency_ms is added to every call to stand in for the model round trip, and load_ms to the first call
+    after construction or unload() to stand in for loading the model.
+    """
+
+    def __init__(self, dimensions: int = 768, latency_ms: float = 0.0, load_ms: float = 0.0):
+        self.dimensions = dimensions
+        self.latency_ms = latency_ms
+        self.load_ms = load_ms
+        self.loaded = False
+
+    def unload(self):
+        self.loaded = False
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        if not self.loaded:
+            time.sleep(self.load_ms / 1000)
+            self.loaded = True
+        if self.latency_ms:
+            time.sleep(self.latency_ms / 1000)
+        return [self.__embed(text) for text in texts]
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.embed_documents([text])[0]
+
+    def __embed(self, text: str) -> List[float]:
+        vector = np.zeros(self.dimensions, dtype=np.float32)
+        for word in re.findall(r"\w+", text.lower()):
+            hashed = zlib.crc32(word.encode("utf-8"))
+            vector[hashed % self.dimensions] += 1.0 if hashed & 0x80000000 else -1.0
+        norm = np.linalg.norm(vector)
+        return (vector / norm if norm else vector).tolist()
+
+
+class FakeStreamingChatModel(BaseChatModel):
+    """Streams a fixed answer at a configurable token rate after a configurable time to first token.
+
+    The first request after construction or unload() waits load_ms more, like a backend loading the model.
+    """
+    answer: str = ("The AppHost wires the services together and the Jupyter container reads the "
+                   "connection strings from environment variables.")
+    tokens_per_second: float = 50.0
+    time_to_first_token_ms: float = 100.0
+    load_ms: float = 0.0
+    _loaded: bool = PrivateAttr(default=False)
+
+    def unload(self):
+        self._loaded = False
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake-streaming-chat"
+
+    def _generate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                  run_manager: Optional[CallbackManagerForLLMRun] = None, **kwargs: Any) -> ChatResult:
+        text = "".join(chunk.message.content for chunk in self._stream(messages, stop, run_manager, **kwargs))
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content=text))])
+
+    def _stream(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                run_manager: Optional[CallbackManagerForLLMRun] = None, **kwargs: Any) -> Iterator[ChatGenerationChunk]:
+        if not self._loaded:
+            time.sleep(self.load_ms / 1000)
+            self._loaded = True
+        time.sleep(self.time_to_first_token_ms / 1000)
+        for index, token in enumerate(re.findall(r"\S+\s*", self.answer)):
+            if index:
+                time.sleep(1 / self.tokens_per_second)
+            chunk = ChatGenerationChunk(message=AIMessageChunk(content=token))
+            if run_manager:
+                run_manager.on_llm_new_token(token, chunk=chunk)
+            yield chunk
@@ -0,0 +1,82 @@
+"""Cold start benchmark: import time of the notebook code package in fresh interpreters.
+
+Compares importing the pipeline and LocalRAG (providers are loaded lazily) with importing every provider
+package up front, as the modules did before the provider registry, and lists which provider packages
+each scenario actually loaded.
+
+    python benchmarks/import_benchmark.py --runs 5 --output import-benchmark.json
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+CODE_DIR = os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "code"))
+
+PROVIDER_PACKAGES = [
+    "langchain_openai",
+    "langchain_ollama",
+    "langchain_community.embeddings",
+    "langchain_community.chat_models",
+    "gitingest",
+    "opentelemetry.instrumentation.langchain",
+    "opentelemetry.instrumentation.qdrant",
+]
+
+SCENARIOS = {
+    "lazy: pipeline + LocalRAG": "import ingestion_pipeline, localrag",
+    # What constructing the pipeline with the Ollama provider imports.
+    "lazy: pipeline + LocalRAG + ollama provider": "import ingestion_pipeline, localrag, langchain_ollama",
+    "eager: pipeline + LocalRAG + all providers":
+        "import ingestion_pipeline, localrag; " + "; ".join(f"import {package}" for package in PROVIDER_PACKAGES),
+}
+
+_RUNNER = """
+import json, sys, time
+started = time.perf_counter()
+{statement}
+elapsed = time.perf_counter() - started
+print(json.dumps({{"seconds": elapsed, "loaded": [p for p in {packages!r} if p in sys.modules]}}))
+"""
+
+
+def measure(statement: str, runs: int) -> dict:
+    env = dict(os.environ, PYTHONPATH=CODE_DIR + os.pathsep + os.environ.get("PYTHONPATH", ""))
+    timings = []
+    loaded = []
+    for _ in range(runs):
+        output = subprocess.run(
+            [sys.executable, "-c", _RUNNER.format(statement=statement, packages=PROVIDER_PACKAGES)],
+            env=env, cwd=CODE_DIR, capture_output=True, text=True, check=True).stdout
+        result = json.loads(output.strip().splitlines()[-1])
+        timings.append(result["seconds"] * 1000)
+        loaded = result["loaded"]
+    return {
+        "runs": runs,
+        "median_ms": statistics.median(timings),
+        "min_ms": min(timings),
+        "max_ms": max(timings),
+        "provider_packages_loaded": loaded,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--output", help="Write the results as JSON to this file")
+    args = parser.parse_args()
+
+    results = {}
+    for name, statement in SCENARIOS.items():
+        results[name] = measure(statement, args.runs)
+        print(f"{name:<48} median {results[name]['median_ms']:8.1f} ms   "
+              f"providers loaded: {', '.join(results[name]['provider_packages_loaded']) or '-'}")
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump(results, file, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,165 @@
+"""Local vector index versus Qdrant local mode: build time, startup, query latency and recall.
+
+Both backends store a synthetic clustered collection on disk through the same client calls (upsert,
+query_points, query_batch_points) the ingestion pipeline and LocalRAG make, then a fresh client is opened on
+the directory to measure startup. Recall@k is measured against exact cosine search in NumPy.
+
+    python benchmarks/local_index_benchmark.py --points 50000 --output local-index-benchmark.json
+"""
+import argparse
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+import uuid
+from typing import Callable, Dict, List
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(BENCHMARK_DIR, "..", "code"))
+
+import numpy as np
+from qdrant_client import QdrantClient
+from qdrant_client.http import models as rest
+from config import LocalIndexConfig
+from local_index import LocalIndexClient
+from metadata_filters import build_metadata_filter
+from rag_benchmark import git_commit, latency_summary
+
+COLLECTION = "benchmark-local-index"
+VECTOR_NAME = "page_content_vector"
+FILE_TYPES = [".md", ".yml", ".cs", ".json", ".txt"]
+BATCH_SIZE = 256
+
+
+def clustered_vectors(points: int, dimensions: int, clusters: int, seed: int = 42) -> np.ndarray:
+    """Points around random centres, closer to how embeddings of related chunks are spread than noise."""
+    rng = np.random.default_rng(seed)
+    centres = rng.normal(size=(clusters, dimensions)).astype(np.float32)
+    vectors = centres[rng.integers(clusters, size=points)] + 0.6 * rng.normal(size=(points, dimensions))
+    return vectors.astype(np.float32)
+
+
+def backends(directory: str, points: int) -> Dict[str, Callable[[], object]]:
+    """Client factories per backend; every call opens the same directory again."""
+    # About sqrt(points) partitions; the index needs 39 rows per partition before it is built.
+    ivf_lists = max(16, int(np.sqrt(points)))
+
+    def local(name: str, **options):
+        return lambda: LocalIndexClient(LocalIndexConfig(path=os.path.join(directory, name), **options))
+    return {
+        "qdrant local mode": lambda: QdrantClient(path=os.path.join(directory, "qdrant")),
+        "local flat float32": local("flat"),
+        "local flat int8": local("flat-int8", quantization="int8"),
+        f"local ivf {ivf_lists} lists, 8 probes": local("ivf", ivf_lists=ivf_lists, ivf_probes=8),
+        f"local ivf {ivf_lists} lists, 8 probes, int8": local("ivf-int8", ivf_lists=ivf_lists, ivf_probes=8,
+                                                              quantization="int8"),
+    }
+
+
+def build(client, vectors: np.ndarray, ids: List[str]) -> float:
+    client.create_collection(COLLECTION, vectors_config={
+        VECTOR_NAME: rest.VectorParams(size=vectors.shape[1], distance=rest.Distance.COSINE)})
+    client.create_payload_index(COLLECTION, "metadata.file_type", rest.PayloadSchemaType.KEYWORD)
+    started = time.perf_counter()
+    for start in range(0, len(vectors), BATCH_SIZE):
+        client.upsert(COLLECTION, points=[
+            rest.PointStruct(id=ids[index], vector={VECTOR_NAME: vectors[index].tolist()},
+                             payload={"page_content": f"chunk {index}",
+                                      "metadata": {"file_type": FILE_TYPES[index % len(FILE_TYPES)]}})
+            for index in range(start, min(start + BATCH_SIZE, len(vectors)))])
+    return time.perf_counter() - started
+
+
+def search(client, query: List[float], k: int, query_filter=None) -> List[str]:
+    response = client.query_points(COLLECTION, query=query, using=VECTOR_NAME, limit=k, query_filter=query_filter,
+                                   with_payload=True)
+    return [str(point.id) for point in response.points]
+
+
+def run(create_client: Callable[[], object], vectors: np.ndarray, ids: List[str], queries: np.ndarray,
+        exact: List[List[str]], k: int, batch: int) -> dict:
+    client = create_client()
+    build_seconds = build(client, vectors, ids)
+    client.close()
+
+    started = time.perf_counter()
+    client = create_client()
+    open_ms = (time.perf_counter() - started) * 1000
+    started = time.perf_counter()
+    search(client, queries[0].tolist(), k)
+    first_query_ms = (time.perf_counter() - started) * 1000
+
+    latencies_ms = []
+    recalls = []
+    for query, expected in zip(queries, exact):
+        started = time.perf_counter()
+        found = search(client, query.tolist(), k)
+        latencies_ms.append((time.perf_counter() - started) * 1000)
+        recalls.append(len(set(found) & set(expected)) / k)
+
+    query_filter = build_metadata_filter({"file_type": ".md"})
+    filtered_ms = []
+    for query in queries:
+        started = time.perf_counter()
+        search(client, query.tolist(), k, query_filter)
+        filtered_ms.append((time.perf_counter() - started) * 1000)
+
+    requests = [rest.QueryRequest(query=query.tolist(), using=VECTOR_NAME, limit=k, with_payload=True)
+                for query in queries[:batch]]
+    started = time.perf_counter()
+    client.query_batch_points(COLLECTION, requests)
+    batch_seconds = time.perf_counter() - started
+    client.close()
+    return {
+        "build_seconds": build_seconds,
+        "open_ms": open_ms,
+        "first_query_ms": first_query_ms,
+        "query": latency_summary(latencies_ms),
+        "filtered_query": latency_summary(filtered_ms),
+        "batch_queries_per_second": len(requests) / batch_seconds,
+        f"recall_at_{k}": float(np.mean(recalls)),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--points", type=int, default=20000)
+    parser.add_argument("--dimensions", type=int, default=768)
+    parser.add_argument("--clusters", type=int, default=200)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--batch", type=int, default=64, help="Queries per query_batch_points call")
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--output", help="Write the results as JSON to this file")
+    args = parser.parse_args()
+
+    vectors = clustered_vectors(args.points, args.dimensions, args.clusters)
+    ids = [str(uuid.UUID(int=index)) for index in range(args.points)]
+    rng = np.random.default_rng(7)
+    queries = vectors[rng.integers(args.points, size=args.queries)] + 0.3 * rng.normal(
+        size=(args.queries, args.dimensions)).astype(np.float32)
+    normalized = vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+    exact_scores = queries @ normalized.T
+    exact = [[ids[index] for index in np.argsort(-scores)[:args.k]] for scores in exact_scores]
+
+    results = {"commit": git_commit(), "parameters": vars(args)}
+    directory = tempfile.mkdtemp(prefix="local-index-benchmark-")
+    try:
+        for name, create_client in backends(directory, args.points).items():
+            result = results[name] = run(create_client, vectors, ids, queries, exact, args.k, args.batch)
+            print(f"{name:<40} build {result['build_seconds']:7.1f} s   open {result['open_ms']:8.1f} ms   "
+                  f"first query {result['first_query_ms']:8.1f} ms   "
+                  f"query p50 {result['query']['p50_ms']:7.2f} ms   p99 {result['query']['p99_ms']:7.2f} ms   "
+                  f"filtered p50 {result['filtered_query']['p50_ms']:7.2f} ms   "
+                  f"batch {result['batch_queries_per_second']:8.0f} q/s   "
+                  f"recall@{args.k} {result[f'recall_at_{args.k}']:.3f}")
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump(results, file, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,253 @@
+"""RAG latency benchmark suite.
+
+Runs the ingestion pipeline and LocalRAG against deterministic stand-in models (benchmarks/fakes.py) and
+Qdrant in local in-memory mode, so no Ollama, OpenAI or Qdrant server is needed. Measures:
+
+- splitting and chunking throughput (files/s, chunks/s) of a synthetic gitingest dump
+- embed + upsert throughput of the ingestion pipeline
+- retrieval latency p50/p95/p99 for several k and collection sizes
+- end-to-end answer latency and time to first token
+
+Results are written as JSON so runs on different commits can be compared:
+
+    python benchmarks/rag_benchmark.py --output results/$(git rev-parse --short HEAD).json
+"""
+import argparse
+import io
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Any, Callable, Dict, Iterator, List, Tuple
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(BENCHMARK_DIR, "..", "code"))
+
+from langchain_core.documents import Document
+from chunking import ParallelChunker
+from client_registry import register_client
+from config import AnswerCacheConfig, IngestionConfig, ModelConfig, RetrievalConfig, VectorDBConfig
+from fakes import FakeEmbeddings, FakeStreamingChatModel
+from gitingest_reader import FILE_DELIMITER, iter_dump_files
+from ingestion_manifest import chunk_point_id
+from ingestion_pipeline import IngestionPipeline
+from latency_stats import percentile
+from localrag import LocalRAG
+
+REPO_URL = "https://github.com/example/benchmark-docs"
+
+WORDS = ("aspire apphost qdrant collection ollama embedding model container jupyter notebook "
+         "connection string endpoint environment variable dashboard telemetry trace span "
+         "deployment manifest service reference resource health check parameter secret port "
+         "volume bind mount configuration chunk vector payload index retrieval prompt answer").split()
+
+QUESTIONS = [
+    "How do I add a Qdrant container to the AppHost?",
+    "Which environment variable holds the Qdrant connection string?",
+    "How is the embedding model configured?",
+    "How do I mount a volume for the notebooks?",
+    "Where can I see the traces of the ingestion pipeline?",
+    "How do I pass a secret parameter to a container?",
+]
+
+
+def sentence(rng: random.Random, words: int = 14) -> str:
+    return " ".join(rng.choice(WORDS) for _ in range(words)).capitalize() + "."
+
+
+def synthetic_dump(files: int, seed: int = 42) -> str:
+    """A gitingest style dump of markdown and yaml files."""
+    rng = random.Random(seed)
+    parts = []
+    for index in range(files):
+        if index % 4 == 3:
+            path = f"deploy/service-{index}.yml"
+            content = "\n".join(f"{rng.choice(WORDS)}_{line}: {rng.choice(WORDS)}" for line in range(30))
+        else:
+            path = f"docs/topic-{index % 10}/page-{index}.md"
+            sections = []
+            for section in range(4):
+                paragraphs = "\n\n".join(" ".join(sentence(rng) for _ in range(4)) for _ in range(3))
+                sections.append(f"## {rng.choice(WORDS).title()} {section}\n\n{paragraphs}")
+            content = f"# Page {index}\n\n" + "\n\n".join(sections)
+        parts.append(f"{FILE_DELIMITER}\nFile: {path}\n{FILE_DELIMITER}\n{content}\n")
+    return "\n".join(parts)
+
+
+def latency_summary(latencies_ms: List[float]) -> Dict[str, float]:
+    return {
+        "count": len(latencies_ms),
+        "mean_ms": sum(latencies_ms) / len(latencies_ms) if latencies_ms else 0.0,
+        "p50_ms": percentile(latencies_ms, 50),
+        "p95_ms": percentile(latencies_ms, 95),
+        "p99_ms": percentile(latencies_ms, 99),
+    }
+
+
+def measure(action: Callable[[Any], object], items: List[Any]) -> List[float]:
+    """Latency of action(item) for every item, in milliseconds."""
+    latencies_ms = []
+    for item in items:
+        started = time.perf_counter()
+        action(item)
+        latencies_ms.append((time.perf_counter() - started) * 1000)
+    return latencies_ms
+
+
+def bench_splitting(dump: str) -> Dict[str, float]:
+    started = time.perf_counter()
+    files = sum(1 for _ in iter_dump_files(io.StringIO(dump)))
+    seconds = time.perf_counter() - started
+    return {"files": files, "seconds": seconds, "files_per_second": files / seconds}
+
+
+def bench_chunking(dump: str, ingestion_config: IngestionConfig) -> Dict[str, float]:
+    chunker = ParallelChunker(ingestion_config.chunking, workers=ingestion_config.chunking_workers,
+                              files_per_task=ingestion_config.chunking_files_per_task)
+    files = [{"path": path, "content": content,
+              "metadata": {"file_type": os.path.splitext(path)[1], "file_path": path}}
+             for path, content in iter_dump_files(io.StringIO(dump))]
+    started = time.perf_counter()
+    chunks = sum(len(file_chunks or []) for _, file_chunks in chunker.chunk(files, {"repository_url": REPO_URL}))
+    seconds = time.perf_counter() - started
+    return {"workers": ingestion_config.chunking_workers, "files": len(files), "chunks": chunks,
+            "seconds": seconds, "files_per_second": len(files) / seconds, "chunks_per_second": chunks / seconds}
+
+
+def bench_ingestion(dump: str, vector_config: VectorDBConfig, embedding_config: ModelConfig,
+                    ingestion_config: IngestionConfig) -> Dict[str, float]:
+    with tempfile.NamedTemporaryFile("w", suffix=".txt", delete=False) as dump_file:
+        dump_file.write(dump)
+    try:
+        pipeline = IngestionPipeline(vector_config, embedding_config, ingestion_config)
+        started = time.perf_counter()
+        report = pipeline.process_single_file(dump_file.name, REPO_URL, drop_existing=True)
+        seconds = time.perf_counter() - started
+    finally:
+        os.unlink(dump_file.name)
+    return {"files": report.files, "chunks": report.updated, "seconds": seconds,
+            "chunks_per_second": report.updated / seconds}
+
+
+def populate(vector_config: VectorDBConfig, embedding_config: ModelConfig, ingestion_config: IngestionConfig,
+             size: int, seed: int = 7):
+    """Fill a collection with size synthetic chunks through the pipeline's upsert stage."""
+    rng = random.Random(seed)
+    pipeline = IngestionPipeline(vector_config, embedding_config, ingestion_config)
+
+    def chunks() -> Iterator[Tuple[str, Document]]:
+        for index in range(size):
+            file_path = f"docs/topic-{index % 10}/page-{index // 8}.md"
+            metadata = {"file_path": file_path, "file_type": ".md", "directory": os.path.dirname(file_path),
+                        "repository_url": REPO_URL, "repository_name": REPO_URL.split("/")[-1],
+                        "chunk_index": index % 8}
+            text = " ".join(sentence(rng) for _ in range(5))
+            yield chunk_point_id(REPO_URL, file_path, index % 8), Document(page_content=text, metadata=metadata)
+
+    pipeline.upsert_stage.run(chunks())
+
+
+def bench_retrieval(sizes: List[int], ks: List[int], queries: int, embedding_config: ModelConfig,
+                    chat_config: ModelConfig, ingestion_config: IngestionConfig,
+                    retrieval_config: RetrievalConfig) -> List[Dict]:
+    results = []
+    for size in sizes:
+        vector_config = VectorDBConfig(url=":memory:", api_key="", collection_name=f"benchmark-{size}")
+        populate(vector_config, embedding_config, ingestion_config, size)
+        rag = LocalRAG(vector_config, embedding_config, chat_config, retrieval_config=retrieval_config)
+        for k in ks:
+            questions = [QUESTIONS[index % len(QUESTIONS)] for index in range(queries)]
+            latencies_ms = measure(lambda question: rag.get_relevant_chunks(question, k=k), questions)
+            results.append({"collection_size": size, "k": k, **latency_summary(latencies_ms)})
+            print(f"retrieval size={size:>6} k={k:>3}  p50 {results[-1]['p50_ms']:6.2f} ms  "
+                  f"p99 {results[-1]['p99_ms']:6.2f} ms")
+    return results
+
+
+def bench_answers(vector_config: VectorDBConfig, embedding_config: ModelConfig, chat_config: ModelConfig,
+                  retrieval_config: RetrievalConfig, queries: int, k: int) -> Dict[str, Dict]:
+    rag = LocalRAG(vector_config, embedding_config, chat_config,
+                   answer_cache_config=AnswerCacheConfig(enabled=False), retrieval_config=retrieval_config)
+    questions = [QUESTIONS[index % len(QUESTIONS)] for index in range(queries)]
+    answer_ms = measure(lambda question: rag.retrieve_and_answer(question, k=k), questions)
+
+    first_token_ms = []
+    stream_ms = []
+    for question in questions:
+        started = time.perf_counter()
+        for index, _ in enumerate(rag.stream_answer(question, k=k)):
+            if index == 0:
+                first_token_ms.append((time.perf_counter() - started) * 1000)
+        stream_ms.append((time.perf_counter() - started) * 1000)
+    return {"k": k, "answer": latency_summary(answer_ms), "stream_total": latency_summary(stream_ms),
+            "time_to_first_token": latency_summary(first_token_ms)}
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=BENCHMARK_DIR,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return ""
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--files", type=int, default=400, help="Files in the synthetic dump")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000], help="Collection sizes (chunks)")
+    parser.add_argument("--ks", type=int, nargs="+", default=[5, 15, 50])
+    parser.add_argument("--queries", type=int, default=50, help="Queries per retrieval measurement")
+    parser.add_argument("--answers", type=int, default=10, help="Questions answered end to end")
+    parser.add_argument("--dimensions", type=int, default=768)
+    parser.add_argument("--embedding-latency-ms", type=float, default=0.0)
+    parser.add_argument("--tokens-per-second", type=float, default=50.0)
+    parser.add_argument("--time-to-first-token-ms", type=float, default=100.0)
+    parser.add_argument("--chunking-workers", type=int, default=0)
+    parser.add_argument("--retrieval-mode", default="dense", choices=["dense", "hybrid"])
+    parser.add_argument("--output", help="Write the results as JSON to this file")
+    args = parser.parse_args()
+
+    embedding_config = ModelConfig(model_name="benchmark-embeddings")
+    chat_config = ModelConfig(model_name="benchmark-chat")
+    register_client("embeddings", embedding_config,
+                    FakeEmbeddings(dimensions=args.dimensions, latency_ms=args.embedding_latency_ms))
+    register_client("chat", chat_config, FakeStreamingChatModel(
+        tokens_per_second=args.tokens_per_second, time_to_first_token_ms=args.time_to_first_token_ms))
+    # Qdrant local mode (":memory:") is not thread safe: one upsert worker writes to it.
+    ingestion_config = IngestionConfig(chunking_workers=args.chunking_workers, upsert_workers=1)
+    retrieval_config = RetrievalConfig(mode=args.retrieval_mode)
+    vector_config = VectorDBConfig(url=":memory:", api_key="", collection_name="benchmark-ingestion")
+
+    dump = synthetic_dump(args.files)
+    results = {
+        "commit": git_commit(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "python": platform.python_version(),
+        "parameters": vars(args),
+    }
+    results["splitting"] = bench_splitting(dump)
+    print(f"splitting  {results['splitting']['files_per_second']:10.0f} files/s")
+    results["chunking"] = bench_chunking(dump, ingestion_config)
+    print(f"chunking   {results['chunking']['files_per_second']:10.0f} files/s "
+          f"{results['chunking']['chunks_per_second']:10.0f} chunks/s")
+    results["ingestion"] = bench_ingestion(dump, vector_config, embedding_config, ingestion_config)
+    print(f"ingestion  {results['ingestion']['chunks_per_second']:10.0f} chunks/s (embed + upsert)")
+    results["retrieval"] = bench_retrieval(args.sizes, args.ks, args.queries, embedding_config, chat_config,
+                                           ingestion_config, retrieval_config)
+    results["answers"] = bench_answers(vector_config, embedding_config, chat_config, retrieval_config,
+                                       args.answers, k=args.ks[0])
+    print(f"answers    p50 {results['answers']['answer']['p50_ms']:.0f} ms, time to first token p50 "
+          f"{results['answers']['time_to_first_token']['p50_ms']:.0f} ms")
+
+    if args.output:
+        os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+        with open(args.output, "w") as file:
+            json.dump(results, file, indent=2)
+
+
+if __name__ == "__main__":
+    main()
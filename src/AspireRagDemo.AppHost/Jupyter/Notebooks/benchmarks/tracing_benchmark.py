@@ -0,0 +1,139 @@
+"""Tracing overhead micro-benchmark: cost per request of each tracing mode.
+
+Each request builds the span tree of a LocalRAG answer: the request span, three spans standing in for the
+LangChain and Qdrant instrumentation and the fine-grained "rag rerank" and "rag format_docs" spans, with the
+same number of attributes. One request in a hundred fails, so tail sampling has errored traces to keep.
+Spans go through the real sampler and span processor of trace_setup into an exporter that only counts them.
+
+    python benchmarks/tracing_benchmark.py --requests 20000 --output tracing-benchmark.json
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+from typing import Dict, Optional, Sequence
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(BENCHMARK_DIR, "..", "code"))
+
+from opentelemetry import trace
+from opentelemetry.sdk.trace import ReadableSpan
+from opentelemetry.sdk.trace.export import SpanExporter, SpanExportResult
+from config import TracingConfig
+from trace_setup import create_tracer_provider
+from tracing_options import fine_grained_span, fine_grained_spans_enabled, set_fine_grained_spans
+
+ERROR_EVERY = 100
+
+MODES: Dict[str, Optional[TracingConfig]] = {
+    "no sdk (api no-op)": None,
+    "off": TracingConfig(mode="off"),
+    "always": TracingConfig(mode="always"),
+    "always, no fine-grained spans": TracingConfig(mode="always", fine_grained_spans=False),
+    "ratio 0.1": TracingConfig(mode="ratio", sample_ratio=0.1),
+    "ratio 0.1, no fine-grained spans": TracingConfig(mode="ratio", sample_ratio=0.1, fine_grained_spans=False),
+    "tail 0.1": TracingConfig(mode="tail", sample_ratio=0.1),
+}
+
+
+class CountingSpanExporter(SpanExporter):
+    """Counts exported spans and traces instead of sending them anywhere."""
+
+    def __init__(self):
+        self.spans = 0
+        self.trace_ids = set()
+
+    def export(self, spans: Sequence[ReadableSpan]) -> SpanExportResult:
+        self.spans += len(spans)
+        self.trace_ids.update(span.context.trace_id for span in spans)
+        return SpanExportResult.SUCCESS
+
+    def shutdown(self):
+        pass
+
+
+def request(tracer: trace.Tracer, index: int):
+    with tracer.start_as_current_span("rag retrieve_and_answer") as span:
+        span.set_attribute("rag.retrieval_mode", "dense")
+        span.set_attribute("rag.answer_cache.result", "miss")
+        if fine_grained_spans_enabled():
+            # The instrumentors are only installed when fine-grained spans are on.
+            for name in ("embeddings", "qdrant query_points", "ChatOllama"):
+                with tracer.start_as_current_span(name) as child:
+                    child.set_attribute("rag.benchmark.request", index)
+        with fine_grained_span(tracer, "rag rerank") as child:
+            child.set_attribute("rag.rerank.reranker", "cosine")
+            child.set_attribute("rag.rerank.candidates", 50)
+            child.set_attribute("rag.rerank.top_k", 6)
+            child.set_attribute("rag.rerank.latency_ms", 0.4)
+        with fine_grained_span(tracer, "rag format_docs") as child:
+            child.set_attribute("rag.context.retrieved_chunks", 6)
+            child.set_attribute("rag.context.tokens", 1800)
+            child.set_attribute("rag.prompt_tokens", 1900)
+            if index % ERROR_EVERY == 0:
+                raise RuntimeError("benchmark failure")
+
+
+def run(config: Optional[TracingConfig], requests: int, repeats: int) -> dict:
+    exporter = CountingSpanExporter()
+    provider = None
+    if config is None:
+        tracer = trace.NoOpTracer()
+    else:
+        provider = create_tracer_provider(config, exporter)
+        tracer = provider.get_tracer(__name__)
+    set_fine_grained_spans(config is None or config.fine_grained_spans)
+
+    def timed(count: int) -> float:
+        started = time.perf_counter()
+        for index in range(count):
+            try:
+                request(tracer, index)
+            except RuntimeError:
+                pass
+        return (time.perf_counter() - started) / count * 1_000_000
+
+    warmup = min(requests, 1000)
+    timed(warmup)
+    per_request_us = [timed(requests) for _ in range(repeats)]
+    if provider:
+        provider.force_flush()
+        provider.shutdown()
+    set_fine_grained_spans(True)
+    total = warmup + requests * repeats
+    return {
+        "median_us_per_request": statistics.median(per_request_us),
+        "min_us_per_request": min(per_request_us),
+        "spans_exported_per_request": exporter.spans / total,
+        "traces_exported": len(exporter.trace_ids),
+        "traces_exported_ratio": len(exporter.trace_ids) / total,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=20000)
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--output", help="Write the results as JSON to this file")
+    args = parser.parse_args()
+
+    results = {}
+    for name, config in MODES.items():
+        results[name] = run(config, args.requests, args.repeats)
+    # The baseline runs the full span tree against the no-op API, so dropping spans can come out below it.
+    baseline = results["no sdk (api no-op)"]["median_us_per_request"]
+    for name, result in results.items():
+        result["overhead_us_per_request"] = result["median_us_per_request"] - baseline
+        print(f"{name:<34} {result['median_us_per_request']:8.1f} us/request   "
+              f"overhead {result['overhead_us_per_request']:8.1f} us   "
+              f"spans exported/request {result['spans_exported_per_request']:5.2f}   "
+              f"traces kept {result['traces_exported_ratio']:6.1%}")
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump(results, file, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,129 @@
+"""Cold-start versus warm latency of the first LocalRAG answer.
+
+For each scenario the models are unloaded first, then LocalRAG is created and answers a first question:
+
+- cold: no warmup, the first request pays for loading the embedding and chat models
+- warm: ServingConfig(warmup=True), the warmup at startup pays for it instead
+
+followed by steady-state requests for comparison. By default the stand-in models of benchmarks/fakes.py
+simulate the load time (--load-ms). With --ollama the configured Ollama models and collection are used
+(ModelConfiguration__* environment variables, as in the notebook) and unloaded with keep_alive 0:
+
+    python benchmarks/warmup_benchmark.py --output warmup-benchmark.json
+    python benchmarks/warmup_benchmark.py --ollama --requests 5
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+import urllib.request
+from typing import Callable, Dict, Tuple
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(BENCHMARK_DIR, "..", "code"))
+
+from client_registry import register_client
+from config import IngestionConfig, ModelConfig, ServingConfig, VectorDBConfig
+from fakes import FakeEmbeddings, FakeStreamingChatModel
+from localrag import LocalRAG
+from rag_benchmark import QUESTIONS, git_commit, populate
+
+
+def timed_answer(rag: LocalRAG, question: str, k: int) -> Tuple[float, float]:
+    """Time to first token and total latency of a streamed answer, in milliseconds."""
+    started = time.perf_counter()
+    first_token_ms = None
+    for _ in rag.stream_answer(question, k=k):
+        if first_token_ms is None:
+            first_token_ms = (time.perf_counter() - started) * 1000
+    return first_token_ms or 0.0, (time.perf_counter() - started) * 1000
+
+
+def run(create_rag: Callable[[bool], LocalRAG], unload: Callable[[], None], warmup: bool, requests: int,
+        k: int) -> Dict[str, float]:
+    unload()
+    started = time.perf_counter()
+    rag = create_rag(warmup)
+    startup_ms = (time.perf_counter() - started) * 1000
+    # Distinct questions, so the embedding cache cannot answer the first one.
+    first_token_ms, first_ms = timed_answer(rag, QUESTIONS[0 if warmup else 1], k)
+    steady = [timed_answer(rag, QUESTIONS[index % len(QUESTIONS)], k) for index in range(requests)]
+    return {
+        "startup_ms": startup_ms,
+        "first_request_ms": first_ms,
+        "first_request_time_to_first_token_ms": first_token_ms,
+        "steady_median_ms": statistics.median(total for _, total in steady) if steady else 0.0,
+        "steady_median_time_to_first_token_ms": statistics.median(ttft for ttft, _ in steady) if steady else 0.0,
+    }
+
+
+def unload_ollama(embedding_config: ModelConfig, chat_config: ModelConfig):
+    """Ask Ollama to unload both models now; the next request loads them again."""
+    for config, path, body in ((embedding_config, "/api/embed", {"input": ""}), (chat_config, "/api/generate", {})):
+        request = urllib.request.Request(
+            f"{config.base_url.rstrip('/')}{path}",
+            data=json.dumps({"model": config.model_name, "keep_alive": 0, **body}).encode(),
+            headers={"Content-Type": "application/json"}, method="POST")
+        urllib.request.urlopen(request, timeout=60).read()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--ollama", action="store_true", help="Use the configured Ollama models and collection")
+    parser.add_argument("--requests", type=int, default=20, help="Steady-state requests after the first one")
+    parser.add_argument("--k", type=int, default=6)
+    parser.add_argument("--load-ms", type=float, default=3000.0, help="Simulated model load time")
+    parser.add_argument("--time-to-first-token-ms", type=float, default=100.0)
+    parser.add_argument("--tokens-per-second", type=float, default=50.0)
+    parser.add_argument("--output", help="Write the results as JSON to this file")
+    args = parser.parse_args()
+
+    if args.ollama:
+        from config_helper import ConfigHelper
+        config_helper = ConfigHelper(False)
+        vector_config = config_helper.vector_db_config
+        embedding_config = config_helper.embedding_config
+        chat_config = config_helper.chat_config
+
+        def unload():
+            unload_ollama(embedding_config, chat_config)
+    else:
+        vector_config = VectorDBConfig(url=":memory:", api_key="", collection_name="benchmark-warmup")
+        embedding_config = ModelConfig(model_name="benchmark-embeddings")
+        chat_config = ModelConfig(model_name="benchmark-chat")
+        embeddings = FakeEmbeddings(load_ms=args.load_ms / 4)
+        chat = FakeStreamingChatModel(load_ms=args.load_ms, time_to_first_token_ms=args.time_to_first_token_ms,
+                                      tokens_per_second=args.tokens_per_second)
+        register_client("embeddings", embedding_config, embeddings)
+        register_client("chat", chat_config, chat)
+        # Qdrant local mode does not support concurrent writers.
+        populate(vector_config, embedding_config, IngestionConfig(upsert_workers=1), 2000)
+
+        def unload():
+            embeddings.unload()
+            chat.unload()
+
+    def create_rag(warmup: bool) -> LocalRAG:
+        return LocalRAG(vector_config, embedding_config, chat_config, serving_config=ServingConfig(warmup=warmup))
+
+    results = {
+        "commit": git_commit(),
+        "backend": "ollama" if args.ollama else "fake",
+        "parameters": vars(args),
+    }
+    for name, warmup in (("cold", False), ("warm", True)):
+        results[name] = run(create_rag, unload, warmup, args.requests, args.k)
+        result = results[name]
+        print(f"{name:<5} startup {result['startup_ms']:8.0f} ms   first request {result['first_request_ms']:8.0f} ms "
+              f"(first token {result['first_request_time_to_first_token_ms']:8.0f} ms)   "
+              f"steady median {result['steady_median_ms']:8.0f} ms "
+              f"(first token {result['steady_median_time_to_first_token_ms']:8.0f} ms)")
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump(results, file, indent=2)
+
+
+if __name__ == "__main__":
+    main()
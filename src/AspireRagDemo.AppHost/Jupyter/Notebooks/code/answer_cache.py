@@ -0,0 +1,166 @@
+"""Two-level answer cache for LocalRAG: exact question match, then semantic near-duplicate match."""
+import re
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Callable, Dict, Hashable, List, Optional
+import numpy as np
+from config import AnswerCacheConfig
+
+# Fingerprint not computed yet; the first lookup computes it.
+_UNSET = object()
+
+# Bumped by the ingestion pipeline whenever a collection changes in this process.
+_collection_generations: Dict[str, int] = {}
+
+
+def notify_collection_changed(collection_name: str):
+    """Invalidate cached answers for a collection that has just been re-ingested."""
+    _collection_generations[collection_name] = _collection_generations.get(collection_name, 0) + 1
+
+
+def collection_generation(collection_name: str) -> int:
+    return _collection_generations.get(collection_name, 0)
+
+
+def normalize_question(question: str) -> str:
+    """Lower case, collapse whitespace and drop trailing punctuation."""
+    return re.sub(r"\s+", " ", question).strip().rstrip("?!. ").lower()
+
+
+@dataclass
+class _CacheEntry:
+    answer: str
+    scope: str
+    created: float
+    slot: int
+
+
+class AnswerCache:
+    """LRU answer cache with TTL expiry.
+
+    Level one is an exact match on the normalized question. Level two keeps the question embeddings in a
+    fixed size float32 matrix and returns the answer of the most similar cached question when the cosine
+    similarity is above the threshold. The scope (retrieval parameters) must match on both levels.
+    The whole cache is dropped when the collection is re-ingested in this process, or when the optional
+    fingerprint of the collection (computed on the first lookup, then checked at most every validation
+    interval) changes.
+    """
+
+    def __init__(self, config: AnswerCacheConfig, collection_name: str,
+                 fingerprint: Callable[[], Hashable] = None):
+        self.config = config
+        self.collection_name = collection_name
+        self.fingerprint = fingerprint
+        self.exact_hits = 0
+        self.semantic_hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[str, _CacheEntry]" = OrderedDict()
+        self._vectors: Optional[np.ndarray] = None
+        self._slot_keys: List[Optional[str]] = [None] * config.max_entries
+        self._free_slots = list(range(config.max_entries - 1, -1, -1))
+        self._lock = threading.Lock()
+        self._generation = collection_generation(collection_name)
+        self._last_fingerprint = _UNSET
+        self._last_validation = 0.0
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.exact_hits + self.semantic_hits + self.misses
+        return (self.exact_hits + self.semantic_hits) / total if total else 0.0
+
+    def stats(self) -> Dict[str, float]:
+        return {"exact_hits": self.exact_hits, "semantic_hits": self.semantic_hits,
+                "misses": self.misses, "hit_rate": self.hit_rate, "entries": len(self._entries)}
+
+    def get_exact(self, question: str, scope: str) -> Optional[str]:
+        """Answer cached for the same normalized question, or None. Does not count a miss."""
+        self.__validate()
+        key = self.__key(normalize_question(question), scope)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or self.__expired(entry):
+                return None
+            self._entries.move_to_end(key)
+            self.exact_hits += 1
+            return entry.answer
+
+    def get_semantic(self, question_vector: List[float], scope: str) -> Optional[str]:
+        """Answer of the most similar cached question above the threshold, or None (counted as a miss)."""
+        with self._lock:
+            if self._vectors is None or not self._entries:
+                self.misses += 1
+                return None
+            similarities = self._vectors @ self.__normalize(question_vector)
+            # Only a handful of candidates can pass the threshold; check them best first.
+            for slot in np.argsort(-similarities)[:8]:
+                if similarities[slot] < self.config.similarity_threshold:
+                    break
+                key = self._slot_keys[slot]
+                entry = self._entries.get(key) if key else None
+                if entry is None or entry.scope != scope or self.__expired(entry):
+                    continue
+                self._entries.move_to_end(key)
+                self.semantic_hits += 1
+                return entry.answer
+            self.misses += 1
+            return None
+
+    def put(self, question: str, question_vector: List[float], scope: str, answer: str):
+        key = self.__key(normalize_question(question), scope)
+        vector = self.__normalize(question_vector)
+        with self._lock:
+            if self._vectors is None:
+                self._vectors = np.zeros((self.config.max_entries, len(vector)), dtype=np.float32)
+            if key in self._entries:
+                self.__remove(key)
+            while not self._free_slots:
+                self.__remove(next(iter(self._entries)))
+            slot = self._free_slots.pop()
+            self._vectors[slot] = vector
+            self._slot_keys[slot] = key
+            self._entries[key] = _CacheEntry(answer=answer, scope=scope, created=time.monotonic(), slot=slot)
+
+    def invalidate(self):
+        with self._lock:
+            for key in list(self._entries):
+                self.__remove(key)
+
+    def __validate(self):
+        """Drop everything when the collection changed since the answers were cached."""
+        generation = collection_generation(self.collection_name)
+        if generation != self._generation:
+            self._generation = generation
+            self.invalidate()
+        if self.fingerprint is None:
+            return
+        now = time.monotonic()
+        if self._last_fingerprint is not _UNSET and \
+                now - self._last_validation < self.config.validation_interval_seconds:
+            return
+        self._last_validation = now
+        current = self.fingerprint()
+        if self._last_fingerprint is not _UNSET and current != self._last_fingerprint:
+            self.invalidate()
+        self._last_fingerprint = current
+
+    def __expired(self, entry: _CacheEntry) -> bool:
+        return time.monotonic() - entry.created > self.config.ttl_seconds
+
+    def __remove(self, key: str):
+        entry = self._entries.pop(key)
+        # A zero row never passes a positive threshold.
+        self._vectors[entry.slot] = 0
+        self._slot_keys[entry.slot] = None
+        self._free_slots.append(entry.slot)
+
+    @staticmethod
+    def __key(normalized_question: str, scope: str) -> str:
+        return f"{scope}\0{normalized_question}"
+
+    @staticmethod
+    def __normalize(vector: List[float]) -> np.ndarray:
+        vector = np.asarray(vector, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
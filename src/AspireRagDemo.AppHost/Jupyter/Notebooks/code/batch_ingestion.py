@@ -0,0 +1,192 @@
+"""Ingest many repositories, local checkouts and dump files into one collection concurrently."""
+import logging
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Callable, List, Optional, Union
+from opentelemetry import context, trace
+from config import VectorDBConfig, ModelConfig, IngestionConfig
+from chunking import create_chunking_pool
+from ingestion_manifest import IngestionReport
+from ingestion_pipeline import IngestionPipeline, fetch_repository
+
+
+@dataclass
+class IngestionSource:
+    """A repository url, a local checkout or a gitingest dump file.
+
+    repo_url identifies the repository in the chunk metadata; it defaults to the url, or the absolute path
+    of a local source.
+    """
+    location: str
+    repo_url: str = ""
+
+    @property
+    def is_local(self) -> bool:
+        return os.path.exists(self.location)
+
+    def __post_init__(self):
+        if not self.repo_url:
+            self.repo_url = os.path.abspath(self.location) if self.is_local else self.location
+
+
+@dataclass
+class SourceResult:
+    """Outcome of one source of a batch; error is set instead of report when it failed."""
+    source: IngestionSource
+    report: Optional[IngestionReport] = None
+    error: str = ""
+    fetch_seconds: float = 0.0
+    ingest_seconds: float = 0.0
+
+    @property
+    def succeeded(self) -> bool:
+        return self.report is not None
+
+    @property
+    def chunks_per_second(self) -> float:
+        return self.report.updated / self.ingest_seconds if self.report and self.ingest_seconds else 0.0
+
+    def __str__(self):
+        if not self.succeeded:
+            return f"{self.source.location}: failed after {self.fetch_seconds + self.ingest_seconds:.1f}s: {self.error}"
+        return (f"{self.source.location}: {self.report}, fetched in {self.fetch_seconds:.1f}s, "
+                f"ingested in {self.ingest_seconds:.1f}s ({self.chunks_per_second:.1f} chunks/s)")
+
+
+class BatchIngestion:
+    """Fetch, chunk and embed many sources with bounded pools, one failure not affecting the others.
+
+    Repositories are fetched with gitingest on fetch_workers threads while up to repository_workers
+    sources are chunked and embedded. All of them share one chunking process pool, at most max_concurrency
+    embedding requests in flight, and the embedding and Qdrant clients of the client registry.
+    Qdrant in local mode (url ":memory:") does not support concurrent writers: use one repository worker
+    and one upsert worker there.
+    """
+
+    def __init__(self, vector_db_config: VectorDBConfig, embedding_config: ModelConfig,
+                 ingestion_config: IngestionConfig = None):
+        self.logger = logging.getLogger(__name__)
+        self.tracer = trace.get_tracer(__name__)
+        self.vector_config = vector_db_config
+        self.embedding_config = embedding_config
+        self.ingestion_config = ingestion_config or IngestionConfig()
+
+    def run(self, sources: List[Union[str, IngestionSource]], drop_existing: bool = False, incremental: bool = True,
+            on_progress: Callable[[SourceResult], None] = None) -> List[SourceResult]:
+        """Ingest the sources; results come back in the order of the sources.
+
+        on_progress is called with the result of every source as soon as it finished or failed.
+        """
+        results = [SourceResult(source if isinstance(source, IngestionSource) else IngestionSource(source))
+                   for source in sources]
+        config = self.ingestion_config
+        with self.tracer.start_as_current_span("batch ingestion") as span:
+            span.set_attribute("ingestion.sources", len(results))
+            parent = context.get_current()
+            chunking_pool = create_chunking_pool(config.chunking, config.chunking_workers) \
+                if config.chunking_workers > 1 else None
+            pipelines = self.__create_pipelines(drop_existing, chunking_pool,
+                                                threading.BoundedSemaphore(config.max_concurrency))
+            # Fetched sources wait for a repository worker; this bounds how many dumps are held in memory.
+            in_flight = threading.BoundedSemaphore(config.fetch_workers + config.repository_workers)
+            ingesting: List[Future] = []
+            try:
+                with ThreadPoolExecutor(config.fetch_workers, thread_name_prefix="fetch") as fetch_pool, \
+                        ThreadPoolExecutor(config.repository_workers, thread_name_prefix="ingest") as ingest_pool:
+                    def fetched(result: SourceResult, future: Future):
+                        if result.error:
+                            self.__finished(result, in_flight, on_progress)
+                        else:
+                            ingesting.append(ingest_pool.submit(
+                                self.__in_context, parent, self.__ingest, result, future.result(),
+                                pipelines, incremental, in_flight, on_progress))
+
+                    for result in results:
+                        in_flight.acquire()
+                        fetch_pool.submit(self.__in_context, parent, self.__fetch, result).add_done_callback(
+                            lambda future, result=result: fetched(result, future))
+                    # Every fetch has run its callback, so every ingest has been submitted.
+                    fetch_pool.shutdown(wait=True)
+                    for future in ingesting:
+                        future.result()
+            finally:
+                if chunking_pool:
+                    chunking_pool.shutdown()
+            failed = sum(not result.succeeded for result in results)
+            span.set_attribute("ingestion.sources_failed", failed)
+            self.logger.info(f"Batch ingestion of {len(results)} sources done, {failed} failed")
+        return results
+
+    def __create_pipelines(self, drop_existing: bool, chunking_pool: Optional[ProcessPoolExecutor],
+                           embed_slots: threading.Semaphore) -> "queue.Queue[IngestionPipeline]":
+        """One pipeline per repository worker: a pipeline holds the state of the source it is ingesting."""
+        pipelines = queue.Queue()
+        for index in range(self.ingestion_config.repository_workers):
+            pipeline = IngestionPipeline(self.vector_config, self.embedding_config, self.ingestion_config)
+            if index == 0 and drop_existing:
+                # Dropped once for the whole batch, before any source is ingested.
+                pipeline.drop_collection()
+            pipeline.chunker.pool = chunking_pool
+            pipeline.upsert_stage.embed_slots = embed_slots
+            pipelines.put(pipeline)
+        return pipelines
+
+    def __fetch(self, result: SourceResult) -> Optional[str]:
+        """The gitingest dump of a repository url; local sources are read while they are ingested."""
+        started = time.perf_counter()
+        try:
+            if result.source.is_local:
+                return None
+            with self.tracer.start_as_current_span("fetch repository") as span:
+                span.set_attribute("ingestion.source", result.source.location)
+                return fetch_repository(result.source.location)
+        except Exception as e:
+            self.logger.exception(f"Fetching {result.source.location} failed")
+            result.error = f"fetch failed: {e}"
+        finally:
+            result.fetch_seconds = time.perf_counter() - started
+
+    def __ingest(self, result: SourceResult, content: Optional[str], pipelines: "queue.Queue[IngestionPipeline]",
+                 incremental: bool, in_flight: threading.Semaphore,
+                 on_progress: Callable[[SourceResult], None]):
+        pipeline = pipelines.get()
+        started = time.perf_counter()
+        source = result.source
+        try:
+            with self.tracer.start_as_current_span("ingest source") as span:
+                span.set_attribute("ingestion.source", source.location)
+                if content is not None:
+                    result.report = pipeline.process_dump(content, source.repo_url, incremental=incremental)
+                elif os.path.isdir(source.location):
+                    result.report = pipeline.process_directory(source.location, source.repo_url,
+                                                               incremental=incremental)
+                else:
+                    result.report = pipeline.process_single_file(source.location, source.repo_url,
+                                                                 incremental=incremental)
+        except Exception as e:
+            self.logger.exception(f"Ingesting {source.location} failed")
+            result.error = f"ingestion failed: {e}"
+        finally:
+            result.ingest_seconds = time.perf_counter() - started
+            pipelines.put(pipeline)
+            self.__finished(result, in_flight, on_progress)
+
+    def __finished(self, result: SourceResult, in_flight: threading.Semaphore,
+                   on_progress: Callable[[SourceResult], None]):
+        in_flight.release()
+        self.logger.info(str(result))
+        if on_progress:
+            on_progress(result)
+
+    @staticmethod
+    def __in_context(parent, action, *args):
+        """Run the action in a worker thread with the caller's trace context attached."""
+        token = context.attach(parent)
+        try:
+            return action(*args)
+        finally:
+            context.detach(token)
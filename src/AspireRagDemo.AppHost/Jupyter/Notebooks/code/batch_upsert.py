@@ -0,0 +1,190 @@
+"""Batched, concurrent embedding and upsert stage for the ingestion pipeline."""
+import logging
+import random
+import threading
+import time
+from collections import deque
+from contextlib import nullcontext
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Callable, Iterable, Iterator, List, Tuple, TypeVar
+import httpx
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+from opentelemetry import context, trace
+from qdrant_client import QdrantClient
+from qdrant_client.http import models as rest
+from qdrant_client.http.exceptions import ResponseHandlingException
+from config import IngestionConfig
+from sparse_vectors import SparseEncoder
+from latency_stats import percentile
+from rag_metrics import get_rag_metrics
+from tracing_options import fine_grained_span
+
+T = TypeVar("T")
+
+
+def is_transient(error: Exception) -> bool:
+    """Errors worth retrying: connection problems, timeouts, throttling and server side failures."""
+    if isinstance(error, (ConnectionError, TimeoutError, httpx.TransportError, ResponseHandlingException)):
+        return True
+    if isinstance(error, httpx.HTTPStatusError):
+        status_code = error.response.status_code
+    else:
+        # UnexpectedResponse from Qdrant and ResponseError from Ollama both carry a status code.
+        status_code = getattr(error, "status_code", None)
+    return isinstance(status_code, int) and (status_code == 429 or status_code >= 500)
+
+
+def retry_with_backoff(action: Callable[[], T], max_retries: int, backoff_seconds: float,
+                       logger: logging.Logger, description: str) -> T:
+    """Run the action, retrying transient failures with exponential backoff and jitter."""
+    attempt = 0
+    while True:
+        try:
+            return action()
+        except Exception as e:
+            if attempt >= max_retries or not is_transient(e):
+                raise
+            delay = backoff_seconds * (2 ** attempt) * (0.5 + random.random())
+            attempt += 1
+            logger.warning(f"{description} failed ({e}), retry {attempt}/{max_retries} in {delay:.1f}s")
+            time.sleep(delay)
+
+
+@dataclass
+class UpsertStats:
+    """Throughput of a BatchUpsertStage run."""
+    chunks: int = 0
+    batches: int = 0
+    seconds: float = 0.0
+    embed_latencies_ms: List[float] = field(default_factory=list)
+
+    @property
+    def chunks_per_second(self) -> float:
+        return self.chunks / self.seconds if self.seconds else 0.0
+
+
+class BatchUpsertStage:
+    """Embed chunks in batches with bounded concurrency and upsert them into Qdrant with parallel workers.
+
+    Items are pulled lazily from the input so only the batches in flight are held in memory.
+    With a sparse encoder, a sparse vector is stored next to the dense vector of every point.
+    Stages sharing embed_slots have at most that many embedding requests in flight between them.
+    """
+
+    def __init__(self, qdrant: QdrantClient, embeddings: Embeddings, collection_name: str,
+                 vector_name: str, config: IngestionConfig, sparse_encoder: SparseEncoder = None,
+                 sparse_vector_name: str = None, embed_slots: threading.Semaphore = None):
+        self.logger = logging.getLogger(__name__)
+        self.tracer = trace.get_tracer(__name__)
+        self.metrics = get_rag_metrics()
+        self.qdrant = qdrant
+        self.embeddings = embeddings
+        self.collection_name = collection_name
+        self.vector_name = vector_name
+        self.config = config
+        self.sparse_encoder = sparse_encoder
+        self.sparse_vector_name = sparse_vector_name
+        self.embed_slots = embed_slots
+
+    def run(self, items: Iterable[Tuple[str, Document]],
+            on_batch_committed: Callable[[int], None] = None) -> UpsertStats:
+        """Embed and upsert (point id, document) pairs. Span attributes are set on the current span.
+
+        on_batch_committed is called with the chunk count of every upserted batch, in input order.
+        """
+        stats = UpsertStats()
+        started = time.perf_counter()
+        parent = context.get_current()
+        with ThreadPoolExecutor(self.config.max_concurrency, thread_name_prefix="embed") as embed_pool, \
+                ThreadPoolExecutor(self.config.upsert_workers, thread_name_prefix="upsert") as upsert_pool:
+            embedding, upserting = deque(), deque()
+            for batch in self.__batches(items):
+                embedding.append(embed_pool.submit(self.__in_context, parent, self.__embed_batch, batch, stats))
+                # Keep at most max_concurrency batches embedding and upsert_workers batches upserting.
+                while len(embedding) >= self.config.max_concurrency:
+                    upserting.append(upsert_pool.submit(self.__in_context, parent, self.__upsert_batch,
+                                                        embedding.popleft().result()))
+                while len(upserting) > self.config.upsert_workers:
+                    self.__committed(upserting.popleft().result(), stats, on_batch_committed)
+            while embedding:
+                upserting.append(upsert_pool.submit(self.__in_context, parent, self.__upsert_batch,
+                                                    embedding.popleft().result()))
+            while upserting:
+                self.__committed(upserting.popleft().result(), stats, on_batch_committed)
+        stats.seconds = time.perf_counter() - started
+
+        span = trace.get_current_span()
+        span.set_attribute("ingestion.batch_size", self.config.batch_size)
+        span.set_attribute("ingestion.max_concurrency", self.config.max_concurrency)
+        span.set_attribute("ingestion.upsert_workers", self.config.upsert_workers)
+        span.set_attribute("ingestion.chunks", stats.chunks)
+        span.set_attribute("ingestion.chunks_per_second", stats.chunks_per_second)
+        span.set_attribute("ingestion.embed_latency_p50_ms", percentile(stats.embed_latencies_ms, 50))
+        span.set_attribute("ingestion.embed_latency_p99_ms", percentile(stats.embed_latencies_ms, 99))
+        self.logger.info(f"Upserted {stats.chunks} chunks in {stats.batches} batches, "
+                         f"{stats.chunks_per_second:.1f} chunks/s")
+        return stats
+
+    @staticmethod
+    def __committed(chunks: int, stats: UpsertStats, on_batch_committed: Callable[[int], None]):
+        stats.chunks += chunks
+        stats.batches += 1
+        if on_batch_committed:
+            on_batch_committed(chunks)
+
+    def __batches(self, items: Iterable[Tuple[str, Document]]) -> Iterator[List[Tuple[str, Document]]]:
+        batch = []
+        for item in items:
+            batch.append(item)
+            if len(batch) >= self.config.batch_size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+
+    @staticmethod
+    def __in_context(parent, action, *args):
+        """Run the action in a worker thread with the caller's trace context attached."""
+        token = context.attach(parent)
+        try:
+            return action(*args)
+        finally:
+            context.detach(token)
+
+    def __embed_batch(self, batch: List[Tuple[str, Document]], stats: UpsertStats) -> List[rest.PointStruct]:
+        with fine_grained_span(self.tracer, "embed batch") as span:
+            span.set_attribute("ingestion.batch_chunks", len(batch))
+            with self.embed_slots or nullcontext():
+                # Waiting for a slot is not part of the embedding latency.
+                started = time.perf_counter()
+                vectors = retry_with_backoff(
+                    lambda: self.embeddings.embed_documents([document.page_content for _, document in batch]),
+                    self.config.max_retries, self.config.retry_backoff_seconds, self.logger, "Embedding batch")
+                latency_ms = (time.perf_counter() - started) * 1000
+                stats.embed_latencies_ms.append(latency_ms)
+            self.metrics.embedding_duration.record(latency_ms, {"rag.stage": "ingestion"})
+            # Same payload layout as langchain_qdrant so LocalRAG can read the points back.
+            return [
+                rest.PointStruct(
+                    id=point_id,
+                    vector=self.__point_vectors(document, vector),
+                    payload={"page_content": document.page_content, "metadata": document.metadata})
+                for (point_id, document), vector in zip(batch, vectors)
+            ]
+
+    def __point_vectors(self, document: Document, vector: List[float]) -> dict:
+        vectors = {self.vector_name: vector}
+        if self.sparse_encoder:
+            vectors[self.sparse_vector_name] = self.sparse_encoder.encode_document(document.page_content)
+        return vectors
+
+    def __upsert_batch(self, points: List[rest.PointStruct]) -> int:
+        with fine_grained_span(self.tracer, "upsert batch") as span:
+            span.set_attribute("ingestion.batch_chunks", len(points))
+            retry_with_backoff(
+                lambda: self.qdrant.upsert(collection_name=self.collection_name, points=points, wait=True),
+                self.config.max_retries, self.config.retry_backoff_seconds, self.logger, "Upserting batch")
+            self.metrics.chunks_embedded.add(len(points))
+            return len(points)
@@ -0,0 +1,228 @@
+"""File-type specific chunking, optionally spread across a process pool."""
+import logging
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+from langchain.text_splitter import (
+    RecursiveCharacterTextSplitter,
+    MarkdownHeaderTextSplitter,
+)
+from langchain_core.documents import Document
+from opentelemetry import trace
+from config import ChunkingConfig
+from ingestion_manifest import content_hash
+from tracing_options import fine_grained_spans_enabled
+
+
+MARKDOWN_HEADERS = [
+    ("#", "Header 1"),
+    ("##", "Header 2"),
+    ("###", "Header 3"),
+    ("####", "Header 4")
+]
+
+
+def _record_overlaps(chunks: List[Document]) -> List[Document]:
+    """Replace the splitter's start offsets by the number of characters each chunk repeats from the previous one."""
+    previous_end = None
+    for chunk in chunks:
+        start = chunk.metadata.pop("start_index", None)
+        if previous_end is not None and start is not None:
+            chunk.metadata["overlap_chars"] = max(0, previous_end - start)
+        previous_end = start + len(chunk.page_content) if start is not None else None
+    return chunks
+
+
+@dataclass
+class ChunkingStats:
+    """Files, chunks and time spent chunking for one file extension."""
+    files: int = 0
+    chunks: int = 0
+    seconds: float = 0.0
+
+    def add(self, other: "ChunkingStats"):
+        self.files += other.files
+        self.chunks += other.chunks
+        self.seconds += other.seconds
+
+
+class ChunkingStrategyRegistry:
+    """Pre-built splitters keyed by file extension, built once from the chunking configuration."""
+
+    def __init__(self, config: ChunkingConfig):
+        self.logger = logging.getLogger(__name__)
+        self.config = config
+        self.splitters: Dict[str, RecursiveCharacterTextSplitter] = {
+            extension: RecursiveCharacterTextSplitter(
+                chunk_size=strategy.chunk_size,
+                chunk_overlap=strategy.chunk_overlap,
+                separators=strategy.separators,
+                add_start_index=True
+            )
+            for extension, strategy in config.strategies.items()
+        }
+        self.markdown_splitter = MarkdownHeaderTextSplitter(headers_to_split_on=MARKDOWN_HEADERS)
+        self.stats: Dict[str, ChunkingStats] = {}
+
+    def chunk_file(self, file: Dict, repo_metadata: Dict) -> Optional[List[Document]]:
+        """Chunk a single file using the file-type specific strategy, with rich metadata.
+
+        Returns None when the file could not be chunked, so its stored points are kept rather than removed.
+        """
+        started = time.perf_counter()
+        file_ext = file["metadata"]["file_type"]
+        combined_metadata = {
+            **file["metadata"],
+            **repo_metadata
+        }
+
+        try:
+            if file_ext == '.md' and '.md' in self.splitters:
+                file_chunks = self.__chunk_markdown(file["content"], combined_metadata)
+            else:
+                splitter = self.splitters.get(file_ext, self.splitters['default'])
+                file_chunks = _record_overlaps(splitter.create_documents(
+                    texts=[file["content"]],
+                    metadatas=[combined_metadata]
+                ))
+        except Exception as e:
+            self.logger.error(f"Error processing file {file['path']}: {str(e)}")
+            return None
+
+        # Position and content hash identify the chunk for incremental re-ingestion. The overlap lets the context
+        # builder merge neighbouring chunks; header sections of markdown files do not overlap.
+        for chunk_index, chunk in enumerate(file_chunks):
+            chunk.metadata["chunk_index"] = chunk_index
+            chunk.metadata["chunk_hash"] = content_hash(chunk.page_content)
+            chunk.metadata.setdefault("overlap_chars", 0)
+
+        stats = self.stats.setdefault(file_ext if file_ext in self.splitters else 'default', ChunkingStats())
+        stats.files += 1
+        stats.chunks += len(file_chunks)
+        stats.seconds += time.perf_counter() - started
+        return file_chunks
+
+    def __chunk_markdown(self, content: str, metadata: Dict) -> List[Document]:
+        """Split on headers, then split again only the sections that are over the size limit."""
+        header_splits = self.markdown_splitter.split_text(content)
+        size_limit = self.config.strategies['.md'].chunk_size
+        if all(len(split.page_content) <= size_limit for split in header_splits):
+            # Fast path: no second splitting pass.
+            for split in header_splits:
+                split.metadata.update(metadata)
+            return header_splits
+
+        chunks = []
+        for split in header_splits:
+            if len(split.page_content) <= size_limit:
+                split.metadata.update(metadata)
+                chunks.append(split)
+            else:
+                chunks.extend(_record_overlaps(self.splitters['.md'].create_documents(
+                    texts=[split.page_content],
+                    metadatas=[{
+                        **split.metadata,
+                        **metadata
+                    }]
+                )))
+        return chunks
+
+
+# Registry of a chunking worker process, built once by the pool initializer.
+_worker_registry: ChunkingStrategyRegistry = None
+
+
+def _init_worker(config: ChunkingConfig):
+    global _worker_registry
+    _worker_registry = ChunkingStrategyRegistry(config)
+
+
+def chunk_files(files: List[Dict], repo_metadata: Dict, registry: ChunkingStrategyRegistry = None):
+    """Chunk a task worth of files.
+
+    Runs in a worker process, so it returns its own wall clock timings and per-extension statistics.
+    """
+    started_ns = time.time_ns()
+    registry = registry or _worker_registry
+    registry.stats = {}
+    results = [(file, registry.chunk_file(file, repo_metadata)) for file in files]
+    return results, started_ns, time.time_ns(), registry.stats
+
+
+def create_chunking_pool(config: ChunkingConfig, workers: int) -> ProcessPoolExecutor:
+    """Worker processes with a chunking registry for the configuration."""
+    return ProcessPoolExecutor(workers, initializer=_init_worker, initargs=(config,))
+
+
+class ParallelChunker:
+    """Chunk files on a process pool while the caller consumes the results.
+
+    Files are grouped into tasks of files_per_task and at most two tasks per worker are in flight,
+    so chunking runs ahead of the embedding stage without holding the whole repository in memory.
+    Results are yielded in input order. With workers <= 1 the files are chunked in the calling process.
+    A pool passed in (e.g. shared by the chunkers of several repositories) is used instead of a pool per run.
+    """
+
+    def __init__(self, config: ChunkingConfig, workers: int = 0, files_per_task: int = 8,
+                 pool: ProcessPoolExecutor = None):
+        self.logger = logging.getLogger(__name__)
+        self.tracer = trace.get_tracer(__name__)
+        self.config = config
+        self.workers = workers
+        self.files_per_task = files_per_task
+        self.pool = pool
+        self.registry = ChunkingStrategyRegistry(config)
+        self.stats: Dict[str, ChunkingStats] = {}
+
+    def chunk(self, files: Iterable[Dict], repo_metadata: Dict) -> Iterator[Tuple[Dict, Optional[List[Document]]]]:
+        """Yield (file, chunks) for every file, in the order the files were given; chunks is None for a file
+        that failed to chunk.
+
+        Per-extension statistics of the run are available in stats once the generator is exhausted.
+        """
+        self.stats = {}
+        if self.workers <= 1:
+            for task in self.__tasks(files):
+                yield from self.__collect(chunk_files(task, repo_metadata, self.registry))
+            return
+
+        if self.pool:
+            yield from self.__chunk_on(self.pool, files, repo_metadata)
+            return
+        self.logger.info(f"Chunking with {self.workers} worker processes")
+        with create_chunking_pool(self.config, self.workers) as pool:
+            yield from self.__chunk_on(pool, files, repo_metadata)
+
+    def __chunk_on(self, pool: ProcessPoolExecutor, files: Iterable[Dict],
+                   repo_metadata: Dict) -> Iterator[Tuple[Dict, Optional[List[Document]]]]:
+        pending = deque()
+        for task in self.__tasks(files):
+            pending.append(pool.submit(chunk_files, task, repo_metadata))
+            if len(pending) >= self.workers * 2:
+                yield from self.__collect(pending.popleft().result())
+        while pending:
+            yield from self.__collect(pending.popleft().result())
+
+    def __tasks(self, files: Iterable[Dict]) -> Iterator[List[Dict]]:
+        task = []
+        for file in files:
+            task.append(file)
+            if len(task) >= self.files_per_task:
+                yield task
+                task = []
+        if task:
+            yield task
+
+    def __collect(self, task_result) -> List[Tuple[Dict, Optional[List[Document]]]]:
+        """Record a span covering the time the task spent in its worker."""
+        results, started_ns, ended_ns, stats = task_result
+        for extension, extension_stats in stats.items():
+            self.stats.setdefault(extension, ChunkingStats()).add(extension_stats)
+        if fine_grained_spans_enabled():
+            span = self.tracer.start_span("chunk batch", start_time=started_ns)
+            span.set_attribute("chunking.files", len(results))
+            span.set_attribute("chunking.chunks", sum(len(chunks or []) for _, chunks in results))
+            span.end(end_time=ended_ns)
+        return results
@@ -0,0 +1,129 @@
+"""Process wide registry of Qdrant, embedding and chat clients, shared by LocalRAG and IngestionPipeline instances."""
+import dataclasses
+import logging
+import threading
+from typing import Any, Callable, Dict, Hashable
+from urllib.parse import urlparse
+from langchain_core.embeddings import Embeddings
+from langchain_core.language_models import BaseChatModel
+from qdrant_client import AsyncQdrantClient, QdrantClient
+from config import ModelConfig, VectorDBConfig
+from embedding_cache import with_embedding_cache
+from local_index import AsyncLocalIndexClient, LocalIndexClient
+from providers import create_chat_model, create_embeddings
+
+# Output dimensions of common embedding models, so a new collection can be created without a probe request.
+# Keyed by exact model name: tags of the same model can differ in size (snowflake-arctic-embed:33m is 384).
+# A bare Ollama name means its default tag, ":latest".
+KNOWN_VECTOR_SIZES: Dict[str, int] = {
+    "nomic-embed-text": 768,
+    "mxbai-embed-large": 1024,
+    "snowflake-arctic-embed": 1024,
+    "bge-m3": 1024,
+    "bge-large": 1024,
+    "all-minilm": 384,
+    "text-embedding-3-small": 1536,
+    "text-embedding-3-large": 3072,
+    "text-embedding-ada-002": 1536,
+    "sentence-transformers/all-MiniLM-L6-v2": 384,
+    "sentence-transformers/all-mpnet-base-v2": 768,
+}
+
+VECTOR_DB_BACKENDS = ["qdrant", "local"]
+
+_lock = threading.Lock()
+_clients: Dict[Hashable, Any] = {}
+_vector_sizes: Dict[str, int] = {}
+
+
+def _key(kind: str, config) -> Hashable:
+    return (kind, dataclasses.astuple(config) if dataclasses.is_dataclass(config) else config)
+
+
+def shared_client(kind: str, config, factory: Callable[[], Any]) -> Any:
+    """Return the client of this kind built for an equal configuration, creating it with factory on first use.
+
+    config is a configuration dataclass or any hashable key.
+    """
+    key = _key(kind, config)
+    with _lock:
+        client = _clients.get(key)
+        if client is None:
+            client = factory()
+            _clients[key] = client
+        return client
+
+
+def register_client(kind: str, config, client: Any):
+    """Use client for this kind and configuration, e.g. a stand-in model in benchmarks."""
+    with _lock:
+        _clients[_key(kind, config)] = client
+
+
+def _qdrant_arguments(config: VectorDBConfig) -> Dict[str, Any]:
+    if config.url == ":memory:":
+        # Local in-process mode, used by the benchmarks. Every client gets its own storage.
+        return {"location": ":memory:"}
+    arguments = {"url": config.url, "api_key": config.api_key}
+    if config.grpc_url:
+        # gRPC keeps one multiplexed HTTP/2 connection and avoids JSON (de)serialization of vectors.
+        arguments["prefer_grpc"] = True
+        arguments["grpc_port"] = urlparse(config.grpc_url).port or 6334
+    return arguments
+
+
+def _check_backend(config: VectorDBConfig):
+    if config.backend not in VECTOR_DB_BACKENDS:
+        raise ValueError(f"Unknown vector database backend: {config.backend}. "
+                         f"Use {' or '.join(VECTOR_DB_BACKENDS)}.")
+
+
+def get_qdrant_client(config: VectorDBConfig) -> QdrantClient:
+    """Shared client per Qdrant endpoint; using gRPC when the configuration has a gRPC endpoint.
+
+    With the local backend, the shared LocalIndexClient of the index directory, which has the same methods.
+    """
+    _check_backend(config)
+    if config.backend == "local":
+        return shared_client("local-index", config.local_index, lambda: LocalIndexClient(config.local_index))
+    key = (config.url, config.api_key, config.grpc_url)
+    return shared_client("qdrant", key, lambda: QdrantClient(**_qdrant_arguments(config)))
+
+
+def get_async_qdrant_client(config: VectorDBConfig) -> AsyncQdrantClient:
+    _check_backend(config)
+    if config.backend == "local":
+        # Created outside shared_client: the factory runs under the registry lock.
+        client = get_qdrant_client(config)
+        return shared_client("async-local-index", config.local_index, lambda: AsyncLocalIndexClient(client))
+    key = (config.url, config.api_key, config.grpc_url)
+    return shared_client("async-qdrant", key, lambda: AsyncQdrantClient(**_qdrant_arguments(config)))
+
+
+def get_embeddings(config: ModelConfig) -> Embeddings:
+    """Shared embedding client of the configured provider, wrapped in the embedding cache when configured."""
+    return shared_client("embeddings", config, lambda: with_embedding_cache(create_embeddings(config), config))
+
+
+def get_chat_model(config: ModelConfig) -> BaseChatModel:
+    return shared_client("chat", config, lambda: create_chat_model(config))
+
+
+def get_vector_size(embeddings: Embeddings, model_name: str) -> int:
+    """Vector size of an embedding model: known models need no request, others are probed once per process.
+
+    Only exact names are looked up; a tag that is not in KNOWN_VECTOR_SIZES is probed.
+    """
+    name = model_name or ""
+    if name.endswith(":latest"):
+        name = name[:-len(":latest")]
+    with _lock:
+        size = _vector_sizes.get(model_name) or KNOWN_VECTOR_SIZES.get(name)
+    if size:
+        return size
+    logging.getLogger(__name__).info(f"Probing the vector size of {model_name}")
+    size = len(embeddings.embed_query("test"))
+    with _lock:
+        _vector_sizes[model_name] = size
+    return size
+
@@ -0,0 +1,79 @@
+"""Named Qdrant collection tuning profiles shared by the ingestion pipeline and LocalRAG."""
+from dataclasses import dataclass
+from typing import Dict, Optional
+from qdrant_client.http import models as rest
+
+# Qdrant's default indexing threshold (KB of vectors); restored after a bulk load.
+DEFAULT_INDEXING_THRESHOLD = 20000
+
+
+@dataclass(frozen=True)
+class CollectionProfile:
+    """Collection layout used when the collection is created, and search parameters used when querying it."""
+    name: str
+    hnsw_m: Optional[int] = None
+    hnsw_ef_construct: Optional[int] = None
+    hnsw_on_disk: bool = False
+    vectors_on_disk: bool = False
+    # None, "scalar" (int8) or "binary".
+    quantization: Optional[str] = None
+    quantization_always_ram: bool = True
+    search_hnsw_ef: Optional[int] = None
+    search_rescore: bool = True
+    search_oversampling: Optional[float] = None
+    # Disable HNSW indexing while ingesting and build the index once at the end.
+    bulk_load: bool = False
+
+    def vector_params(self, size: int) -> rest.VectorParams:
+        return rest.VectorParams(size=size, distance=rest.Distance.COSINE, on_disk=self.vectors_on_disk or None)
+
+    def hnsw_config(self) -> Optional[rest.HnswConfigDiff]:
+        if self.hnsw_m is None and self.hnsw_ef_construct is None and not self.hnsw_on_disk:
+            return None
+        return rest.HnswConfigDiff(m=self.hnsw_m, ef_construct=self.hnsw_ef_construct,
+                                   on_disk=self.hnsw_on_disk or None)
+
+    def quantization_config(self) -> Optional[rest.QuantizationConfig]:
+        if self.quantization == "scalar":
+            return rest.ScalarQuantization(scalar=rest.ScalarQuantizationConfig(
+                type=rest.ScalarType.INT8, quantile=0.99, always_ram=self.quantization_always_ram))
+        if self.quantization == "binary":
+            return rest.BinaryQuantization(binary=rest.BinaryQuantizationConfig(
+                always_ram=self.quantization_always_ram))
+        return None
+
+    def optimizers_config(self) -> Optional[rest.OptimizersConfigDiff]:
+        return rest.OptimizersConfigDiff(indexing_threshold=0) if self.bulk_load else None
+
+    def search_params(self) -> Optional[rest.SearchParams]:
+        if self.search_hnsw_ef is None and self.quantization is None:
+            return None
+        quantization = None
+        if self.quantization:
+            quantization = rest.QuantizationSearchParams(
+                rescore=self.search_rescore, oversampling=self.search_oversampling)
+        return rest.SearchParams(hnsw_ef=self.search_hnsw_ef, quantization=quantization)
+
+
+PROFILES: Dict[str, CollectionProfile] = {
+    # Qdrant defaults, same as collections created before profiles existed.
+    "default": CollectionProfile(name="default"),
+    # Denser graph and int8 vectors in RAM; rescoring with the original vectors keeps recall.
+    "low-latency": CollectionProfile(
+        name="low-latency", hnsw_m=32, hnsw_ef_construct=200,
+        quantization="scalar", search_hnsw_ef=128, search_rescore=True, search_oversampling=1.5),
+    # Original vectors and graph on disk, only the quantized vectors stay in RAM.
+    "memory-saver": CollectionProfile(
+        name="memory-saver", hnsw_on_disk=True, vectors_on_disk=True,
+        quantization="scalar", search_hnsw_ef=64, search_rescore=True, search_oversampling=2.0),
+    # No indexing while points are uploaded; the index is built once when ingestion completes.
+    "bulk-load": CollectionProfile(
+        name="bulk-load", hnsw_ef_construct=100, bulk_load=True, search_hnsw_ef=64),
+}
+
+
+def get_collection_profile(name: str) -> CollectionProfile:
+    try:
+        return PROFILES[name or "default"]
+    except KeyError:
+        raise ValueError(f"Unknown collection profile: {name}. Available profiles: {', '.join(PROFILES)}")
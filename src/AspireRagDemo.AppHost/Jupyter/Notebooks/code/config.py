@@ -1,6 +1,19 @@
 """Configuration module for document processing pipeline."""
-from dataclasses import dataclass
+from dataclasses import dataclass, field
+from typing import Dict, List
 from model_provider import ModelProvider
+@dataclass
+class LocalIndexConfig:
+    """Configuration for the embedded vector index used when VectorDBConfig.backend is "local"."""
+    # Directory holding one sub directory per collection.
+    path: str = ""
+    # "none" stores float32 vectors, "int8" scalar quantized vectors (a quarter of the size).
+    quantization: str = "none"
+    # IVF partitions; 0 searches every vector (flat). Worth it from roughly 50k chunks on.
+    ivf_lists: int = 0
+    # Partitions searched per query; more probes trade latency for recall.
+    ivf_probes: int = 8
+
 @dataclass 
 class VectorDBConfig:
     """Configuration for vector database connection."""
@@ -8,6 +21,15 @@ class VectorDBConfig:
     api_key: str
     collection_name: str
     vector_name: str = "page_content_vector"
+    # BM25 style sparse vector stored next to the dense vector, used by hybrid retrieval.
+    sparse_vector_name: str = "page_content_sparse"
+    # Collection tuning profile, see collection_profiles.PROFILES.
+    profile: str = "default"
+    # gRPC endpoint of the same Qdrant instance; when set, clients prefer gRPC over REST.
+    grpc_url: str = ""
+    # "qdrant", or "local" for the embedded index of local_index.py, which needs no Qdrant server.
+    backend: str = "qdrant"
+    local_index: LocalIndexConfig = field(default_factory=LocalIndexConfig)
 
 @dataclass
 class ModelConfig:
@@ -15,4 +37,113 @@ class ModelConfig:
     model_name: str = ""
     base_url: str = ""
     model_provider: ModelProvider = ModelProvider.Ollama
-    api_key: str = ""
\ No newline at end of file
+    api_key: str = ""
+    # Embedding cache (embedding models only). An empty cache_path disables caching.
+    cache_path: str = ""
+    cache_max_entries: int = 500_000
+    cache_memory_entries: int = 10_000
+    # Ollama chat models: how long the model stays loaded after a request, e.g. "30m", or -1 for as long as
+    # Ollama runs. Empty keeps Ollama's default of five minutes.
+    keep_alive: str = ""
+
+@dataclass
+class ChunkingStrategyConfig:
+    """Chunk size and overlap (in characters) for one file extension."""
+    chunk_size: int
+    chunk_overlap: int = 50
+    separators: List[str] = field(default_factory=lambda: ["\n\n", "\n", ". ", " "])
+
+def default_chunking_strategies() -> Dict[str, ChunkingStrategyConfig]:
+    return {
+        # Markdown is split on headers first; only sections longer than chunk_size are split again.
+        '.md': ChunkingStrategyConfig(chunk_size=600, chunk_overlap=50, separators=["\n\n", "\n", ". "]),
+        '.yml': ChunkingStrategyConfig(chunk_size=300, chunk_overlap=50, separators=["---", "\n\n", "\n"]),
+        '.yaml': ChunkingStrategyConfig(chunk_size=300, chunk_overlap=50, separators=["---", "\n\n", "\n"]),
+        'default': ChunkingStrategyConfig(chunk_size=400, chunk_overlap=50, separators=["\n\n", "\n", ". ", " "]),
+    }
+
+@dataclass
+class ChunkingConfig:
+    """Chunking strategies keyed by file extension, with a 'default' entry for everything else."""
+    strategies: Dict[str, ChunkingStrategyConfig] = field(default_factory=default_chunking_strategies)
+
+@dataclass
+class IngestionConfig:
+    """Configuration for the batched embedding and upsert stage of the ingestion pipeline."""
+    batch_size: int = 64
+    max_concurrency: int = 4
+    upsert_workers: int = 2
+    max_retries: int = 5
+    retry_backoff_seconds: float = 1.0
+    # Worker processes for chunking; 0 or 1 chunks in the calling process.
+    chunking_workers: int = 0
+    chunking_files_per_task: int = 8
+    # Store repository and file metadata once in a side collection; chunks keep ids and the filter fields.
+    compact_payload: bool = False
+    # Directory of the ingestion job checkpoints used by IngestionJobs.
+    checkpoint_dir: str = ""
+    # BatchIngestion: sources fetched (gitingest) at once, and repositories chunked and embedded at once.
+    fetch_workers: int = 4
+    repository_workers: int = 2
+    chunking: ChunkingConfig = field(default_factory=ChunkingConfig)
+
+@dataclass
+class AnswerCacheConfig:
+    """Configuration for the LocalRAG answer cache."""
+    enabled: bool = False
+    max_entries: int = 1000
+    ttl_seconds: float = 3600
+    # Cosine similarity above which a cached question counts as the same question.
+    similarity_threshold: float = 0.95
+    validation_interval_seconds: float = 30
+
+@dataclass
+class ContextConfig:
+    """Configuration for assembling the prompt context from retrieved chunks."""
+    # Token budget for the context; 0 disables the budget.
+    max_tokens: int = 3000
+    # Word shingle Jaccard similarity above which a chunk is a near-duplicate of a better scored one.
+    duplicate_threshold: float = 0.85
+    merge_adjacent: bool = True
+    # Chunks ingested before the splitter overlap was recorded: the longest match between the end of a chunk
+    # and the start of the next one, between these bounds, is taken as overlap.
+    min_overlap_chars: int = 20
+    max_overlap_chars: int = 200
+    # Rough token estimate used for the budget and the prompt size.
+    chars_per_token: float = 4.0
+
+@dataclass
+class RetrievalConfig:
+    """Configuration for how LocalRAG retrieves chunks from the vector store."""
+    # "dense" or "hybrid" (dense + sparse BM25, merged with reciprocal rank fusion).
+    mode: str = "dense"
+    # Candidates each hybrid branch returns before fusion; at least k.
+    hybrid_prefetch_limit: int = 40
+    # Two-stage retrieval: fetch rerank_candidates, rescore them locally and keep the best rerank_top_k.
+    # "none", "cosine" (exact cosine over the returned vectors) or "cross-encoder" (needs sentence-transformers).
+    reranker: str = "none"
+    rerank_candidates: int = 50
+    rerank_top_k: int = 6
+    cross_encoder_model: str = "cross-encoder/ms-marco-MiniLM-L-6-v2"
+    # Candidates fetched with their vectors for search_type="mmr".
+    mmr_fetch_k: int = 50
+
+@dataclass
+class ServingConfig:
+    """Configuration for serving LocalRAG answers."""
+    # Load the embedding and chat models and prime the system prompt when LocalRAG is created.
+    warmup: bool = False
+
+@dataclass
+class TracingConfig:
+    """Configuration for how much tracing the notebook code does."""
+    # "always" exports every trace, "ratio" keeps sample_ratio of the traces (head sampling, parent based),
+    # "tail" records every trace and decides when its local root ends, "off" records nothing.
+    mode: str = "always"
+    sample_ratio: float = 0.1
+    # Tail sampling always keeps traces with an error or a local root slower than this; the rest at sample_ratio.
+    slow_threshold_ms: float = 2000
+    # Traces waiting for their root span to end; the oldest are dropped beyond this.
+    tail_max_pending_traces: int = 1000
+    # Per-batch and per-stage spans in hot paths plus the LangChain and Qdrant instrumentation.
+    fine_grained_spans: bool = True
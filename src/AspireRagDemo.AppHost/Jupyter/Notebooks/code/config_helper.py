@@ -3,7 +3,7 @@ import sys
 # allow loading modules from local directory.
 sys.path.insert(1, '/home/jovyan/work/code')
 
-from config import VectorDBConfig, ModelConfig
+from config import VectorDBConfig, LocalIndexConfig, ModelConfig, IngestionConfig, ChunkingConfig, AnswerCacheConfig, ContextConfig, RetrievalConfig, ServingConfig, TracingConfig
 from model_provider import ModelProvider
 
 class ConfigHelper:
@@ -15,6 +15,12 @@ class ConfigHelper:
         self.__parse_embedding_configuration()
         self.__parse_vector_store_configuration()
         self.__parse_chat_configuration()
+        self.__parse_ingestion_configuration()
+        self.__parse_answer_cache_configuration()
+        self.__parse_context_configuration()
+        self.__parse_retrieval_configuration()
+        self.__parse_tracing_configuration()
+        self.__parse_serving_configuration()
 
     @property
     def vector_db_config(self):
@@ -27,6 +33,30 @@ class ConfigHelper:
     @property
     def chat_config(self):
         return self._chat_config
+
+    @property
+    def ingestion_config(self):
+        return self._ingestion_config
+
+    @property
+    def answer_cache_config(self):
+        return self._answer_cache_config
+
+    @property
+    def context_config(self):
+        return self._context_config
+
+    @property
+    def retrieval_config(self):
+        return self._retrieval_config
+
+    @property
+    def tracing_config(self):
+        return self._tracing_config
+
+    @property
+    def serving_config(self):
+        return self._serving_config
         
     def __parse_embedding_configuration(self):
         embedding_model: str = os.getenv('ModelConfiguration__EmbeddingModel')
@@ -44,7 +74,10 @@ class ConfigHelper:
             model_name=embedding_model,
             base_url=model_base_url,
             model_provider=provider,
-            api_key=embedding_model_provider_api_key
+            api_key=embedding_model_provider_api_key,
+            cache_path=os.getenv('ModelConfiguration__EmbeddingCachePath', ''),
+            cache_max_entries=int(os.getenv('ModelConfiguration__EmbeddingCacheMaxEntries', '500000')),
+            cache_memory_entries=int(os.getenv('ModelConfiguration__EmbeddingCacheMemoryEntries', '10000'))
         )
  
     def __parse_chat_configuration(self):
@@ -63,22 +96,117 @@ class ConfigHelper:
             model_name=chat_model,
             base_url=model_base_url,
             model_provider=provider,
-            api_key=chat_model_provider_api_key
+            api_key=chat_model_provider_api_key,
+            keep_alive=os.getenv('ModelConfiguration__ChatModelKeepAlive', '')
         ) 
     
     def __parse_vector_store_configuration(self):
+        backend = os.getenv('ModelConfiguration__VectorStoreBackend', 'qdrant')
+        qdrant_url = ''
+        qdrant_key = ''
         qdrant_conn = os.getenv('ConnectionStrings__qdrant_http')
-        parts = qdrant_conn.split(';')
-        qdrant_url = next(p.split('=')[1] for p in parts if p.startswith('Endpoint='))
-        qdrant_key = next(p.split('=')[1] for p in parts if p.startswith('Key='))
+        # The local backend runs without a Qdrant server, so there may be no connection string.
+        if qdrant_conn or backend != 'local':
+            parts = qdrant_conn.split(';')
+            qdrant_url = next(p.split('=')[1] for p in parts if p.startswith('Endpoint='))
+            qdrant_key = next(p.split('=')[1] for p in parts if p.startswith('Key='))
         vector_store_vector_name = os.getenv('ModelConfiguration__VectorStoreVectorName')
+        local_defaults = LocalIndexConfig()
         self._vector_db_config = VectorDBConfig(
             url=qdrant_url,
             api_key=qdrant_key,
             collection_name=self.vector_store_collection_name,
-            vector_name=vector_store_vector_name
+            vector_name=vector_store_vector_name,
+            profile=os.getenv('ModelConfiguration__VectorStoreProfile', 'default'),
+            grpc_url=self.__get_optional_endpoint(os.getenv('ConnectionStrings__qdrant')),
+            backend=backend,
+            local_index=LocalIndexConfig(
+                path=os.getenv('LocalIndexConfiguration__Path', local_defaults.path),
+                quantization=os.getenv('LocalIndexConfiguration__Quantization', local_defaults.quantization),
+                ivf_lists=int(os.getenv('LocalIndexConfiguration__IvfLists', local_defaults.ivf_lists)),
+                ivf_probes=int(os.getenv('LocalIndexConfiguration__IvfProbes', local_defaults.ivf_probes)))
         )
     
+    def __parse_ingestion_configuration(self):
+        defaults = IngestionConfig()
+        self._ingestion_config = IngestionConfig(
+            batch_size=int(os.getenv('IngestionConfiguration__BatchSize', defaults.batch_size)),
+            max_concurrency=int(os.getenv('IngestionConfiguration__MaxConcurrency', defaults.max_concurrency)),
+            upsert_workers=int(os.getenv('IngestionConfiguration__UpsertWorkers', defaults.upsert_workers)),
+            max_retries=int(os.getenv('IngestionConfiguration__MaxRetries', defaults.max_retries)),
+            retry_backoff_seconds=float(os.getenv('IngestionConfiguration__RetryBackoffSeconds', defaults.retry_backoff_seconds)),
+            chunking_workers=int(os.getenv('IngestionConfiguration__ChunkingWorkers', defaults.chunking_workers)),
+            chunking_files_per_task=int(os.getenv('IngestionConfiguration__ChunkingFilesPerTask', defaults.chunking_files_per_task)),
+            compact_payload=os.getenv('IngestionConfiguration__CompactPayload', str(defaults.compact_payload)).lower() == 'true',
+            checkpoint_dir=os.getenv('IngestionConfiguration__CheckpointDir', defaults.checkpoint_dir),
+            fetch_workers=int(os.getenv('IngestionConfiguration__FetchWorkers', defaults.fetch_workers)),
+            repository_workers=int(os.getenv('IngestionConfiguration__RepositoryWorkers', defaults.repository_workers)),
+            chunking=self.__parse_chunking_configuration()
+        )
+
+    def __parse_chunking_configuration(self):
+        # e.g. ChunkingConfiguration__md__ChunkSize=800 or ChunkingConfiguration__default__ChunkOverlap=100
+        chunking_config = ChunkingConfig()
+        for extension, strategy in chunking_config.strategies.items():
+            prefix = f"ChunkingConfiguration__{extension.lstrip('.')}__"
+            strategy.chunk_size = int(os.getenv(f"{prefix}ChunkSize", strategy.chunk_size))
+            strategy.chunk_overlap = int(os.getenv(f"{prefix}ChunkOverlap", strategy.chunk_overlap))
+        return chunking_config
+
+    def __parse_answer_cache_configuration(self):
+        defaults = AnswerCacheConfig()
+        self._answer_cache_config = AnswerCacheConfig(
+            enabled=os.getenv('AnswerCacheConfiguration__Enabled', str(defaults.enabled)).lower() == 'true',
+            max_entries=int(os.getenv('AnswerCacheConfiguration__MaxEntries', defaults.max_entries)),
+            ttl_seconds=float(os.getenv('AnswerCacheConfiguration__TtlSeconds', defaults.ttl_seconds)),
+            similarity_threshold=float(os.getenv('AnswerCacheConfiguration__SimilarityThreshold', defaults.similarity_threshold)),
+            validation_interval_seconds=float(os.getenv('AnswerCacheConfiguration__ValidationIntervalSeconds', defaults.validation_interval_seconds))
+        )
+
+    def __parse_context_configuration(self):
+        defaults = ContextConfig()
+        self._context_config = ContextConfig(
+            max_tokens=int(os.getenv('ContextConfiguration__MaxTokens', defaults.max_tokens)),
+            duplicate_threshold=float(os.getenv('ContextConfiguration__DuplicateThreshold', defaults.duplicate_threshold)),
+            merge_adjacent=os.getenv('ContextConfiguration__MergeAdjacent', str(defaults.merge_adjacent)).lower() == 'true',
+            min_overlap_chars=int(os.getenv('ContextConfiguration__MinOverlapChars', defaults.min_overlap_chars)),
+            max_overlap_chars=int(os.getenv('ContextConfiguration__MaxOverlapChars', defaults.max_overlap_chars)),
+            chars_per_token=float(os.getenv('ContextConfiguration__CharsPerToken', defaults.chars_per_token))
+        )
+
+    def __parse_retrieval_configuration(self):
+        defaults = RetrievalConfig()
+        self._retrieval_config = RetrievalConfig(
+            mode=os.getenv('RetrievalConfiguration__Mode', defaults.mode).lower(),
+            hybrid_prefetch_limit=int(os.getenv('RetrievalConfiguration__HybridPrefetchLimit', defaults.hybrid_prefetch_limit)),
+            reranker=os.getenv('RetrievalConfiguration__Reranker', defaults.reranker).lower(),
+            rerank_candidates=int(os.getenv('RetrievalConfiguration__RerankCandidates', defaults.rerank_candidates)),
+            rerank_top_k=int(os.getenv('RetrievalConfiguration__RerankTopK', defaults.rerank_top_k)),
+            cross_encoder_model=os.getenv('RetrievalConfiguration__CrossEncoderModel', defaults.cross_encoder_model),
+            mmr_fetch_k=int(os.getenv('RetrievalConfiguration__MmrFetchK', defaults.mmr_fetch_k))
+        )
+
+    def __parse_tracing_configuration(self):
+        defaults = TracingConfig()
+        self._tracing_config = TracingConfig(
+            mode=os.getenv('TracingConfiguration__Mode', defaults.mode).lower(),
+            sample_ratio=float(os.getenv('TracingConfiguration__SampleRatio', defaults.sample_ratio)),
+            slow_threshold_ms=float(os.getenv('TracingConfiguration__SlowThresholdMs', defaults.slow_threshold_ms)),
+            tail_max_pending_traces=int(os.getenv('TracingConfiguration__TailMaxPendingTraces', defaults.tail_max_pending_traces)),
+            fine_grained_spans=os.getenv('TracingConfiguration__FineGrainedSpans', str(defaults.fine_grained_spans)).lower() == 'true'
+        )
+
+    def __parse_serving_configuration(self):
+        defaults = ServingConfig()
+        self._serving_config = ServingConfig(
+            warmup=os.getenv('ServingConfiguration__Warmup', str(defaults.warmup)).lower() == 'true'
+        )
+
     def __get_endpoint_from_connection(self, conn_str):
         parts = conn_str.split(';')
-        return next(p.split('=')[1] for p in parts if p.startswith('Endpoint='))
\ No newline at end of file
+        return next(p.split('=')[1] for p in parts if p.startswith('Endpoint='))
+
+    def __get_optional_endpoint(self, conn_str):
+        if not conn_str:
+            return ''
+        return next((p.split('=')[1] for p in conn_str.split(';') if p.startswith('Endpoint=')), '')
\ No newline at end of file
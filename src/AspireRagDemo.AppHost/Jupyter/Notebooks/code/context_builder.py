@@ -0,0 +1,133 @@
+"""Assemble the prompt context from retrieved chunks: deduplicate, merge neighbours and pack into a token budget."""
+import math
+import re
+from dataclasses import dataclass
+from typing import Dict, List, Set, Tuple
+from langchain_core.documents import Document
+from config import ContextConfig
+
+
+@dataclass
+class ContextStats:
+    """What happened to the retrieved chunks on their way into the prompt."""
+    retrieved: int = 0
+    duplicates: int = 0
+    merged: int = 0
+    packed: int = 0
+    tokens: int = 0
+
+
+@dataclass
+class _Block:
+    """One or more adjacent chunks of the same file."""
+    file_path: str
+    first_index: int
+    last_index: int
+    text: str
+    score: float
+
+
+class ContextBuilder:
+    """Turn scored chunks into a context string.
+
+    1. Chunks are ordered by score and near-duplicates (word shingle Jaccard similarity) are dropped.
+    2. Chunks of the same file with consecutive chunk_index are merged, removing the overlap the splitter
+       recorded in overlap_chars; chunks without overlap are joined with a blank line.
+    3. Blocks are added best score first until the token budget is used up.
+    """
+
+    def __init__(self, config: ContextConfig):
+        self.config = config
+
+    def estimate_tokens(self, text: str) -> int:
+        return math.ceil(len(text) / self.config.chars_per_token)
+
+    def build(self, scored_docs: List[Tuple[Document, float]]) -> Tuple[str, ContextStats]:
+        stats = ContextStats(retrieved=len(scored_docs))
+        ordered = sorted(scored_docs, key=lambda doc_score: doc_score[1], reverse=True)
+
+        kept: List[Tuple[Document, float]] = []
+        kept_shingles: List[Set[str]] = []
+        for doc, score in ordered:
+            shingles = self.__shingles(doc.page_content)
+            if any(self.__jaccard(shingles, other) >= self.config.duplicate_threshold for other in kept_shingles):
+                stats.duplicates += 1
+                continue
+            kept.append((doc, score))
+            kept_shingles.append(shingles)
+
+        blocks = self.__merge_adjacent(kept, stats) if self.config.merge_adjacent else [
+            _Block(doc.metadata.get("file_path", ""), -1, -1, doc.page_content, score) for doc, score in kept
+        ]
+
+        packed = []
+        budget = self.config.max_tokens
+        for block in sorted(blocks, key=lambda b: b.score, reverse=True):
+            tokens = self.estimate_tokens(block.text)
+            if budget > 0 and stats.tokens + tokens > budget:
+                if not packed:
+                    # Never send an empty context: truncate the best block to the budget instead.
+                    packed.append(block.text[:int(budget * self.config.chars_per_token)])
+                    stats.tokens = budget
+                    stats.packed = 1
+                break
+            packed.append(block.text)
+            stats.tokens += tokens
+            stats.packed += 1
+        return "\n\n".join(packed), stats
+
+    def __merge_adjacent(self, kept: List[Tuple[Document, float]], stats: ContextStats) -> List[_Block]:
+        by_file: Dict[str, List[Tuple[Document, float]]] = {}
+        blocks = []
+        for doc, score in kept:
+            file_path = doc.metadata.get("file_path")
+            if file_path is None or doc.metadata.get("chunk_index") is None:
+                blocks.append(_Block(file_path or "", -1, -1, doc.page_content, score))
+            else:
+                by_file.setdefault(file_path, []).append((doc, score))
+
+        for file_path, docs in by_file.items():
+            docs.sort(key=lambda doc_score: doc_score[0].metadata["chunk_index"])
+            current = None
+            for doc, score in docs:
+                chunk_index = doc.metadata["chunk_index"]
+                if current is not None and chunk_index == current.last_index + 1:
+                    current.text = self.__join_overlapping(current.text, doc)
+                    current.last_index = chunk_index
+                    current.score = max(current.score, score)
+                    stats.merged += 1
+                    continue
+                current = _Block(file_path, chunk_index, chunk_index, doc.page_content, score)
+                blocks.append(current)
+        return blocks
+
+    def __join_overlapping(self, first: str, second: Document) -> str:
+        """Join two consecutive chunks, dropping the text the splitter repeated at the start of the second."""
+        text = second.page_content
+        overlap = second.metadata.get("overlap_chars")
+        if overlap is None:
+            overlap = self.__find_overlap(first, text)
+        if overlap and first.endswith(text[:overlap]):
+            return first + text[overlap:]
+        return first + "\n\n" + text
+
+    def __find_overlap(self, first: str, second: str) -> int:
+        """Overlap of chunks stored without overlap_chars; shorter matches are taken as coincidence."""
+        longest = min(len(first), len(second), self.config.max_overlap_chars)
+        for size in range(longest, self.config.min_overlap_chars - 1, -1):
+            if first.endswith(second[:size]):
+                return size
+        return 0
+
+    @staticmethod
+    def __shingles(text: str, size: int = 3) -> Set[str]:
+        words = re.findall(r"\w+", text.lower())
+        if len(words) < size:
+            return {" ".join(words)}
+        return {" ".join(words[i:i + size]) for i in range(len(words) - size + 1)}
+
+    @staticmethod
+    def __jaccard(first: Set[str], second: Set[str]) -> float:
+        if not first or not second:
+            return 0.0
+        return len(first & second) / len(first | second)
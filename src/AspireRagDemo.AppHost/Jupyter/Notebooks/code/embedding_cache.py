@@ -0,0 +1,173 @@
+"""Persistent embedding cache shared by the ingestion pipeline and LocalRAG."""
+import hashlib
+import logging
+import os
+import sqlite3
+import threading
+import time
+from array import array
+from collections import OrderedDict
+from typing import Dict, List, Optional
+from langchain_core.embeddings import Embeddings
+from config import ModelConfig
+from rag_metrics import get_rag_metrics
+
+
+class CachedEmbeddings(Embeddings):
+    """Embeddings wrapper keyed by (model name, call kind, text hash).
+
+    Document and query embeddings are cached apart, since a provider may embed the two differently.
+
+    Lookups go through an in-memory LRU first and then a SQLite table storing float32 vectors.
+    The SQLite table is bounded by max_entries; the least recently used rows are evicted first.
+    """
+
+    def __init__(self, embeddings: Embeddings, model_name: str, cache_path: str,
+                 max_entries: int = 500_000, memory_entries: int = 10_000):
+        self.logger = logging.getLogger(__name__)
+        self.embeddings = embeddings
+        self.model_name = model_name
+        self.max_entries = max_entries
+        self.memory_entries = memory_entries
+        self.hits = 0
+        self.misses = 0
+        self.metrics = get_rag_metrics()
+        self._memory: "OrderedDict[str, List[float]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+        cache_dir = os.path.dirname(cache_path)
+        if cache_dir:
+            os.makedirs(cache_dir, exist_ok=True)
+        self._connection = sqlite3.connect(cache_path, check_same_thread=False)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings ("
+            "key TEXT PRIMARY KEY, vector BLOB NOT NULL, last_access REAL NOT NULL)")
+        self._connection.execute(
+            "CREATE INDEX IF NOT EXISTS embeddings_last_access ON embeddings(last_access)")
+        self._connection.commit()
+        self._entries = self._connection.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+        self.logger.info(f"Embedding cache {cache_path} opened with {self._entries} entries")
+
+    @property
+    def uncached(self) -> Embeddings:
+        """The wrapped embeddings model, for calls that must reach the model."""
+        return self.embeddings
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        keys = [self.__key("document", text) for text in texts]
+        vectors = self.__lookup(keys)
+        # Embed each distinct missing text once, even if it is repeated within the batch.
+        missing: Dict[str, str] = {}
+        for key, text in zip(keys, texts):
+            if key not in vectors:
+                missing.setdefault(key, text)
+        if missing:
+            embedded = self.embeddings.embed_documents(list(missing.values()))
+            new_vectors = dict(zip(missing.keys(), embedded))
+            self.__store(new_vectors)
+            vectors.update(new_vectors)
+        return [vectors[key] for key in keys]
+
+    def embed_query(self, text: str) -> List[float]:
+        key = self.__key("query", text)
+        vectors = self.__lookup([key])
+        if key in vectors:
+            return vectors[key]
+        vector = self.embeddings.embed_query(text)
+        self.__store({key: vector})
+        return vector
+
+    def stats(self) -> Dict[str, float]:
+        return {"hits": self.hits, "misses": self.misses, "hit_rate": self.hit_rate, "entries": self._entries}
+
+    def __key(self, kind: str, text: str) -> str:
+        return hashlib.sha256(f"{self.model_name}\0{kind}\0{text}".encode('utf-8')).hexdigest()
+
+    def __lookup(self, keys: List[str]) -> Dict[str, List[float]]:
+        found: Dict[str, List[float]] = {}
+        with self._lock:
+            disk_keys = []
+            for key in keys:
+                if key in self._memory:
+                    self._memory.move_to_end(key)
+                    found[key] = self._memory[key]
+                elif key not in found:
+                    disk_keys.append(key)
+            disk_keys = list(dict.fromkeys(disk_keys))
+            if disk_keys:
+                # Stay well below SQLite's bound parameter limit.
+                for start in range(0, len(disk_keys), 500):
+                    batch = disk_keys[start:start + 500]
+                    rows = self._connection.execute(
+                        f"SELECT key, vector FROM embeddings WHERE key IN ({','.join('?' * len(batch))})",
+                        batch).fetchall()
+                    for key, blob in rows:
+                        found[key] = array('f', blob).tolist()
+                        self.__remember(key, found[key])
+                touched = [(time.time(), key) for key in disk_keys if key in found]
+                if touched:
+                    self._connection.executemany("UPDATE embeddings SET last_access = ? WHERE key = ?", touched)
+                    self._connection.commit()
+            hits = sum(1 for key in keys if key in found)
+            self.hits += hits
+            self.misses += len(keys) - hits
+        self.metrics.cache_lookups.add(hits, {"rag.cache.name": "embedding", "rag.cache.result": "hit"})
+        self.metrics.cache_lookups.add(len(keys) - hits, {"rag.cache.name": "embedding", "rag.cache.result": "miss"})
+        return found
+
+    def __store(self, vectors: Dict[str, List[float]]):
+        now = time.time()
+        with self._lock:
+            # Another process sharing the file may have stored the same key since the lookup; only new rows count.
+            inserted = self._connection.executemany(
+                "INSERT OR IGNORE INTO embeddings (key, vector, last_access) VALUES (?, ?, ?)",
+                [(key, array('f', vector).tobytes(), now) for key, vector in vectors.items()]).rowcount
+            if inserted < len(vectors):
+                self._connection.executemany("UPDATE embeddings SET last_access = ? WHERE key = ?",
+                                             [(now, key) for key in vectors])
+            for key, vector in vectors.items():
+                self.__remember(key, vector)
+            self._entries += inserted
+            if self._entries > self.max_entries:
+                self.__evict()
+            self._connection.commit()
+
+    def __remember(self, key: str, vector: List[float]):
+        self._memory[key] = vector
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_entries:
+            self._memory.popitem(last=False)
+
+    def __evict(self):
+        """Trim the table back to max_entries, dropping the least recently used rows."""
+        self._entries = self._connection.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+        overflow = self._entries - self.max_entries
+        if overflow > 0:
+            self._connection.execute(
+                "DELETE FROM embeddings WHERE key IN "
+                "(SELECT key FROM embeddings ORDER BY last_access LIMIT ?)", (overflow,))
+            self._entries -= overflow
+            self.logger.info(f"Evicted {overflow} entries from the embedding cache")
+
+
+def uncached_embeddings(embeddings: Embeddings) -> Embeddings:
+    """The embeddings model behind the cache, if there is one."""
+    return embeddings.uncached if isinstance(embeddings, CachedEmbeddings) else embeddings
+
+
+def with_embedding_cache(embeddings: Embeddings, embedding_config: ModelConfig) -> Embeddings:
+    """Wrap the embeddings in a CachedEmbeddings when the model configuration opts into caching."""
+    if not embedding_config.cache_path:
+        return embeddings
+    return CachedEmbeddings(
+        embeddings,
+        model_name=f"{embedding_config.model_provider.name}:{embedding_config.model_name}",
+        cache_path=embedding_config.cache_path,
+        max_entries=embedding_config.cache_max_entries,
+        memory_entries=embedding_config.cache_memory_entries)
@@ -0,0 +1,71 @@
+"""Streaming readers for gitingest dumps (concatenated repository files) and local checkouts."""
+import fnmatch
+import os
+from typing import Iterable, Iterator, List, Tuple
+
+FILE_DELIMITER = "================================================"
+FILE_HEADER = "File: "
+
+
+def iter_dump_files(lines: Iterable[str]) -> Iterator[Tuple[str, str]]:
+    """Yield (file path, content) one file at a time from the lines of a gitingest dump.
+
+    A file starts with a header of three lines: the delimiter, "File: <path>" and the delimiter again.
+    Only the lines of the current file are held in memory, so the dump can be read straight from disk.
+    """
+    current_file = None
+    current_lines = []
+    after_delimiter = False
+    in_header = False
+    for line in lines:
+        line = line.rstrip('\n')
+        if line.strip() == FILE_DELIMITER:
+            # Either opens or closes a file header; a delimiter is never part of the content.
+            if in_header:
+                in_header = False
+            else:
+                after_delimiter = True
+            continue
+        if after_delimiter and line.startswith(FILE_HEADER):
+            if current_file:
+                yield current_file, "\n".join(current_lines).strip()
+            current_file = line.replace(FILE_HEADER, "").strip()
+            current_lines = []
+            in_header = True
+        elif current_file:
+            current_lines.append(line)
+        after_delimiter = False
+    if current_file:
+        yield current_file, "\n".join(current_lines).strip()
+
+
+def count_dump_files(lines: Iterable[str]) -> int:
+    """Count the files in a dump without keeping any content."""
+    count = 0
+    after_delimiter = False
+    for line in lines:
+        if after_delimiter and line.startswith(FILE_HEADER):
+            count += 1
+        after_delimiter = line.strip() == FILE_DELIMITER
+    return count
+
+
+def list_directory_files(directory: str, include_patterns: Iterable[str]) -> List[str]:
+    """Relative paths of the files matching the patterns, sorted so every run reads them in the same order.
+
+    Hidden directories such as .git are skipped, as gitingest does.
+    """
+    paths = []
+    for root, directories, files in os.walk(directory):
+        directories[:] = [name for name in directories if not name.startswith('.')]
+        for name in files:
+            if any(fnmatch.fnmatch(name, pattern) for pattern in include_patterns):
+                paths.append(os.path.relpath(os.path.join(root, name), directory).replace(os.sep, '/'))
+    return sorted(paths)
+
+
+def iter_directory_files(directory: str, paths: Iterable[str]) -> Iterator[Tuple[str, str]]:
+    """Yield (file path, content) of a local checkout one file at a time, like iter_dump_files."""
+    for path in paths:
+        with open(os.path.join(directory, path), 'r', encoding='utf-8', errors='replace') as file:
+            yield path, file.read().strip()
@@ -0,0 +1,117 @@
+"""Persisted progress of an ingestion job, so an interrupted run can resume from its last committed batch."""
+import hashlib
+import json
+import os
+from collections import deque
+from dataclasses import asdict, dataclass, field
+from typing import List, Optional
+
+RUNNING = "running"
+COMPLETED = "completed"
+
+
+@dataclass
+class IngestionCheckpoint:
+    """Where an ingestion job writes to and how far it got.
+
+    committed_files counts the leading files of the source whose chunks are all stored; files are read in the
+    same order on every run, and point ids are derived from file path and chunk index, so a resumed run skips
+    embedding those files and re-upserting anything after them overwrites instead of duplicating.
+    """
+    job_id: str
+    source: str
+    repo_url: str
+    collection_name: str
+    # Alias swapped to collection_name when the job completes; empty when building in place.
+    alias: str = ""
+    incremental: bool = False
+    source_hash: str = ""
+    committed_files: int = 0
+    committed_batches: int = 0
+    committed_chunks: int = 0
+    status: str = RUNNING
+    path: str = field(default="", repr=False)
+
+    @classmethod
+    def file_path(cls, directory: str, job_id: str) -> str:
+        return os.path.join(directory, f"{job_id}.json")
+
+    @classmethod
+    def load(cls, directory: str, job_id: str) -> "IngestionCheckpoint":
+        path = cls.file_path(directory, job_id)
+        with open(path) as file:
+            return cls(**json.load(file), path=path)
+
+    def save(self):
+        """Write the checkpoint atomically: a crash leaves the previous checkpoint, never a torn one."""
+        state = asdict(self)
+        del state["path"]
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        temp_path = f"{self.path}.tmp"
+        with open(temp_path, "w") as file:
+            json.dump(state, file, indent=2)
+        os.replace(temp_path, self.path)
+
+    def verify_source(self, source_hash: str):
+        """Record the source hash on the first run; a resumed run must read the same source."""
+        if not self.source_hash:
+            self.source_hash = source_hash
+            self.save()
+        elif self.source_hash != source_hash:
+            raise ValueError(f"The source of ingestion job {self.job_id} changed since it started; "
+                             f"start a new job instead of resuming.")
+
+
+def source_file_hash(file_path: str) -> str:
+    """Hash of a dump file, read in blocks so large dumps are not loaded into memory."""
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as file:
+        for block in iter(lambda: file.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def source_directory_hash(directory: str, paths: List[str]) -> str:
+    """Hash of the included files of a local checkout: their paths and contents."""
+    digest = hashlib.sha256()
+    for path in paths:
+        digest.update(path.encode('utf-8'))
+        digest.update(source_file_hash(os.path.join(directory, path)).encode('utf-8'))
+    return digest.hexdigest()
+
+
+class CheckpointProgress:
+    """Moves committed_files forward as the upsert stage commits batches, which it does in input order."""
+
+    def __init__(self, checkpoint: IngestionCheckpoint):
+        self.checkpoint = checkpoint
+        # Files after the watermark may have been written in part by the interrupted run.
+        self.resumed = checkpoint.committed_batches > 0
+        self.chunks_yielded = 0
+        self.chunks_committed = 0
+        # (file index, chunks yielded when the file's last chunk was yielded) of files not yet committed
+        self.pending_files = deque()
+
+    def is_committed(self, file_index: int) -> bool:
+        return file_index < self.checkpoint.committed_files
+
+    def may_skip_file(self, file_index: int) -> bool:
+        """Whether the manifest may skip a file as unchanged: a partly written file looks unchanged too."""
+        return not self.resumed or self.is_committed(file_index)
+
+    def chunk_yielded(self):
+        self.chunks_yielded += 1
+
+    def file_done(self, file_index: int):
+        self.pending_files.append((file_index, self.chunks_yielded))
+
+    def batch_committed(self, chunks: int):
+        self.chunks_committed += chunks
+        self.checkpoint.committed_batches += 1
+        self.checkpoint.committed_chunks += chunks
+        committed_files: Optional[int] = None
+        while self.pending_files and self.pending_files[0][1] <= self.chunks_committed:
+            committed_files = self.pending_files.popleft()[0] + 1
+        if committed_files is not None:
+            self.checkpoint.committed_files = max(self.checkpoint.committed_files, committed_files)
+        self.checkpoint.save()
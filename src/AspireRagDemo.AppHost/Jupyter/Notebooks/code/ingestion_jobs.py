@@ -0,0 +1,132 @@
+"""Checkpointed ingestion jobs that can be resumed after a failure, optionally built into a shadow collection."""
+import logging
+import os
+import time
+import uuid
+from dataclasses import replace
+from typing import List
+from opentelemetry import trace
+from qdrant_client.http import models as rest
+from config import VectorDBConfig, ModelConfig, IngestionConfig
+from answer_cache import notify_collection_changed
+from client_registry import get_qdrant_client
+from ingestion_checkpoint import COMPLETED, IngestionCheckpoint
+from ingestion_manifest import IngestionReport
+from ingestion_pipeline import IngestionPipeline
+from metadata_store import metadata_collection_name
+
+
+class IngestionJobs:
+    """Start and resume ingestion jobs whose progress is saved after every committed batch.
+
+    A shadow job builds a new collection next to the live one and, once it is complete, atomically points
+    the configured collection name (an alias from then on) at it, so queries never see a partial index.
+    An existing plain collection of that name is never deleted to make room for the alias; it has to be
+    migrated once by hand.
+    """
+
+    def __init__(self, vector_db_config: VectorDBConfig, embedding_config: ModelConfig,
+                 ingestion_config: IngestionConfig = None):
+        self.logger = logging.getLogger(__name__)
+        self.tracer = trace.get_tracer(__name__)
+        self.vector_config = vector_db_config
+        self.embedding_config = embedding_config
+        self.ingestion_config = ingestion_config or IngestionConfig()
+        if not self.ingestion_config.checkpoint_dir:
+            raise ValueError("IngestionConfig.checkpoint_dir is required for ingestion jobs.")
+        self.qdrant = get_qdrant_client(vector_db_config)
+
+    def start(self, source: str, repo_url: str, shadow: bool = False, drop_existing: bool = False,
+              incremental: bool = False, job_id: str = None) -> IngestionReport:
+        """Ingest a dump file, a local checkout, or the repository itself when source is its url.
+
+        With shadow, a complete new collection is built, so drop_existing and incremental do not apply.
+        """
+        job_id = job_id or f"{time.strftime('%Y%m%d%H%M%S')}-{uuid.uuid4().hex[:8]}"
+        alias = self.vector_config.collection_name if shadow else ""
+        if shadow:
+            self.__require_aliases(alias)
+        checkpoint = IngestionCheckpoint(
+            job_id=job_id,
+            source=source,
+            repo_url=repo_url,
+            collection_name=f"{alias}-{job_id}" if shadow else self.vector_config.collection_name,
+            alias=alias,
+            incremental=incremental and not shadow,
+            path=IngestionCheckpoint.file_path(self.ingestion_config.checkpoint_dir, job_id))
+        checkpoint.save()
+        self.logger.info(f"Starting ingestion job {job_id} into {checkpoint.collection_name}")
+        return self.__run(checkpoint, drop_existing and not shadow)
+
+    def resume(self, job_id: str) -> IngestionReport:
+        """Continue a job from its last committed batch."""
+        checkpoint = IngestionCheckpoint.load(self.ingestion_config.checkpoint_dir, job_id)
+        if checkpoint.status == COMPLETED:
+            self.logger.info(f"Ingestion job {job_id} is already completed")
+            return IngestionReport()
+        self.logger.info(f"Resuming ingestion job {job_id} after {checkpoint.committed_files} files, "
+                         f"{checkpoint.committed_batches} batches")
+        # The collection was dropped, if requested, when the job started.
+        return self.__run(checkpoint, drop_existing=False)
+
+    def status(self, job_id: str) -> IngestionCheckpoint:
+        return IngestionCheckpoint.load(self.ingestion_config.checkpoint_dir, job_id)
+
+    def __run(self, checkpoint: IngestionCheckpoint, drop_existing: bool) -> IngestionReport:
+        with self.tracer.start_as_current_span("ingestion job") as span:
+            span.set_attribute("ingestion.job_id", checkpoint.job_id)
+            span.set_attribute("ingestion.resumed_files", checkpoint.committed_files)
+            # Clients and the embedding model are shared with the pipeline through the client registry.
+            pipeline = IngestionPipeline(
+                vector_db_config=replace(self.vector_config, collection_name=checkpoint.collection_name),
+                embedding_config=self.embedding_config,
+                ingestion_config=self.ingestion_config)
+            if os.path.isfile(checkpoint.source):
+                report = pipeline.process_single_file(checkpoint.source, checkpoint.repo_url, drop_existing,
+                                                      checkpoint.incremental, checkpoint)
+            elif os.path.isdir(checkpoint.source):
+                report = pipeline.process_directory(checkpoint.source, checkpoint.repo_url, drop_existing,
+                                                    checkpoint.incremental, checkpoint)
+            else:
+                report = pipeline.process_repository(checkpoint.repo_url, drop_existing,
+                                                     checkpoint.incremental, checkpoint)
+            if checkpoint.alias:
+                self.__swap_alias(checkpoint.alias, checkpoint.collection_name)
+            checkpoint.status = COMPLETED
+            checkpoint.save()
+            return report
+
+    def __swap_alias(self, alias: str, collection_name: str):
+        """Point the alias (and the alias of the compact payload metadata) at the new collection in one update."""
+        pairs = [(alias, collection_name)]
+        if self.qdrant.collection_exists(metadata_collection_name(collection_name)):
+            pairs.append((metadata_collection_name(alias), metadata_collection_name(collection_name)))
+        aliases = {description.alias_name: description.collection_name
+                   for description in self.qdrant.get_aliases().aliases}
+        # Checked again: the plain collection may have been created while the shadow collection was built.
+        self.__require_aliases(alias)
+        operations = []
+        replaced: List[str] = []
+        for alias_name, target in pairs:
+            if alias_name in aliases:
+                operations.append(rest.DeleteAliasOperation(delete_alias=rest.DeleteAlias(alias_name=alias_name)))
+                replaced.append(aliases[alias_name])
+            operations.append(rest.CreateAliasOperation(
+                create_alias=rest.CreateAlias(collection_name=target, alias_name=alias_name)))
+        self.qdrant.update_collection_aliases(change_aliases_operations=operations)
+        self.logger.info(f"Alias {alias} now points to {collection_name}")
+        for previous in replaced:
+            if previous not in (target for _, target in pairs):
+                self.qdrant.delete_collection(previous)
+        notify_collection_changed(alias)
+
+    def __require_aliases(self, alias: str):
+        """Refuse to replace live data: a collection of the alias name cannot become an alias without deleting it,
+        and between the delete and the alias update queries would find no collection."""
+        collections = {description.name for description in self.qdrant.get_collections().collections}
+        plain = [name for name in (alias, metadata_collection_name(alias)) if name in collections]
+        if plain:
+            raise ValueError(
+                f"{', '.join(plain)} {'is a collection, not an alias' if len(plain) == 1 else 'are collections, not aliases'}. "
+                f"Shadow jobs swap an alias; migrate once by deleting or renaming the existing collection, or "
+                f"ingest without shadow. A job that stopped here can be resumed after the migration.")
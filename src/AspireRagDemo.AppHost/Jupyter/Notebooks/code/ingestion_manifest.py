@@ -0,0 +1,112 @@
+"""Content-hash manifest used for incremental re-ingestion."""
+import hashlib
+import json
+import uuid
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Set
+from qdrant_client import QdrantClient
+from qdrant_client.http import models as rest
+
+
+def content_hash(content: str) -> str:
+    """Stable hash of a piece of text."""
+    return hashlib.sha256(content.encode('utf-8')).hexdigest()
+
+
+def chunk_point_id(repo_url: str, file_path: str, chunk_index: int) -> str:
+    """Deterministic Qdrant point id for a chunk so re-runs overwrite instead of duplicating."""
+    return str(uuid.uuid5(uuid.NAMESPACE_URL, f"{repo_url}/{file_path}#{chunk_index}"))
+
+
+def repository_filter(repo_url: str) -> rest.Filter:
+    """The points of one repository."""
+    return rest.Filter(must=[
+        rest.FieldCondition(key="metadata.repository_url", match=rest.MatchValue(value=repo_url))
+    ])
+
+
+@dataclass
+class IngestionReport:
+    """Summary of an ingestion run."""
+    files: int = 0
+    skipped: int = 0
+    updated: int = 0
+    deleted: int = 0
+    failed: int = 0
+
+    def __str__(self):
+        return (f"files: {self.files}, chunks skipped: {self.skipped}, "
+                f"updated: {self.updated}, deleted: {self.deleted}, files failed: {self.failed}")
+
+
+class IngestionManifest:
+    """Per-file and per-chunk hashes of what is already stored in the collection.
+
+    The manifest is rebuilt from the Qdrant payload (metadata.file_hash / metadata.chunk_hash)
+    so the collection itself stays the single source of truth.
+    """
+
+    def __init__(self):
+        # file_path -> file_hash, and file_path -> {point_id: chunk_hash}
+        self.file_hashes: Dict[str, Set[str]] = {}
+        self.chunks: Dict[str, Dict[str, str]] = {}
+        # Distinct stored values of the repository level fields, as JSON.
+        self.repository_values: Set[str] = set()
+
+    @classmethod
+    def load(cls, qdrant: QdrantClient, collection_name: str, repo_url: str,
+             page_size: int = 1000, repository_fields: Iterable[str] = ()) -> "IngestionManifest":
+        """Scroll the points of a repository without vectors and collect their hashes, and the values of the
+        repository level fields."""
+        manifest = cls()
+        if not qdrant.collection_exists(collection_name):
+            return manifest
+        repository_fields = list(repository_fields)
+        offset = None
+        while True:
+            points, offset = qdrant.scroll(
+                collection_name=collection_name,
+                scroll_filter=repository_filter(repo_url),
+                with_payload=rest.PayloadSelectorInclude(include=[
+                    "metadata.file_path", "metadata.file_hash", "metadata.chunk_hash",
+                    *(f"metadata.{field}" for field in repository_fields)
+                ]),
+                with_vectors=False,
+                limit=page_size,
+                offset=offset)
+            for point in points:
+                metadata = (point.payload or {}).get("metadata", {})
+                file_path = metadata.get("file_path")
+                if file_path is None:
+                    continue
+                manifest.file_hashes.setdefault(file_path, set()).add(metadata.get("file_hash"))
+                manifest.chunks.setdefault(file_path, {})[str(point.id)] = metadata.get("chunk_hash")
+                if repository_fields:
+                    manifest.repository_values.add(
+                        json.dumps({field: metadata.get(field) for field in repository_fields}, sort_keys=True))
+            if offset is None:
+                break
+        return manifest
+
+    def repository_fields_changed(self, repository_metadata: Dict) -> bool:
+        """Whether stored points carry repository level values other than these, e.g. an old file count."""
+        current = json.dumps(repository_metadata, sort_keys=True)
+        return any(values != current for values in self.repository_values)
+
+    def is_file_unchanged(self, file_path: str, file_hash: str) -> bool:
+        """A file is unchanged when every stored chunk carries the same file hash."""
+        return self.file_hashes.get(file_path) == {file_hash}
+
+    def chunk_count(self, file_path: str) -> int:
+        return len(self.chunks.get(file_path, {}))
+
+    def is_chunk_unchanged(self, file_path: str, point_id: str, chunk_hash: str) -> bool:
+        return self.chunks.get(file_path, {}).get(point_id) == chunk_hash
+
+    def stale_point_ids(self, current_points: Dict[str, Iterable[str]]) -> List[str]:
+        """Points of removed files, and points of changed files that no longer have a chunk."""
+        stale = []
+        for file_path, stored in self.chunks.items():
+            keep = set(current_points.get(file_path, ()))
+            stale.extend(point_id for point_id in stored if point_id not in keep)
+        return stale
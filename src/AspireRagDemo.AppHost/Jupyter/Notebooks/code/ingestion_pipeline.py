@@ -1,215 +1,278 @@
-from typing import List, Dict
+import io
+from typing import Dict, Iterable, Iterator, List, Tuple
 import os
-from enum import Enum
-from langchain_qdrant import QdrantVectorStore
-from langchain_ollama import OllamaEmbeddings
-from langchain_openai import OpenAIEmbeddings
-from langchain_community.embeddings import (
-    HuggingFaceInferenceAPIEmbeddings,
-)
-from langchain.text_splitter import (
-    RecursiveCharacterTextSplitter,
-    MarkdownHeaderTextSplitter,
-)
-from qdrant_client import QdrantClient
+from langchain_core.documents import Document
 from qdrant_client.http import models as rest
-from gitingest import ingest
-from config import VectorDBConfig, ModelConfig
-from opentelemetry import trace
-from model_provider import ModelProvider
+from config import VectorDBConfig, ModelConfig, IngestionConfig
+from answer_cache import notify_collection_changed
+from batch_upsert import BatchUpsertStage
+from chunking import ParallelChunker
+from client_registry import get_embeddings, get_qdrant_client, get_vector_size
+from collection_profiles import DEFAULT_INDEXING_THRESHOLD, get_collection_profile
+from gitingest_reader import count_dump_files, iter_directory_files, iter_dump_files, list_directory_files
+from ingestion_checkpoint import CheckpointProgress, IngestionCheckpoint, source_directory_hash, source_file_hash
+from ingestion_manifest import IngestionManifest, IngestionReport, chunk_point_id, content_hash, repository_filter
+from metadata_filters import create_payload_indexes
+from metadata_store import MetadataStore, compact_metadata
+from sparse_vectors import SparseEncoder, sparse_vector_params
+from rag_metrics import get_rag_metrics
 import logging
 from opentelemetry import trace
 
+# Repository files that are ingested.
+INCLUDE_PATTERNS = ["*.md", "*.yml", "*.yaml"]
+
+
+def fetch_repository(repo_url: str) -> str:
+    """gitingest dump of a repository; the slow, network bound step of ingesting a repository."""
+    # gitingest is only needed when ingesting straight from a repository.
+    from gitingest import ingest
+    summary, tree, content = ingest(repo_url, include_patterns=INCLUDE_PATTERNS)
+    logging.getLogger(__name__).info(summary)
+    return content
+
+
 class IngestionPipeline:
     """Main document processing pipeline."""    
-    def __init__(self, vector_db_config: VectorDBConfig, embedding_config: ModelConfig):        
+    def __init__(self, vector_db_config: VectorDBConfig, embedding_config: ModelConfig,
+                 ingestion_config: IngestionConfig = None):        
         self.logger =  logging.getLogger(__name__)
         self.tracer = trace.get_tracer(__name__)
+        self.metrics = get_rag_metrics()
         self.vector_config = vector_db_config
+        self.ingestion_config = ingestion_config or IngestionConfig()
+        self.profile = get_collection_profile(vector_db_config.profile)
 
         self.InitEmbeddings(embedding_config)
-        self.qdrant = QdrantClient(url=vector_db_config.url, api_key=vector_db_config.api_key)
+        self.qdrant = get_qdrant_client(vector_db_config)
+        self.metadata_store = MetadataStore(self.qdrant, vector_db_config.collection_name)
         self.__setup_vector_store()
+        self.chunker = ParallelChunker(
+            config=self.ingestion_config.chunking,
+            workers=self.ingestion_config.chunking_workers,
+            files_per_task=self.ingestion_config.chunking_files_per_task)
+        self.upsert_stage = BatchUpsertStage(
+            qdrant=self.qdrant,
+            embeddings=self.embeddings,
+            collection_name=vector_db_config.collection_name,
+            vector_name=vector_db_config.vector_name,
+            config=self.ingestion_config,
+            sparse_encoder=self.sparse_encoder,
+            sparse_vector_name=vector_db_config.sparse_vector_name)
 
     def InitEmbeddings(self, embedding_config):
-        if(embedding_config.model_provider == ModelProvider.HuggingFace):
-            self.logger.info(f"Using HuggingFace model: {embedding_config.model_name}")
-            self.embeddings = HuggingFaceInferenceAPIEmbeddings(
-                api_key=embedding_config.api_key,
-                model_name=embedding_config.model_name
-            )
-        elif(embedding_config.model_provider == ModelProvider.OpenAI):            
-            self.logger.info(f"Using OpenAI model: {embedding_config.model_name}")  
-            self.embeddings = OpenAIEmbeddings(
-                model=embedding_config.model_name,
-                api_key=embedding_config.api_key
-            )
-        else:
-            self.logger.info(f"Using Ollama model: {embedding_config.model_name}, base url: {embedding_config.base_url}")
-            self.embeddings = OllamaEmbeddings(
-                model=embedding_config.model_name,
-                base_url=embedding_config.base_url
-            )
+        self.embedding_config = embedding_config
+        # Shared with other pipeline and LocalRAG instances using the same configuration.
+        # Only the configured provider's packages are imported.
+        self.embeddings = get_embeddings(embedding_config)
+
+    def process_repository(self, repo_url: str, drop_existing: bool = False, incremental: bool = False,
+                           checkpoint: IngestionCheckpoint = None) -> IngestionReport:
+        """Process a repository and store its documents in the vector store.
 
-    def process_repository(self, repo_url: str, drop_existing: bool = False):
-        """Process a repository and store its documents in the vector store."""        
+        When incremental is set, only new or changed chunks are embedded and points of removed files are deleted.
+        With a checkpoint, progress is saved after every batch and files it already committed are not embedded.
+        """
         with self.tracer.start_as_current_span("process repository"):
-            summary, tree, content = ingest(repo_url, include_patterns=["*.md","*.yml","*.yaml"])
-            self.logger.info(summary)
-            chunks = self.__chunk_content(content, repo_url)
-            
-            if drop_existing:
-                self.logger.info("Dropping existing collection...")
-                self.qdrant.delete_collection(self.vector_config.collection_name)
-                self.__setup_vector_store()  
-            with self.tracer.start_as_current_span("add documents to vector store"):
-                self.vector_store.add_documents(chunks)
-                print("done processing the repository.")
-                self.logger.info("done processing the repository.")
-            
-    def process_single_file(self, file_path: str, repo_url: str, drop_existing: bool = False):
-        """Process a file that contains concatenated files in the repository."""       
+            content = fetch_repository(repo_url)
+            return self.process_dump(content, repo_url, drop_existing, incremental, checkpoint)
+
+    def process_dump(self, content: str, repo_url: str, drop_existing: bool = False, incremental: bool = False,
+                     checkpoint: IngestionCheckpoint = None) -> IngestionReport:
+        """Process a gitingest dump that is already in memory, e.g. one returned by fetch_repository."""
+        if checkpoint:
+            checkpoint.verify_source(content_hash(content))
+        lines = io.StringIO(content)
+        total_files = count_dump_files(lines)
+        lines.seek(0)
+        files = self.__split_by_files(iter_dump_files(lines))
+        return self.__ingest_files(files, total_files, repo_url, drop_existing, incremental, checkpoint)
+
+    def process_directory(self, directory: str, repo_url: str, drop_existing: bool = False, incremental: bool = False,
+                          checkpoint: IngestionCheckpoint = None) -> IngestionReport:
+        """Process the files of a local checkout, without gitingest or network access.
+
+        Files are read one at a time, in path order, and the same include patterns apply as for repositories.
+        """
+        with self.tracer.start_as_current_span("process directory"):
+            paths = list_directory_files(directory, INCLUDE_PATTERNS)
+            if checkpoint:
+                checkpoint.verify_source(source_directory_hash(directory, paths))
+            files = self.__split_by_files(iter_directory_files(directory, paths))
+            return self.__ingest_files(files, len(paths), repo_url, drop_existing, incremental, checkpoint)
+
+
+    def process_single_file(self, file_path: str, repo_url: str, drop_existing: bool = False, incremental: bool = False,
+                            checkpoint: IngestionCheckpoint = None) -> IngestionReport:
+        """Process a file that contains concatenated files in the repository.
+
+        The file is streamed one repository file at a time, so memory is bounded by the largest file rather than the dump.
+        """       
         with self.tracer.start_as_current_span("process file"):
+            if checkpoint:
+                checkpoint.verify_source(source_file_hash(file_path))
+            with open(file_path, 'r') as file:
+                total_files = count_dump_files(file)
             with open(file_path, 'r') as file:
-                content = file.read()
-            chunks = self.__chunk_content(content, repo_url)
-            if drop_existing:
-                self.logger.info("Dropping existing collection...")
-                self.qdrant.delete_collection(self.vector_config.collection_name)
-                self.__setup_vector_store()
-            self.logger.info("Adding documents to the vector store...")    
-            with self.tracer.start_as_current_span("add documents to vector store"):
-                self.vector_store.add_documents(chunks) 
-                print("done processing the repository.")
-                self.logger.info("done processing the repository.")
+                files = self.__split_by_files(iter_dump_files(file))
+                return self.__ingest_files(files, total_files, repo_url, drop_existing, incremental, checkpoint)
 
-    def __chunk_content(self, content: str, repo_url: str):
-        """Process repository content using file-type specific chunking with rich metadata."""
-        
-        with self.tracer.start_as_current_span("Start chunking"):
-            self.logger.info("Starting repository chunking...")
-            
-            # Get chunking strategies
-            chunking_strategies = self.__create_chunking_strategies()
-            self.logger.info("Created chunking strategies")
-            
-            # Split content into files
-            files = self.__split_by_files(content)
-            self.logger.info(f"Split content into {len(files)} files")
-            
-            if not files:
-                self.logger.info("Warning: No files to process")
-                return []
-            
-            # Extract repository-level metadata
-            repo_metadata = {
-                "repository_url": repo_url,
-                "repository_name": repo_url.split('/')[-1],
-                "repository_organization": repo_url.split('/')[-2],
-                "repository_total_files": len(files),
-                "repository_file_types": {},
-                "repository_directory_structure": {}
-            }            
-            # Process each file with appropriate chunking strategy
-            processed_chunks = []
+    def __ingest_files(self, files: Iterable[Dict], total_files: int, repo_url: str,
+                       drop_existing: bool, incremental: bool, checkpoint: IngestionCheckpoint = None) -> IngestionReport:
+        """Chunk the files and upsert the chunks that are not already stored with the same content hash."""
+        report = IngestionReport(files=total_files)
+        if drop_existing:
+            self.drop_collection()
+
+        repo_metadata = self.__repository_metadata(repo_url, total_files)
+        compact = self.ingestion_config.compact_payload
+        if incremental and not drop_existing:
+            with self.tracer.start_as_current_span("load ingestion manifest"):
+                # Full payloads repeat the repository level fields in every chunk, so their stored values are
+                # checked too; compact payloads keep them in the repository record, which is rewritten every run.
+                manifest = IngestionManifest.load(self.qdrant, self.vector_config.collection_name, repo_url,
+                                                  repository_fields=[] if compact else list(repo_metadata))
+                self.logger.info(f"Loaded manifest with {len(manifest.chunks)} stored files")
+        else:
+            manifest = IngestionManifest()
+
+        if compact:
+            self.metadata_store.put_repository(repo_url, repo_metadata)
+        current_points: Dict[str, List[str]] = {}
+        refreshed_payloads = []
+        file_records: List[Dict] = []
+        progress = CheckpointProgress(checkpoint) if checkpoint else None
+
+        def changed_files() -> Iterator[Dict]:
             for file in files:
-                file_ext = file["metadata"]["file_type"]
-                
-                splitter = chunking_strategies.get(file_ext, chunking_strategies['default'])
-                combined_metadata = {
-                    **file["metadata"],
-                    **repo_metadata
-                }
-                
-                try:
-                    if file_ext == '.md':
-                        header_splits = splitter.split_text(file["content"])
-                        if any(len(split.page_content) > 600 for split in header_splits):
-                            size_splitter = RecursiveCharacterTextSplitter(
-                                chunk_size=600,
-                                chunk_overlap=50,
-                                separators=["\n\n", "\n", ". "]
-                            )
-                            for split in header_splits:
-                                smaller_splits = size_splitter.create_documents(
-                                    texts=[split.page_content],
-                                    metadatas=[{
-                                        **split.metadata,
-                                        **combined_metadata
-                                    }]
-                                )
-                                processed_chunks.extend(smaller_splits)
-                        else:
-                            for split in header_splits:
-                                split.metadata.update(combined_metadata)
-                            processed_chunks.extend(header_splits)
-                    else:
-                        chunks = splitter.create_documents(
-                            texts=[file["content"]],
-                            metadatas=[combined_metadata]
-                        )
-                        processed_chunks.extend(chunks)
-                        print(f"Added {len(chunks)} chunks for file {file['path']}")
-                except Exception as e:
-                    print(f"Error processing file {file['path']}: {str(e)}")
+                if (manifest.is_file_unchanged(file["path"], file["metadata"]["file_hash"])
+                        and (progress is None or progress.may_skip_file(file["index"]))):
+                    # Unchanged files are not even chunked; their stored points are kept as they are.
+                    current_points[file["path"]] = list(manifest.chunks[file["path"]])
+                    report.skipped += manifest.chunk_count(file["path"])
+                else:
+                    yield file
+
+        def changed_chunks() -> Iterator[Tuple[str, Document]]:
+            """Chunks that need embedding, produced while the embedding stage consumes them."""
+            total_chunks = 0
+            for file, chunks in self.chunker.chunk(changed_files(), repo_metadata):
+                if chunks is None:
+                    # Chunking failed: keep the points and file record stored by an earlier run.
+                    current_points[file["path"]] = list(manifest.chunks.get(file["path"], {}))
+                    report.failed += 1
+                    if progress:
+                        progress.file_done(file["index"])
                     continue
-            
-            self.logger.info(f"Total chunks created: {len(processed_chunks)}")
-            return processed_chunks
-      
-    def __split_by_files(self, content: str) -> List[Dict]:
-        """Split the concatenated content into individual files with their paths."""
-        if not content:
-            print("Warning: Content is empty")
-            return []
+                self.metrics.chunks_produced.add(len(chunks))
+                committed = progress is not None and progress.is_committed(file["index"])
+                if compact:
+                    file_records.append(file["metadata"])
+                    if len(file_records) >= self.ingestion_config.batch_size:
+                        self.metadata_store.put_files(repo_url, file_records)
+                        file_records.clear()
+                for chunk in chunks:
+                    total_chunks += 1
+                    metadata = chunk.metadata
+                    point_id = chunk_point_id(repo_url, metadata["file_path"], metadata["chunk_index"])
+                    if compact:
+                        chunk.metadata = metadata = compact_metadata(metadata, repo_url)
+                    current_points.setdefault(metadata["file_path"], []).append(point_id)
+                    if manifest.is_chunk_unchanged(metadata["file_path"], point_id, metadata["chunk_hash"]):
+                        # Same text at the same position: keep the vector, refresh the file level metadata only.
+                        refreshed_payloads.append(rest.SetPayloadOperation(set_payload=rest.SetPayload(
+                            payload={"metadata": metadata}, points=[point_id])))
+                        report.skipped += 1
+                    elif committed:
+                        # Stored by the interrupted run this job resumes.
+                        report.skipped += 1
+                    else:
+                        if progress:
+                            progress.chunk_yielded()
+                        yield point_id, chunk
+                if progress:
+                    progress.file_done(file["index"])
+            if file_records:
+                self.metadata_store.put_files(repo_url, file_records)
+            self.logger.info(f"Total chunks created: {total_chunks}")
+
+        self.logger.info("Adding documents to the vector store...")
+        with self.tracer.start_as_current_span("add documents to vector store") as span:
+            if self.profile.bulk_load:
+                self.__set_indexing_threshold(0)
+            try:
+                stats = self.upsert_stage.run(changed_chunks(), progress.batch_committed if progress else None)
+            finally:
+                if self.profile.bulk_load:
+                    # Qdrant builds the HNSW index once, in the background, over everything uploaded.
+                    self.__set_indexing_threshold(DEFAULT_INDEXING_THRESHOLD)
+            stale_ids = manifest.stale_point_ids(current_points)
+            if refreshed_payloads:
+                self.qdrant.batch_update_points(self.vector_config.collection_name, refreshed_payloads)
+            if stale_ids:
+                self.qdrant.delete(self.vector_config.collection_name,
+                                   points_selector=rest.PointIdsList(points=stale_ids))
+            if compact:
+                self.metadata_store.delete_files(repo_url, set(manifest.chunks) - set(current_points))
+            elif manifest.repository_fields_changed(repo_metadata):
+                # Points of unchanged files were not rewritten and still carry e.g. the previous file count.
+                self.qdrant.set_payload(self.vector_config.collection_name, payload=repo_metadata, key="metadata",
+                                        points=rest.FilterSelector(filter=repository_filter(repo_url)))
+            report.updated = stats.chunks
+            report.deleted = len(stale_ids)
+            if report.updated or report.deleted or drop_existing:
+                self.metadata_store.mark_changed()
+                notify_collection_changed(self.vector_config.collection_name)
+            for extension, chunking_stats in self.chunker.stats.items():
+                span.set_attribute(f"chunking.{extension}.chunks", chunking_stats.chunks)
+                span.set_attribute(f"chunking.{extension}.ms", chunking_stats.seconds * 1000)
+                self.logger.info(f"Chunked {chunking_stats.files} {extension} files into {chunking_stats.chunks} chunks "
+                                 f"in {chunking_stats.seconds:.2f}s")
+            span.set_attribute("ingestion.chunks_skipped", report.skipped)
+            span.set_attribute("ingestion.chunks_updated", report.updated)
+            span.set_attribute("ingestion.chunks_deleted", report.deleted)
+            span.set_attribute("ingestion.files_failed", report.failed)
+            print(f"done processing the repository. {report}")
+            self.logger.info(f"done processing the repository. {report}")
+        return report
+
+    def drop_collection(self):
+        """Drop the collection and its compact payload metadata, then create them again empty."""
+        self.logger.info("Dropping existing collection...")
+        self.qdrant.delete_collection(self.vector_config.collection_name)
+        self.metadata_store.drop()
+        self.__setup_vector_store()
+        self.upsert_stage.sparse_encoder = self.sparse_encoder
+
+    def __repository_metadata(self, repo_url: str, total_files: int) -> Dict:
+        """Extract repository-level metadata."""
+        return {
+            "repository_url": repo_url,
+            "repository_name": repo_url.split('/')[-1],
+            "repository_organization": repo_url.split('/')[-2],
+            "repository_total_files": total_files,
+            "repository_file_types": {},
+            "repository_directory_structure": {}
+        }
+
+    def __split_by_files(self, path_contents: Iterable[Tuple[str, str]]) -> Iterator[Dict]:
+        """Yield the individual files of a dump or checkout with their paths and metadata, one at a time."""
+        count = 0
+        for path, content in path_contents:
+            count += 1
+            if count <= 3: # Show first 3 files
+                print(f" {count}. {path}")
+            yield {
+                # Position in the source, which is read in the same order on every run.
+                "index": count - 1,
+                "path": path,
+                "content": content,
+                "metadata": self.__extract_file_metadata(path, content)
+            }
         
-        with self.tracer.start_as_current_span("split the files"):
-            # Split by the file delimiter
-            file_parts = content.split("================================================")
-            files = []
-            current_file = None
-            current_content = []
-            
-            print(f"Total parts found: {len(file_parts)}")
-            
-            for part in file_parts:
-                part = part.strip()
-                if not part:
-                    continue
-                    
-                lines = part.split('\n')
-                if lines[0].startswith("File: "):
-                    # If we have a previous file, save it
-                    if current_file:
-                        files.append({
-                            "path": current_file,
-                            "content": "\n".join(current_content),
-                            "metadata": self.__extract_file_metadata(current_file, "\n".join(current_content))
-                        })
-                    
-                    # Start new file
-                    current_file = lines[0].replace("File: ", "").strip()
-                    current_content = lines[1:]  # Skip the "File:" line
-                else:
-                    # This shouldn't normally happen but handle it just in case
-                    if current_file:
-                        current_content.extend(lines)
-            
-            # Don't forget to add the last file
-            if current_file:
-                files.append({
-                    "path": current_file,
-                    "content": "\n".join(current_content),
-                    "metadata": self.__extract_file_metadata(current_file, "\n".join(current_content))
-                })
-            
-            print(f"Total files processed: {len(files)}")
-            if files:
-                print(f"Sample file paths:")
-                for i, file in enumerate(files[:3]): # Show first 3 files
-                    print(f" {i+1}. {file['path']}")
-            
-            return files
+        print(f"Total files processed: {count}")
+        if count == 0:
+            print("Warning: Content is empty")
             
     def __extract_file_metadata(self, file_path: str, content: str) -> Dict:
         """Extract comprehensive metadata for a file."""
@@ -223,61 +286,48 @@ class IngestionPipeline:
             "num_lines": len(content.splitlines()),
             "is_empty": len(content.strip()) == 0,
             "has_shebang": content.startswith('#!') if content else False,
+            "file_hash": content_hash(content),
         }
             
         return metadata
             
+    def __set_indexing_threshold(self, indexing_threshold: int):
+        self.logger.info(f"Setting indexing threshold of {self.vector_config.collection_name} to {indexing_threshold}")
+        self.qdrant.update_collection(
+            collection_name=self.vector_config.collection_name,
+            optimizers_config=rest.OptimizersConfigDiff(indexing_threshold=indexing_threshold))
+
     def __setup_vector_store(self):
         """Setup vector store collection."""
         with self.tracer.start_as_current_span("setup vector store"):  
-            vector_size = len(self.embeddings.embed_query("test"))      
-            self.logger.info(f"collection: {self.vector_config.collection_name} vector size: {vector_size}, vector name: {self.vector_config.vector_name}")
+            self.logger.info(f"collection: {self.vector_config.collection_name} vector name: {self.vector_config.vector_name}")
             if not self.qdrant.collection_exists(self.vector_config.collection_name):
+                # Known models need no probe embedding; other models are probed once per process.
+                vector_size = get_vector_size(self.embeddings, self.embedding_config.model_name)
                 self.logger.info(f"Collection {self.vector_config.collection_name} does not exist. Will create now. Vector size is {vector_size}")
                 self.qdrant.create_collection(
                     collection_name=self.vector_config.collection_name,
                     vectors_config={
-                        "page_content_vector": rest.VectorParams(size=vector_size, 
-                                                                 distance=rest.Distance.COSINE),
-                    })
-                self.logger.info(f"Created collection: {self.vector_config.collection_name}")
+                        self.vector_config.vector_name: self.profile.vector_params(vector_size),
+                    },
+                    sparse_vectors_config={
+                        self.vector_config.sparse_vector_name: sparse_vector_params(),
+                    },
+                    hnsw_config=self.profile.hnsw_config(),
+                    quantization_config=self.profile.quantization_config(),
+                    optimizers_config=self.profile.optimizers_config())
+                self.logger.info(f"Created collection: {self.vector_config.collection_name} with profile {self.profile.name}")
             else:
                 self.logger.info(f"Collection {self.vector_config.collection_name} already exists")
- 
-            self.vector_store: QdrantVectorStore = QdrantVectorStore(
-                client=self.qdrant,
-                collection_name=self.vector_config.collection_name,
-                vector_name=self.vector_config.vector_name,
-                embedding=self.embeddings
-            )
-            
-    def __create_chunking_strategies(self) -> Dict[str, RecursiveCharacterTextSplitter]:
-        """Create specialized chunking strategies for different file types."""
-        return {
-            # Markdown files
-            '.md': MarkdownHeaderTextSplitter(
-                headers_to_split_on=[
-                    ("#", "Header 1"),
-                    ("##", "Header 2"),
-                    ("###", "Header 3"),
-                    ("####", "Header 4")
-                ]
-            ),
-            # Config files
-            '.yml': RecursiveCharacterTextSplitter(
-                chunk_size=300,
-                chunk_overlap=50,
-                separators=["---", "\n\n", "\n"]
-            ),
-            '.yaml': RecursiveCharacterTextSplitter(
-                chunk_size=300,
-                chunk_overlap=50,
-                separators=["---", "\n\n", "\n"]
-            ),
-            # Default
-            'default': RecursiveCharacterTextSplitter(
-                chunk_size=400,
-                chunk_overlap=50,
-                separators=["\n\n", "\n", ". ", " "]
-            )
-        }
\ No newline at end of file
+            # Also indexes collections created before filtered retrieval existed.
+            create_payload_indexes(self.qdrant, self.vector_config.collection_name)
+            if self.ingestion_config.compact_payload:
+                self.metadata_store.ensure_collection()
+            self.sparse_encoder = None
+            sparse_vectors = self.qdrant.get_collection(self.vector_config.collection_name).config.params.sparse_vectors or {}
+            if self.vector_config.sparse_vector_name in sparse_vectors:
+                self.sparse_encoder = SparseEncoder()
+            elif self.vector_config.backend != "local":
+                self.logger.warning(f"Collection {self.vector_config.collection_name} has no sparse vector "
+                                    f"{self.vector_config.sparse_vector_name}; re-ingest with drop_existing=True "
+                                    f"to enable hybrid retrieval")
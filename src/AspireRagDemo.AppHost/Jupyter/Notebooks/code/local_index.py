@@ -0,0 +1,819 @@
+"""Embedded vector index: memory-mapped NumPy vectors with a sidecar payload file, for runs without a Qdrant server.
+
+LocalIndexClient implements the QdrantClient methods the ingestion pipeline, LocalRAG, the metadata store and
+ingestion jobs call, so VectorDBConfig(backend="local") swaps it in through the client registry. Each
+collection is a directory under LocalIndexConfig.path:
+
+- collection.json: vector size and distance, committed sizes of the other files, payload indexes, IVF state
+- vectors.bin: one row per point, float32 or int8 (scales.bin holds the scale of every int8 row)
+- payloads.jsonl and payload_offsets.bin: the JSON payload of every row and where it is in the file
+- ids.jsonl: the point id of every row; live.bin: 0 for rows deleted or overwritten since
+- ivf_*.npy: the IVF centroids and the rows of each partition
+
+Rows are only appended at the committed sizes of collection.json, which is replaced last, so an interrupted
+write leaves the previous state. Opening a collection maps vectors.bin instead of reading it. Dense vectors
+only: sparse vectors are not stored, so hybrid retrieval falls back to dense search. One process writes to a
+directory at a time; other processes see its commits on their next call.
+"""
+import asyncio
+import json
+import logging
+import os
+import shutil
+import threading
+from types import SimpleNamespace
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Set, Tuple, Union
+import numpy as np
+from qdrant_client.http import models as rest
+from config import LocalIndexConfig
+
+PointId = Union[str, int]
+
+QUANTIZATIONS = ["none", "int8"]
+DISTANCES = [rest.Distance.COSINE, rest.Distance.DOT]
+
+# k-means needs enough rows per centroid to place it well; fewer rows are searched flat.
+MIN_ROWS_PER_LIST = 39
+KMEANS_SAMPLE_PER_LIST = 256
+KMEANS_ITERATIONS = 10
+# Rows appended after the IVF build are searched exhaustively; the IVF is rebuilt once they are half as many
+# as the rows it covers.
+IVF_REBUILD_GROWTH = 0.5
+# Rows scored per matrix multiply; small enough that the float32 copy of an int8 block stays in the CPU cache,
+# which makes int8 scoring about three times faster than converting larger blocks.
+SCORE_BLOCK_ROWS = 4096
+
+STATE_FILE = "collection.json"
+ALIASES_FILE = "aliases.json"
+APPENDED_FILES = ["vectors.bin", "scales.bin", "payloads.jsonl", "payload_offsets.bin", "ids.jsonl", "live.bin"]
+
+
+def _payload_value(payload: Dict, key: str) -> Any:
+    """The value at a dotted key such as metadata.file_path, None when it is missing."""
+    value = payload
+    for part in key.split("."):
+        if not isinstance(value, dict):
+            return None
+        value = value.get(part)
+    return value
+
+
+def _keywords(value: Any) -> List:
+    """The values a keyword match compares against: list elements, or the value itself."""
+    values = value if isinstance(value, list) else [value]
+    return [value for value in values if isinstance(value, (str, int, float, bool))]
+
+
+def _select_payload(payload: Dict, with_payload) -> Optional[Dict]:
+    if with_payload is True:
+        return payload
+    if not with_payload:
+        return None
+    if isinstance(with_payload, rest.PayloadSelectorExclude):
+        selected = json.loads(json.dumps(payload))
+        for key in with_payload.exclude:
+            *parents, name = key.split(".")
+            parent = _payload_value(selected, ".".join(parents)) if parents else selected
+            if isinstance(parent, dict):
+                parent.pop(name, None)
+        return selected
+    keys = with_payload.include if isinstance(with_payload, rest.PayloadSelectorInclude) else with_payload
+    selected = {}
+    for key in keys:
+        value = _payload_value(payload, key)
+        if value is None:
+            continue
+        *parents, name = key.split(".")
+        target = selected
+        for parent in parents:
+            target = target.setdefault(parent, {})
+        target[name] = value
+    return selected
+
+
+def _map(path: str, dtype, shape: Tuple[int, ...], mode: str = "r") -> np.ndarray:
+    """Memory map the first rows of a file; nothing is read until the rows are used."""
+    if not all(shape):
+        return np.zeros(shape, dtype=dtype)
+    return np.memmap(path, dtype=dtype, mode=mode, shape=shape)
+
+
+def _flush(array: np.ndarray):
+    if isinstance(array, np.memmap):
+        array.flush()
+
+
+def _write_at(path: str, offset: int, data: bytes):
+    """Write at a committed size; whatever an interrupted write left after it is overwritten."""
+    with open(path, "r+b") as file:
+        file.seek(offset)
+        file.write(data)
+
+
+def _write_json(path: str, value):
+    temp_path = f"{path}.tmp"
+    with open(temp_path, "w") as file:
+        json.dump(value, file, indent=2)
+    os.replace(temp_path, path)
+
+
+def _save_npy(path: str, array: np.ndarray):
+    temp_path = f"{path}.tmp.npy"
+    np.save(temp_path, array)
+    os.replace(temp_path, path)
+
+
+class _Collection:
+    """The files of one collection, mapped into memory. Callers serialise writes."""
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        with open(self.file(STATE_FILE)) as file:
+            self.state = json.load(file)
+        self.mtime = os.stat(self.file(STATE_FILE)).st_mtime_ns
+        self.size = self.state["size"]
+        self.dtype = np.int8 if self.state["quantization"] == "int8" else np.float32
+        self.payload_file = open(self.file("payloads.jsonl"), "rb")
+        with open(self.file("ids.jsonl"), "rb") as file:
+            self.ids: List[PointId] = [json.loads(line) for line in file.read(self.state["ids_bytes"]).splitlines()]
+        self.__map_rows()
+        self.rows_by_id: Dict[PointId, int] = {self.ids[row]: row for row in np.flatnonzero(self.live).tolist()}
+        self.__load_ivf()
+        # Keyword index per payload key: value -> rows. Built on first use, not at startup.
+        self.keyword_index: Dict[str, Dict[Any, Set[int]]] = {}
+
+    @classmethod
+    def create(cls, directory: str, vector_name: str, size: int, distance: str, quantization: str) -> "_Collection":
+        os.makedirs(directory)
+        for name in APPENDED_FILES:
+            open(os.path.join(directory, name), "wb").close()
+        _write_json(os.path.join(directory, STATE_FILE), {
+            "vector_name": vector_name,
+            "size": size,
+            "distance": distance,
+            "quantization": quantization,
+            "rows": 0,
+            "payload_bytes": 0,
+            "ids_bytes": 0,
+            "payload_schema": {},
+            "ivf_lists": 0,
+            "ivf_rows": 0,
+        })
+        return cls(directory)
+
+    def file(self, name: str) -> str:
+        return os.path.join(self.directory, name)
+
+    @property
+    def rows(self) -> int:
+        return self.state["rows"]
+
+    @property
+    def vector_name(self) -> str:
+        return self.state["vector_name"]
+
+    def close(self):
+        self.payload_file.close()
+
+    def changed_on_disk(self) -> bool:
+        """Whether another process committed since this collection was opened."""
+        try:
+            return os.stat(self.file(STATE_FILE)).st_mtime_ns != self.mtime
+        except FileNotFoundError:
+            return True
+
+    def payload(self, row: int) -> Dict:
+        offset, length = self.offsets[row]
+        return json.loads(os.pread(self.payload_file.fileno(), int(length), int(offset)))
+
+    def vector(self, row: int) -> List[float]:
+        vector = self.vectors[row].astype(np.float32)
+        if self.dtype == np.int8:
+            vector *= self.scales[row]
+        return vector.tolist()
+
+    def append(self, ids: List[PointId], vectors: Optional[np.ndarray], payloads: List[Dict]):
+        """Append rows; points that already exist are overwritten, the last one wins within a batch."""
+        first_row = self.rows
+        live = np.ones(len(ids), dtype=np.uint8)
+        replaced = []
+        for row, point_id in enumerate(ids, start=first_row):
+            previous = self.rows_by_id.get(point_id)
+            if previous is not None:
+                if previous >= first_row:
+                    live[previous - first_row] = 0
+                else:
+                    replaced.append(previous)
+            self.rows_by_id[point_id] = row
+        if vectors is not None and self.size:
+            stored, scales = self.__encode(vectors)
+            _write_at(self.file("vectors.bin"), first_row * self.size * stored.itemsize, stored.tobytes())
+            if scales is not None:
+                _write_at(self.file("scales.bin"), first_row * 4, scales.tobytes())
+        lines = [json.dumps(payload, ensure_ascii=False).encode("utf-8") + b"\n" for payload in payloads]
+        offsets = self.__append_payloads(lines)
+        _write_at(self.file("payload_offsets.bin"), first_row * 16, offsets.tobytes())
+        id_lines = b"".join(json.dumps(point_id).encode("utf-8") + b"\n" for point_id in ids)
+        _write_at(self.file("ids.jsonl"), self.state["ids_bytes"], id_lines)
+        _write_at(self.file("live.bin"), first_row, live.tobytes())
+        self.ids.extend(ids)
+        self.state["rows"] += len(ids)
+        self.state["ids_bytes"] += len(id_lines)
+        self.__map_rows()
+        self.kill(replaced)
+        self.save()
+        for key, index in self.keyword_index.items():
+            for row, payload in enumerate(payloads, start=first_row):
+                for value in _keywords(_payload_value(payload, key)):
+                    index.setdefault(value, set()).add(row)
+
+    def set_payload(self, rows: Iterable[int], payload: Dict, payload_key: str = None):
+        """Merge payload into the top level keys of rows, or into the object under payload_key; the new payload is
+        appended and the offset moved."""
+        rows = list(rows)
+        merged = []
+        for row in rows:
+            current = self.payload(row)
+            for key, index in self.keyword_index.items():
+                for value in _keywords(_payload_value(current, key)):
+                    index.get(value, set()).discard(row)
+            if payload_key:
+                merged.append({**current, payload_key: {**(current.get(payload_key) or {}), **payload}})
+            else:
+                merged.append({**current, **payload})
+        lines = [json.dumps(value, ensure_ascii=False).encode("utf-8") + b"\n" for value in merged]
+        offsets = self.__append_payloads(lines)
+        for row, offset in zip(rows, offsets):
+            self.offsets[row] = offset
+        _flush(self.offsets)
+        self.save()
+        for key, index in self.keyword_index.items():
+            for row, value in zip(rows, merged):
+                for keyword in _keywords(_payload_value(value, key)):
+                    index.setdefault(keyword, set()).add(row)
+
+    def delete(self, point_ids: Iterable[PointId]):
+        self.kill([self.rows_by_id.pop(point_id) for point_id in point_ids if point_id in self.rows_by_id])
+        self.save()
+
+    def kill(self, rows: List[int]):
+        """Mark rows dead; they stay in the files until the collection is optimized."""
+        if rows:
+            self.live[rows] = 0
+            _flush(self.live)
+
+    def save(self):
+        _write_json(self.file(STATE_FILE), self.state)
+        self.mtime = os.stat(self.file(STATE_FILE)).st_mtime_ns
+
+    def filter_mask(self, query_filter: Optional[rest.Filter]) -> np.ndarray:
+        """Live rows matching the filter."""
+        mask = self.live.astype(bool)
+        if query_filter is not None:
+            mask &= self.__match(query_filter)
+        return mask
+
+    def search_arrays(self) -> Tuple[np.ndarray, Optional[np.ndarray], Optional[SimpleNamespace]]:
+        """The arrays a search reads; taken under the client lock so a search sees one state."""
+        return self.vectors, self.scales, self.ivf
+
+    def score(self, queries: np.ndarray, rows: Optional[np.ndarray] = None, arrays: Tuple = None,
+              first_row: int = 0) -> np.ndarray:
+        """Scores of the queries (one per line) against rows, or against every row from first_row, in blocks.
+
+        Contiguous rows are scored in place; picking rows copies them.
+        """
+        vectors, scales, _ = arrays or self.search_arrays()
+        if rows is None:
+            blocks = [(vectors[start:start + SCORE_BLOCK_ROWS],
+                       scales[start:start + SCORE_BLOCK_ROWS] if scales is not None else None)
+                      for start in range(first_row, len(vectors), SCORE_BLOCK_ROWS)]
+        else:
+            blocks = [(vectors[rows[start:start + SCORE_BLOCK_ROWS]],
+                       scales[rows[start:start + SCORE_BLOCK_ROWS]] if scales is not None else None)
+                      for start in range(0, len(rows), SCORE_BLOCK_ROWS)]
+        scores = [np.empty((len(queries), 0), dtype=np.float32)]
+        for block, block_scales in blocks:
+            block_scores = queries @ block.astype(np.float32, copy=False).T
+            if block_scales is not None:
+                block_scores *= block_scales
+            scores.append(block_scores)
+        return np.concatenate(scores, axis=1)
+
+    @staticmethod
+    def ivf_candidates(query: np.ndarray, probes: int, ivf: SimpleNamespace) -> np.ndarray:
+        """Rows of the partitions nearest to the query; rows appended since the IVF was built are not included."""
+        centroid_scores = ivf.centroids @ query
+        probes = min(probes, len(centroid_scores))
+        nearest = np.argpartition(-centroid_scores, probes - 1)[:probes]
+        return np.concatenate([ivf.rows[ivf.offsets[index]:ivf.offsets[index + 1]] for index in nearest])
+
+    def normalize(self, vectors: np.ndarray) -> np.ndarray:
+        vectors = np.asarray(vectors, dtype=np.float32).reshape(-1, self.size)
+        if self.state["distance"] == rest.Distance.COSINE:
+            norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+            vectors = vectors / np.where(norms == 0, 1, norms)
+        return vectors
+
+    def needs_ivf(self, lists: int) -> bool:
+        if not lists or not self.size:
+            return False
+        covered = self.state["ivf_rows"] if self.state["ivf_lists"] == lists else 0
+        return (self.rows - covered >= max(lists * MIN_ROWS_PER_LIST, covered * IVF_REBUILD_GROWTH)
+                and len(self.rows_by_id) >= lists * MIN_ROWS_PER_LIST)
+
+    def build_ivf(self, lists: int):
+        """Cluster the live rows with spherical k-means and group them by nearest centroid."""
+        live_rows = np.flatnonzero(self.live)
+        rng = np.random.default_rng(0)
+        sample_rows = np.sort(rng.choice(live_rows, min(len(live_rows), lists * KMEANS_SAMPLE_PER_LIST),
+                                         replace=False))
+        sample = self.__decode(sample_rows)
+        centroids = sample[rng.choice(len(sample), lists, replace=False)]
+        for _ in range(KMEANS_ITERATIONS):
+            assignment = np.argmax(sample @ centroids.T, axis=1)
+            for index in range(lists):
+                members = sample[assignment == index]
+                # An empty partition restarts at a random sample row.
+                centroid = members.sum(axis=0) if len(members) else sample[rng.integers(len(sample))]
+                centroids[index] = centroid / (np.linalg.norm(centroid) or 1)
+        assignment = np.concatenate([
+            np.argmax(self.__decode(live_rows[start:start + SCORE_BLOCK_ROWS]) @ centroids.T, axis=1)
+            for start in range(0, len(live_rows), SCORE_BLOCK_ROWS)])
+        order = np.argsort(assignment, kind="stable")
+        offsets = np.concatenate([[0], np.cumsum(np.bincount(assignment, minlength=lists))])
+        _save_npy(self.file("ivf_centroids.npy"), centroids.astype(np.float32))
+        _save_npy(self.file("ivf_rows.npy"), live_rows[order].astype(np.int64))
+        _save_npy(self.file("ivf_offsets.npy"), offsets.astype(np.int64))
+        self.state["ivf_lists"] = lists
+        self.state["ivf_rows"] = self.rows
+        self.save()
+        self.__load_ivf()
+
+    def compact_into(self, directory: str, quantization: str):
+        """Write the live rows to a new collection directory, in the same order."""
+        target = _Collection.create(directory, self.vector_name, self.size, self.state["distance"], quantization)
+        target.state["payload_schema"] = dict(self.state["payload_schema"])
+        live_rows = np.flatnonzero(self.live)
+        for start in range(0, len(live_rows), SCORE_BLOCK_ROWS):
+            rows = live_rows[start:start + SCORE_BLOCK_ROWS]
+            target.append([self.ids[row] for row in rows.tolist()],
+                          self.__decode(rows) if self.size else None,
+                          [self.payload(row) for row in rows.tolist()])
+        target.save()
+        target.close()
+
+    def __encode(self, vectors: np.ndarray) -> Tuple[np.ndarray, Optional[np.ndarray]]:
+        vectors = self.normalize(vectors)
+        if self.dtype != np.int8:
+            return vectors, None
+        scales = np.abs(vectors).max(axis=1) / 127
+        scales[scales == 0] = 1
+        return np.round(vectors / scales[:, None]).astype(np.int8), scales.astype(np.float32)
+
+    def __decode(self, rows: np.ndarray) -> np.ndarray:
+        vectors = self.vectors[rows].astype(np.float32)
+        if self.dtype == np.int8:
+            vectors *= self.scales[rows][:, None]
+        return vectors
+
+    def __append_payloads(self, lines: List[bytes]) -> np.ndarray:
+        """Append payload lines; returns their (offset, length) pairs."""
+        lengths = np.array([len(line) for line in lines], dtype=np.int64)
+        starts = self.state["payload_bytes"] + np.concatenate([[0], np.cumsum(lengths)[:-1]]).astype(np.int64)
+        _write_at(self.file("payloads.jsonl"), self.state["payload_bytes"], b"".join(lines))
+        self.state["payload_bytes"] += int(lengths.sum())
+        return np.stack([starts, lengths], axis=1) if lines else np.empty((0, 2), dtype=np.int64)
+
+    def __map_rows(self):
+        rows = self.rows
+        self.vectors = _map(self.file("vectors.bin"), self.dtype, (rows, self.size))
+        self.scales = _map(self.file("scales.bin"), np.float32, (rows,)) \
+            if self.dtype == np.int8 and self.size else None
+        self.offsets = _map(self.file("payload_offsets.bin"), np.int64, (rows, 2), mode="r+")
+        self.live = _map(self.file("live.bin"), np.uint8, (rows,), mode="r+")
+
+    def __load_ivf(self):
+        self.ivf = None
+        if self.state["ivf_lists"]:
+            self.ivf = SimpleNamespace(
+                centroids=np.load(self.file("ivf_centroids.npy"), mmap_mode="r"),
+                rows=np.load(self.file("ivf_rows.npy"), mmap_mode="r"),
+                offsets=np.load(self.file("ivf_offsets.npy")),
+                covered_rows=self.state["ivf_rows"])
+
+    def __keyword_index(self, key: str) -> Dict[Any, Set[int]]:
+        """Built from the payloads of the live rows the first time a filter uses the key."""
+        index = self.keyword_index.get(key)
+        if index is None:
+            index = {}
+            for row in np.flatnonzero(self.live).tolist():
+                for value in _keywords(_payload_value(self.payload(row), key)):
+                    index.setdefault(value, set()).add(row)
+            self.keyword_index[key] = index
+        return index
+
+    def __rows_mask(self, rows: Iterable[int]) -> np.ndarray:
+        mask = np.zeros(self.rows, dtype=bool)
+        mask[np.fromiter(rows, dtype=np.int64)] = True
+        return mask
+
+    def __match(self, query_filter: rest.Filter) -> np.ndarray:
+        if query_filter.min_should:
+            raise ValueError("The local vector index does not support min_should filters.")
+        mask = np.ones(self.rows, dtype=bool)
+        for condition in query_filter.must or []:
+            mask &= self.__condition(condition)
+        if query_filter.should:
+            any_match = np.zeros(self.rows, dtype=bool)
+            for condition in query_filter.should:
+                any_match |= self.__condition(condition)
+            mask &= any_match
+        for condition in query_filter.must_not or []:
+            mask &= ~self.__condition(condition)
+        return mask
+
+    def __condition(self, condition) -> np.ndarray:
+        if isinstance(condition, rest.Filter):
+            return self.__match(condition)
+        if isinstance(condition, rest.HasIdCondition):
+            return self.__rows_mask(self.rows_by_id[point_id] for point_id in condition.has_id
+                                    if point_id in self.rows_by_id)
+        if isinstance(condition, rest.FieldCondition) and condition.match is not None:
+            index = self.__keyword_index(condition.key)
+            match = condition.match
+            if isinstance(match, rest.MatchValue):
+                return self.__rows_mask(index.get(match.value, ()))
+            if isinstance(match, rest.MatchAny):
+                return self.__rows_mask(row for value in match.any for row in index.get(value, ()))
+            if isinstance(match, rest.MatchExcept):
+                return ~self.__rows_mask(row for value in match.except_ for row in index.get(value, ()))
+        raise ValueError(f"The local vector index does not support the filter condition {condition}.")
+
+
+class LocalIndexClient:
+    """The QdrantClient methods used by this repository, on collections stored under LocalIndexConfig.path.
+
+    Searches are exact over every row (flat), or over the ivf_probes nearest IVF partitions when ivf_lists is
+    set; filtered searches that find fewer than limit rows in those partitions fall back to exact search.
+    """
+
+    def __init__(self, config: LocalIndexConfig):
+        if not config.path:
+            raise ValueError("LocalIndexConfig.path is required for the local vector index.")
+        if config.quantization not in QUANTIZATIONS:
+            raise ValueError(f"Unknown quantization: {config.quantization}. Use {' or '.join(QUANTIZATIONS)}.")
+        self.logger = logging.getLogger(__name__)
+        self.config = config
+        os.makedirs(config.path, exist_ok=True)
+        self.__lock = threading.RLock()
+        self.__collections: Dict[str, _Collection] = {}
+        self.__aliases: Tuple[int, Dict[str, str]] = (0, {})
+
+    def collection_exists(self, collection_name: str) -> bool:
+        return os.path.exists(os.path.join(self.__directory(collection_name), STATE_FILE))
+
+    def create_collection(self, collection_name: str, vectors_config=None, sparse_vectors_config=None,
+                          **kwargs) -> bool:
+        """Create a collection with one dense vector, or none (vectors_config={}).
+
+        HNSW, quantization and optimizer settings of collection profiles do not apply; sparse vectors are not
+        stored.
+        """
+        if isinstance(vectors_config, dict) and len(vectors_config) > 1:
+            raise ValueError("The local vector index stores one dense vector per point.")
+        vector_name, params = "", vectors_config or None
+        if isinstance(vectors_config, dict) and vectors_config:
+            vector_name, params = next(iter(vectors_config.items()))
+        if params is not None and params.distance not in DISTANCES:
+            raise ValueError(f"The local vector index does not support {params.distance} distance.")
+        with self.__lock:
+            if self.collection_exists(collection_name):
+                raise ValueError(f"Collection {collection_name} already exists.")
+            self.__collections[collection_name] = _Collection.create(
+                self.__directory(collection_name), vector_name, params.size if params else 0,
+                params.distance if params else rest.Distance.COSINE, self.config.quantization)
+        return True
+
+    def delete_collection(self, collection_name: str, **kwargs) -> bool:
+        with self.__lock:
+            directory = self.__directory(collection_name)
+            if not os.path.exists(directory):
+                return False
+            collection = self.__collections.pop(os.path.basename(directory), None)
+            if collection:
+                collection.close()
+            shutil.rmtree(directory)
+            aliases = self.__read_aliases()
+            remaining = {alias: name for alias, name in aliases.items() if name != os.path.basename(directory)}
+            if remaining != aliases:
+                _write_json(os.path.join(self.config.path, ALIASES_FILE), remaining)
+            return True
+
+    def get_collection(self, collection_name: str) -> SimpleNamespace:
+        """The parts of Qdrant's CollectionInfo the repository reads."""
+        collection = self.__collection(collection_name)
+        vectors = {collection.vector_name: rest.VectorParams(size=collection.size,
+                                                             distance=collection.state["distance"])} \
+            if collection.size else {}
+        return SimpleNamespace(
+            points_count=len(collection.rows_by_id),
+            payload_schema=dict(collection.state["payload_schema"]),
+            config=SimpleNamespace(params=SimpleNamespace(vectors=vectors, sparse_vectors={})))
+
+    def get_collections(self) -> rest.CollectionsResponse:
+        names = sorted(name for name in os.listdir(self.config.path)
+                       if os.path.exists(os.path.join(self.config.path, name, STATE_FILE)))
+        return rest.CollectionsResponse(collections=[rest.CollectionDescription(name=name) for name in names])
+
+    def get_aliases(self) -> rest.CollectionsAliasesResponse:
+        return rest.CollectionsAliasesResponse(aliases=[
+            rest.AliasDescription(alias_name=alias, collection_name=name)
+            for alias, name in self.__read_aliases().items()])
+
+    def update_collection_aliases(self, change_aliases_operations: Sequence, **kwargs) -> bool:
+        """Apply the alias operations together: aliases.json is replaced in one step."""
+        with self.__lock:
+            aliases = self.__read_aliases()
+            for operation in change_aliases_operations:
+                if isinstance(operation, rest.DeleteAliasOperation):
+                    aliases.pop(operation.delete_alias.alias_name, None)
+                elif isinstance(operation, rest.CreateAliasOperation):
+                    aliases[operation.create_alias.alias_name] = operation.create_alias.collection_name
+                else:
+                    raise ValueError(f"The local vector index does not support the alias operation {operation}.")
+            _write_json(os.path.join(self.config.path, ALIASES_FILE), aliases)
+            return True
+
+    def update_collection(self, collection_name: str, optimizers_config: rest.OptimizersConfigDiff = None,
+                          **kwargs) -> bool:
+        """Turning indexing back on after a bulk load (collection profile "bulk-load") optimizes the collection."""
+        if optimizers_config is not None and optimizers_config.indexing_threshold:
+            self.optimize(collection_name)
+        return True
+
+    def create_payload_index(self, collection_name: str, field_name: str, field_schema=None, **kwargs):
+        """Record the index; keyword indexes are built in memory when a filter first uses them."""
+        with self.__lock:
+            collection = self.__collection(collection_name)
+            schema = field_schema.value if isinstance(field_schema, rest.PayloadSchemaType) else str(field_schema)
+            collection.state["payload_schema"][field_name] = schema
+            collection.save()
+
+    def upsert(self, collection_name: str, points: Sequence[rest.PointStruct], wait: bool = True,
+               **kwargs) -> rest.UpdateResult:
+        with self.__lock:
+            collection = self.__collection(collection_name)
+            vectors = None
+            if collection.size:
+                vectors = np.asarray([self.__dense_vector(collection, point) for point in points], dtype=np.float32)
+            collection.append([point.id for point in points], vectors, [point.payload or {} for point in points])
+            if collection.needs_ivf(self.config.ivf_lists):
+                self.__build_ivf(collection_name, collection)
+        return rest.UpdateResult(operation_id=0, status=rest.UpdateStatus.COMPLETED)
+
+    def batch_update_points(self, collection_name: str, update_operations: Sequence, **kwargs) -> List:
+        """Payload updates and deletes; vectors are updated with upsert."""
+        results = []
+        for operation in update_operations:
+            if isinstance(operation, rest.SetPayloadOperation):
+                self.set_payload(collection_name, operation.set_payload.payload,
+                                 operation.set_payload.points or rest.FilterSelector(filter=operation.set_payload.filter),
+                                 operation.set_payload.key)
+            elif isinstance(operation, rest.DeleteOperation):
+                self.delete(collection_name, operation.delete)
+            else:
+                raise ValueError(f"The local vector index does not support the update operation {operation}.")
+            results.append(rest.UpdateResult(operation_id=0, status=rest.UpdateStatus.COMPLETED))
+        return results
+
+    def set_payload(self, collection_name: str, payload: Dict, points, key: str = None,
+                    **kwargs) -> rest.UpdateResult:
+        with self.__lock:
+            collection = self.__collection(collection_name)
+            collection.set_payload(self.__selected_rows(collection, points), payload, key)
+        return rest.UpdateResult(operation_id=0, status=rest.UpdateStatus.COMPLETED)
+
+    def delete(self, collection_name: str, points_selector, **kwargs) -> rest.UpdateResult:
+        with self.__lock:
+            collection = self.__collection(collection_name)
+            rows = self.__selected_rows(collection, points_selector)
+            collection.delete([collection.ids[row] for row in rows])
+        return rest.UpdateResult(operation_id=0, status=rest.UpdateStatus.COMPLETED)
+
+    def retrieve(self, collection_name: str, ids: Sequence[PointId], with_payload=True, with_vectors=False,
+                 **kwargs) -> List[rest.Record]:
+        with self.__lock:
+            collection = self.__collection(collection_name)
+            return [self.__record(collection, collection.rows_by_id[point_id], with_payload, with_vectors)
+                    for point_id in ids if point_id in collection.rows_by_id]
+
+    def scroll(self, collection_name: str, scroll_filter: rest.Filter = None, limit: int = 10, offset: int = None,
+               with_payload=True, with_vectors=False, **kwargs) -> Tuple[List[rest.Record], Optional[int]]:
+        """Points in insertion order; the offset is a row number, as opaque to callers as Qdrant's."""
+        with self.__lock:
+            collection = self.__collection(collection_name)
+            rows = np.flatnonzero(collection.filter_mask(scroll_filter))
+            rows = rows[rows >= (offset or 0)]
+            next_offset = int(rows[limit]) if len(rows) > limit else None
+            return [self.__record(collection, row, with_payload, with_vectors)
+                    for row in rows[:limit].tolist()], next_offset
+
+    def count(self, collection_name: str, count_filter: rest.Filter = None, exact: bool = True,
+              **kwargs) -> rest.CountResult:
+        with self.__lock:
+            collection = self.__collection(collection_name)
+            if count_filter is None:
+                return rest.CountResult(count=len(collection.rows_by_id))
+            return rest.CountResult(count=int(collection.filter_mask(count_filter).sum()))
+
+    def query_points(self, collection_name: str, query=None, using: str = None, prefetch=None,
+                     query_filter: rest.Filter = None, search_params=None, limit: int = 10, offset: int = 0,
+                     with_payload=True, with_vectors=False, score_threshold: float = None,
+                     **kwargs) -> rest.QueryResponse:
+        """Dense nearest neighbour search; search_params are Qdrant HNSW settings and do not apply."""
+        # Same fields as rest.QueryRequest, without validating every vector component.
+        request = SimpleNamespace(query=query, using=using, prefetch=prefetch, filter=query_filter,
+                                  limit=limit, offset=offset, with_payload=with_payload,
+                                  with_vector=with_vectors, score_threshold=score_threshold)
+        return self.query_batch_points(collection_name, [request])[0]
+
+    def query_batch_points(self, collection_name: str, requests: Sequence[rest.QueryRequest],
+                           **kwargs) -> List[rest.QueryResponse]:
+        """Answer the requests together; flat searches score all queries in one matrix multiply."""
+        with self.__lock:
+            collection = self.__collection(collection_name)
+            arrays = collection.search_arrays()
+            rows = collection.rows
+            masks = []
+            for request in requests:
+                if request.prefetch or not collection.size:
+                    raise ValueError("The local vector index only answers dense vector queries.")
+                if request.using and request.using != collection.vector_name:
+                    raise ValueError(f"Collection {collection_name} has no vector named {request.using}.")
+                masks.append(collection.filter_mask(request.filter))
+        queries = collection.normalize([self.__query_vector(request.query) for request in requests])
+        ivf = arrays[2]
+        if ivf is None:
+            # Scored outside the lock: rows are only appended, the arrays taken above stay valid.
+            scores = collection.score(queries, arrays=arrays)
+            hits = [self.__top(scores[index], None, masks[index], request)
+                    for index, request in enumerate(requests)]
+        else:
+            hits = [self.__ivf_search(collection, arrays, rows, query, mask, request)
+                    for query, mask, request in zip(queries, masks, requests)]
+        with self.__lock:
+            return [rest.QueryResponse(points=[
+                self.__scored_point(collection, row, score, request.with_payload, request.with_vector)
+                for row, score in request_hits]) for request, request_hits in zip(requests, hits)]
+
+    def optimize(self, collection_name: str):
+        """Rewrite the collection without deleted and overwritten rows, and rebuild its IVF partitions."""
+        with self.__lock:
+            collection = self.__collection(collection_name)
+            directory = collection.directory
+            compacted = f"{directory}.optimizing"
+            shutil.rmtree(compacted, ignore_errors=True)
+            collection.compact_into(compacted, self.config.quantization)
+            previous = f"{directory}.previous"
+            os.rename(directory, previous)
+            os.rename(compacted, directory)
+            # Searches still running on the previous files keep them open until they finish.
+            shutil.rmtree(previous)
+            self.__collections.pop(os.path.basename(directory), None)
+            collection = self.__collection(collection_name)
+            self.logger.info(f"Optimized {collection_name}: {collection.rows} rows")
+            if collection.needs_ivf(self.config.ivf_lists):
+                self.__build_ivf(collection_name, collection)
+
+    def close(self, **kwargs):
+        with self.__lock:
+            for collection in self.__collections.values():
+                collection.close()
+            self.__collections.clear()
+
+    def __build_ivf(self, collection_name: str, collection: _Collection):
+        self.logger.info(f"Building {self.config.ivf_lists} IVF partitions of {collection_name} "
+                         f"over {len(collection.rows_by_id)} rows")
+        collection.build_ivf(self.config.ivf_lists)
+
+    def __ivf_search(self, collection: _Collection, arrays: Tuple, rows: int, query: np.ndarray,
+                     mask: np.ndarray, request: rest.QueryRequest) -> List[Tuple[int, float]]:
+        ivf = arrays[2]
+        candidates = collection.ivf_candidates(query, self.config.ivf_probes, ivf)
+        candidates = candidates[mask[candidates]]
+        tail_mask = mask[ivf.covered_rows:rows]
+        wanted = (request.limit or 10) + (request.offset or 0)
+        if request.filter is not None and len(candidates) + tail_mask.sum() < wanted:
+            # A selective filter leaves too few rows in the probed partitions: search all matching rows.
+            candidates = np.flatnonzero(mask)
+            return self.__top(collection.score(query[None, :], candidates, arrays)[0], candidates, None, request)
+        # The rows appended since the IVF was built are scored as they are stored.
+        scores = np.concatenate([
+            collection.score(query[None, :], candidates, arrays)[0],
+            np.where(tail_mask, collection.score(query[None, :], None, arrays, ivf.covered_rows)[0], -np.inf)])
+        candidates = np.concatenate([candidates, np.arange(ivf.covered_rows, rows)])
+        return self.__top(scores, candidates, None, request)
+
+    @staticmethod
+    def __top(scores: np.ndarray, candidates: Optional[np.ndarray], mask: Optional[np.ndarray],
+              request: rest.QueryRequest) -> List[Tuple[int, float]]:
+        """(row, score) of the best rows, best first; scores are of candidates, or of every row under mask."""
+        if mask is not None:
+            scores = np.where(mask, scores, -np.inf)
+        wanted = min((request.limit or 10) + (request.offset or 0), len(scores))
+        if not wanted:
+            return []
+        best = np.argpartition(-scores, wanted - 1)[:wanted]
+        best = best[np.argsort(-scores[best], kind="stable")][request.offset or 0:]
+        threshold = request.score_threshold
+        rows = best if candidates is None else candidates[best]
+        return [(int(row), float(scores[index])) for row, index in zip(rows, best)
+                if np.isfinite(scores[index]) and (threshold is None or scores[index] >= threshold)]
+
+    @staticmethod
+    def __query_vector(query) -> List[float]:
+        if isinstance(query, rest.NearestQuery):
+            query = query.nearest
+        if isinstance(query, (list, tuple, np.ndarray)):
+            return query
+        raise ValueError(f"The local vector index only answers dense vector queries, not {type(query).__name__}.")
+
+    @staticmethod
+    def __dense_vector(collection: _Collection, point: rest.PointStruct) -> List[float]:
+        vector = point.vector.get(collection.vector_name) if isinstance(point.vector, dict) else point.vector
+        if vector is None:
+            raise ValueError(f"Point {point.id} has no vector {collection.vector_name}.")
+        return vector
+
+    @staticmethod
+    def __selected_rows(collection: _Collection, selector) -> List[int]:
+        if isinstance(selector, rest.FilterSelector):
+            return np.flatnonzero(collection.filter_mask(selector.filter)).tolist()
+        if isinstance(selector, rest.Filter):
+            return np.flatnonzero(collection.filter_mask(selector)).tolist()
+        point_ids = selector.points if isinstance(selector, rest.PointIdsList) else selector
+        return [collection.rows_by_id[point_id] for point_id in point_ids if point_id in collection.rows_by_id]
+
+    @staticmethod
+    def __vectors(collection: _Collection, row: int, with_vectors) -> Optional[Dict[str, List[float]]]:
+        if not with_vectors or not collection.size:
+            return None
+        if with_vectors is not True and collection.vector_name not in with_vectors:
+            return None
+        return {collection.vector_name: collection.vector(row)}
+
+    def __record(self, collection: _Collection, row: int, with_payload, with_vectors) -> rest.Record:
+        return rest.Record(id=collection.ids[row], payload=_select_payload(collection.payload(row), with_payload),
+                           vector=self.__vectors(collection, row, with_vectors))
+
+    def __scored_point(self, collection: _Collection, row: int, score: float, with_payload,
+                       with_vectors) -> rest.ScoredPoint:
+        return rest.ScoredPoint(id=collection.ids[row], version=0, score=score,
+                                payload=_select_payload(collection.payload(row), with_payload),
+                                vector=self.__vectors(collection, row, with_vectors))
+
+    def __read_aliases(self) -> Dict[str, str]:
+        """Aliases of all collections, read again only when aliases.json changed."""
+        path = os.path.join(self.config.path, ALIASES_FILE)
+        try:
+            mtime = os.stat(path).st_mtime_ns
+        except FileNotFoundError:
+            return {}
+        if mtime != self.__aliases[0]:
+            with open(path) as file:
+                self.__aliases = (mtime, json.load(file))
+        return dict(self.__aliases[1])
+
+    def __directory(self, collection_name: str) -> str:
+        """Directory of a collection name or alias."""
+        return os.path.join(self.config.path, self.__read_aliases().get(collection_name, collection_name))
+
+    def __collection(self, collection_name: str) -> _Collection:
+        with self.__lock:
+            directory = self.__directory(collection_name)
+            name = os.path.basename(directory)
+            collection = self.__collections.get(name)
+            if collection is not None and collection.changed_on_disk():
+                # Committed by another process: map the files again. Searches still using the previous
+                # mapping keep it until they finish.
+                collection = None
+            if collection is None:
+                if not os.path.exists(os.path.join(directory, STATE_FILE)):
+                    raise ValueError(f"Collection {collection_name} does not exist.")
+                collection = self.__collections[name] = _Collection(directory)
+            return collection
+
+
+class AsyncLocalIndexClient:
+    """The same client for async callers; calls run in a worker thread so the event loop is not blocked."""
+
+    def __init__(self, client: LocalIndexClient):
+        self.client = client
+
+    def __getattr__(self, name: str):
+        method = getattr(self.client, name)
+
+        async def call(*args, **kwargs):
+            return await asyncio.to_thread(method, *args, **kwargs)
+        return call
@@ -1,125 +1,458 @@
-from typing import List, Dict
-from langchain_ollama import ChatOllama, OllamaEmbeddings
-from langchain_openai import ChatOpenAI, OpenAIEmbeddings
-from langchain_community.embeddings import ( 
-    HuggingFaceInferenceAPIEmbeddings,
-)
-from langchain_community.chat_models import ( ChatHuggingFace )
-from langchain.prompts import PromptTemplate
-from langchain.schema import StrOutputParser
-from typing import List, Dict
-from langchain.prompts import PromptTemplate
+import asyncio
+import time
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+import numpy as np
+from langchain.prompts import ChatPromptTemplate
 from langchain.schema import StrOutputParser
-from config import VectorDBConfig, ModelConfig
-from qdrant_client import QdrantClient
-from langchain_qdrant import QdrantVectorStore
+from langchain_core.documents import Document
+from config import VectorDBConfig, ModelConfig, AnswerCacheConfig, ContextConfig, RetrievalConfig, ServingConfig
+from answer_cache import AnswerCache
+from client_registry import get_async_qdrant_client, get_chat_model, get_embeddings, get_qdrant_client
+from collection_profiles import get_collection_profile
+from context_builder import ContextBuilder
+from embedding_cache import uncached_embeddings
+from latency_stats import percentile
+from metadata_filters import build_metadata_filter, filters_cache_key
+from metadata_store import MetadataStore
+from rag_metrics import get_rag_metrics
+from reranking import create_reranker, mmr_select
+from sparse_vectors import SparseEncoder
+from tracing_options import fine_grained_span
+from qdrant_client.http import models as rest
 import logging
 from opentelemetry import trace
-from model_provider import ModelProvider
+
+SYSTEM_PROMPT = (
+    "You are a helpful AI assistant specialised in technical questions and good at utilising additional "
+    "technical resources provided to you as additional context.\n"
+    "Use the following context to answer the question. You always bringing necessary references.\n"
+    "You prefer a good summary over a long explanation but also provide clear justification for the answer.\n"
+    "If the question has absolutely no relevance to the context, please answer \"I don't know the answer.\"\n"
+    "Please do not include the question in the answer. You can sometimes make educated guesses if the context "
+    "can imply the answer."
+)
+
+QUESTION_PROMPT = "Context:\n{context}\n\nQuestion:\n{question}"
+
+WARMUP_QUESTION = "Reply with OK."
+
 
 class LocalRAG:
     """A class to handle local RAG operations using Ollama for both embeddings and LLM."""
     
     def __init__(self, vector_db_config: VectorDBConfig, 
-                 embedding_config: ModelConfig, chat_config: ModelConfig):
+                 embedding_config: ModelConfig, chat_config: ModelConfig,
+                 answer_cache_config: AnswerCacheConfig = None,
+                 context_config: ContextConfig = None,
+                 retrieval_config: RetrievalConfig = None,
+                 serving_config: ServingConfig = None):
         self.logger = logging.getLogger("local-rag") #logging.getLogger("IngestionPipeline")
         self.tracer = trace.get_tracer("local-rag")
+        self.metrics = get_rag_metrics()
         
-        self.__init_embeddings(embedding_config)
-        self.__init_chatModel(chat_config)
+        # Clients are shared with other LocalRAG and IngestionPipeline instances using the same configuration.
+        # Only the configured provider's packages are imported.
+        self.embeddings = get_embeddings(embedding_config)
+        self.llm = get_chat_model(chat_config)
 
-        self.qdrant = QdrantClient(url=vector_db_config.url, api_key=vector_db_config.api_key)
-        self.vector_store = QdrantVectorStore(
-                client=self.qdrant,
+        self.vector_config = vector_db_config
+        self.search_params = get_collection_profile(vector_db_config.profile).search_params()
+        self.qdrant = get_qdrant_client(vector_db_config)
+        self.async_qdrant = get_async_qdrant_client(vector_db_config)
+        # Repository and file metadata of compact payloads; only read when a caller asks for full metadata.
+        self.metadata_store = MetadataStore(self.qdrant, vector_db_config.collection_name)
+        self.context_builder = ContextBuilder(context_config or ContextConfig())
+        self.retrieval_config = retrieval_config or RetrievalConfig()
+        self.sparse_encoder = SparseEncoder()
+        self.hybrid = self.retrieval_config.mode == "hybrid" and self.__has_sparse_vectors()
+        self.reranker = create_reranker(self.retrieval_config)
+        self.answer_cache = None
+        if answer_cache_config and answer_cache_config.enabled:
+            self.answer_cache = AnswerCache(
+                answer_cache_config,
                 collection_name=vector_db_config.collection_name,
-                vector_name=vector_db_config.vector_name,
-                embedding=self.embeddings
-            )
-            
-        # Define a better prompt template for RAG
-        self.template = """
-        You are a helpful AI assistant specialised in technical questions and good at utilising additional technical resources provided to you as additional context.
-        Use the following context to answer the question. You always bringing necessary references.
-        You prefer a good summary over a long explanation but also provide clear justification for the answer.
-        If the question has absolutely no relevance to the context, please answer "I don't know the answer."
-        Please do not include the question in the answer. You can sometimes make educated guesses if the context can imply the answer.
-                                             
-        
-        Context:
-        {context}
-        
-        Question:
-        {question}
-        """
-        
-        self.prompt = PromptTemplate(
-            template=self.template,
-            input_variables=["context", "question"]
-        )
-        
-    def __init_embeddings(self, embedding_config: ModelConfig):
-        if(embedding_config.model_provider == ModelProvider.HuggingFace):
-            self.logger.info(f"Using HuggingFace embedding model: {embedding_config.model_name}")
-            self.embeddings = HuggingFaceInferenceAPIEmbeddings(
-                api_key=embedding_config.api_key,
-                model_name=embedding_config.model_name
-            )
-        elif(embedding_config.model_provider == ModelProvider.OpenAI):            
-            self.logger.info(f"Using OpenAI embedding model: {embedding_config.model_name}")  
-            self.embeddings = OpenAIEmbeddings(
-                model=embedding_config.model_name,
-                api_key=embedding_config.api_key
-            )
-        else:
-            self.logger.info(f"Using Ollama embedding model: {embedding_config.model_name}, base url: {embedding_config.base_url}")
-            self.embeddings = OllamaEmbeddings(
-                model=embedding_config.model_name,
-                base_url=embedding_config.base_url
-            )
-   
-    def __init_chatModel(self, chat_config: ModelConfig):
-        if(chat_config.model_provider == ModelProvider.HuggingFace):
-            self.logger.info(f"Using HuggingFace chat model: {chat_config.model_name}")
-            self.llm = ChatHuggingFace(
-                api_key=chat_config.api_key,
-                model_name=chat_config.model_name
-            )
-        elif(chat_config.model_provider == ModelProvider.OpenAI):            
-            self.logger.info(f"Using OpenAI chat model: {chat_config.model_name}")  
-            self.llm = ChatOpenAI(
-                model=chat_config.model_name,
-                api_key=chat_config.api_key
-            )
-        else:
-            self.logger.info(f"Using Ollama chat model: {chat_config.model_name}, base url: {chat_config.base_url}")
-            self.llm = ChatOllama(
-                model=chat_config.model_name,
-                base_url=chat_config.base_url
-            )
-            
-    def __format_docs(self, docs: List[Dict]) -> str:
-        """Format the retrieved documents into a string."""
-        with self.tracer.start_as_current_span("rag format_docs"):
-            return "\n\n".join(doc.page_content for doc in docs)
+                fingerprint=self.__collection_fingerprint)
+
+        # The system message is the same for every request and comes first, so local backends such as Ollama
+        # can reuse its KV cache; the context and question that change per request follow in the human message.
+        self.prompt = ChatPromptTemplate.from_messages([
+            ("system", SYSTEM_PROMPT),
+            ("human", QUESTION_PROMPT),
+        ])
+        # Built once: the chain is stateless and shared by all requests.
+        self.chain = self.prompt | self.llm | StrOutputParser()
+        self.serving_config = serving_config or ServingConfig()
+        if self.serving_config.warmup:
+            self.warmup()
+
+    def __format_docs(self, scored_docs: List[Tuple[Document, float]], question: str) -> str:
+        """Format the retrieved documents into a deduplicated context string that fits the token budget."""
+        with fine_grained_span(self.tracer, "rag format_docs") as span:
+            context, stats = self.context_builder.build(scored_docs)
+            prompt_tokens = stats.tokens + self.context_builder.estimate_tokens(SYSTEM_PROMPT + QUESTION_PROMPT + question)
+            span.set_attribute("rag.context.retrieved_chunks", stats.retrieved)
+            span.set_attribute("rag.context.duplicate_chunks", stats.duplicates)
+            span.set_attribute("rag.context.merged_chunks", stats.merged)
+            span.set_attribute("rag.context.packed_blocks", stats.packed)
+            span.set_attribute("rag.context.tokens", stats.tokens)
+            span.set_attribute("rag.prompt_tokens", prompt_tokens)
+            self.metrics.tokens.add(prompt_tokens, {"rag.token.direction": "in"})
+            return context
     
-    def retrieve_and_answer(self, question: str, k: int = 15) -> str:
+    def warmup(self) -> float:
+        """Load the embedding and chat models and prime the backend with the system prompt.
+
+        Returns the warmup latency in milliseconds; the first request then runs at warm latency.
+        """
+        with self.tracer.start_as_current_span("rag warmup") as span:
+            started = time.perf_counter()
+            # The embedding cache would answer without loading the model.
+            uncached_embeddings(self.embeddings).embed_query(WARMUP_QUESTION)
+            self.chain.invoke({"context": "", "question": WARMUP_QUESTION})
+            latency_ms = (time.perf_counter() - started) * 1000
+            span.set_attribute("rag.warmup_ms", latency_ms)
+            self.logger.info(f"Warmed up the embedding and chat models in {latency_ms:.0f}ms")
+            return latency_ms
+
+    def retrieve_and_answer(self, question: str, k: int = 15, filters: Dict[str, Any] = None,
+                            search_type: str = "similarity", lambda_mult: float = 0.5) -> str:
+        """Answer a question.
+
+        filters restricts retrieval by chunk metadata, e.g. {"repository_name": "docs-aspire"}.
+        search_type="mmr" picks diverse chunks; lambda_mult trades relevance (1) against diversity (0).
+        """
+        with self.tracer.start_as_current_span("rag retrieve_and_answer") as span:
+            mmr_lambda = self.__mmr_lambda(search_type, lambda_mult)
+            scope = self.__scope(k, filters, mmr_lambda)
+            cached_answer, question_vector, formatted_context = self.__retrieve(question, k, filters, mmr_lambda,
+                                                                                scope, span)
+            if cached_answer is not None:
+                return cached_answer
+            # Execute the chain with the prepared context and question
+            generation_started = time.perf_counter()
+            response = self.chain.invoke({
+                "context": formatted_context,
+                "question": question
+            })        
+            self.__record_generation(generation_started, response)
+            if self.answer_cache:
+                self.answer_cache.put(question, question_vector, scope, response)
+            return response
+
+    def stream_answer(self, question: str, k: int = 15, filters: Dict[str, Any] = None,
+                      search_type: str = "similarity", lambda_mult: float = 0.5) -> Iterator[str]:
+        """Yield the answer token by token as the model produces it.
+
+        Time to first token and tokens/s are recorded on the "rag stream_answer" span.
+        """
+        span = self.tracer.start_span("rag stream_answer")
+        started = time.perf_counter()
+        first_token_at = None
+        tokens = []
+        try:
+            mmr_lambda = self.__mmr_lambda(search_type, lambda_mult)
+            scope = self.__scope(k, filters, mmr_lambda)
+            # The span is only made current while retrieving: it must not leak into the caller between yields.
+            with trace.use_span(span, end_on_exit=False):
+                cached_answer, question_vector, formatted_context = self.__retrieve(question, k, filters, mmr_lambda,
+                                                                                    scope, span)
+            if cached_answer is not None:
+                yield cached_answer
+                return
+            generation_started = time.perf_counter()
+            for token in self.chain.stream({
+                "context": formatted_context,
+                "question": question
+            }):
+                if first_token_at is None:
+                    first_token_at = time.perf_counter()
+                    span.set_attribute("rag.time_to_first_token_ms", (first_token_at - started) * 1000)
+                    self.metrics.time_to_first_token.record((first_token_at - generation_started) * 1000)
+                tokens.append(token)
+                yield token
+            self.metrics.generation_duration.record((time.perf_counter() - generation_started) * 1000)
+            self.metrics.tokens.add(len(tokens), {"rag.token.direction": "out"})
+            if self.answer_cache:
+                self.answer_cache.put(question, question_vector, scope, "".join(tokens))
+        finally:
+            if first_token_at is not None:
+                generation_seconds = time.perf_counter() - first_token_at
+                span.set_attribute("rag.tokens", len(tokens))
+                if generation_seconds > 0:
+                    span.set_attribute("rag.tokens_per_second", len(tokens) / generation_seconds)
+            span.end()
+
+    async def aretrieve_and_answer(self, question: str, k: int = 15, filters: Dict[str, Any] = None,
+                                   search_type: str = "similarity", lambda_mult: float = 0.5) -> str:
+        """Async counterpart of retrieve_and_answer."""
+        answers = await self.abatch_answer([question], k=k, concurrency=1, filters=filters,
+                                           search_type=search_type, lambda_mult=lambda_mult)
+        return answers[0]
+
+    async def abatch_answer(self, questions: List[str], k: int = 15, concurrency: int = 4,
+                            filters: Dict[str, Any] = None, search_type: str = "similarity",
+                            lambda_mult: float = 0.5) -> List[str]:
+        """Answer many questions concurrently; answers are returned in input order.
+
+        The questions are embedded as queries, like answer() does, retrieval runs on the async Qdrant client
+        and at most `concurrency` embedding and LLM calls are in flight. Each question gets a span with its latency.
+        """
+        with self.tracer.start_as_current_span("rag abatch_answer") as span:
+            span.set_attribute("rag.questions", len(questions))
+            span.set_attribute("rag.concurrency", concurrency)
+            mmr_lambda = self.__mmr_lambda(search_type, lambda_mult)
+            scope = self.__scope(k, filters, mmr_lambda)
+            answers: List[Optional[str]] = [None] * len(questions)
+            latencies_ms: List[float] = [0.0] * len(questions)
+            if self.answer_cache:
+                for index, question in enumerate(questions):
+                    answers[index] = self.answer_cache.get_exact(question, scope)
+                    if answers[index] is not None:
+                        self.metrics.cache_lookups.add(1, {"rag.cache.name": "answer", "rag.cache.result": "exact"})
+            pending = [index for index, answer in enumerate(answers) if answer is None]
+            if not pending:
+                return answers
+
+            semaphore = asyncio.Semaphore(concurrency)
+
+            async def embed(question: str) -> List[float]:
+                async with semaphore:
+                    return await self.embeddings.aembed_query(question)
+
+            embedding_started = time.perf_counter()
+            vectors = await asyncio.gather(*(embed(questions[index]) for index in pending))
+            self.metrics.embedding_duration.record((time.perf_counter() - embedding_started) * 1000,
+                                                   {"rag.stage": "query"})
+            query_filter = build_metadata_filter(filters)
+
+            async def answer(index: int, question_vector: List[float]):
+                started = time.perf_counter()
+                question = questions[index]
+                with self.tracer.start_as_current_span("rag answer question") as question_span:
+                    question_span.set_attribute("rag.question_index", index)
+                    response = self.answer_cache.get_semantic(question_vector, scope) if self.answer_cache else None
+                    if self.answer_cache:
+                        self.metrics.cache_lookups.add(1, {"rag.cache.name": "answer",
+                                                           "rag.cache.result": "miss" if response is None else "semantic"})
+                    if response is None:
+                        retrieved_docs = await self.__asearch(question, question_vector, k, query_filter, mmr_lambda)
+                        formatted_context = self.__format_docs(retrieved_docs, question)
+                        async with semaphore:
+                            generation_started = time.perf_counter()
+                            response = await self.chain.ainvoke({
+                                "context": formatted_context,
+                                "question": question
+                            })
+                            self.__record_generation(generation_started, response)
+                        if self.answer_cache:
+                            self.answer_cache.put(question, question_vector, scope, response)
+                    answers[index] = response
+                    latencies_ms[index] = (time.perf_counter() - started) * 1000
+                    question_span.set_attribute("rag.latency_ms", latencies_ms[index])
+
+            await asyncio.gather(*(answer(index, vector) for index, vector in zip(pending, vectors)))
+            answered = [latencies_ms[index] for index in pending]
+            span.set_attribute("rag.latency_p50_ms", percentile(answered, 50))
+            span.set_attribute("rag.latency_p95_ms", percentile(answered, 95))
+            self.logger.info(f"Answered {len(questions)} questions, p50 {percentile(answered, 50):.0f}ms, "
+                             f"p95 {percentile(answered, 95):.0f}ms")
+            return answers
+
+    def __search(self, question: str, question_vector: List[float], k: int,
+                 query_filter: Optional[rest.Filter] = None,
+                 mmr_lambda: Optional[float] = None) -> List[Tuple[Document, float]]:
+        """Search the collection; with a reranker or MMR, a wider candidate set is fetched and selected locally."""
+        started = time.perf_counter()
+        response = self.qdrant.query_points(
+            collection_name=self.vector_config.collection_name,
+            with_payload=True,
+            with_vectors=self.__with_vectors(mmr_lambda),
+            **self.__query(question, question_vector, self.__candidates(k, mmr_lambda), query_filter))
+        self.__record_search(started)
+        return self.__select(question, question_vector, response.points, k, mmr_lambda)
+
+    async def __asearch(self, question: str, question_vector: List[float], k: int,
+                        query_filter: Optional[rest.Filter] = None,
+                        mmr_lambda: Optional[float] = None) -> List[Tuple[Document, float]]:
+        """Same search as __search on the async Qdrant client."""
+        started = time.perf_counter()
+        response = await self.async_qdrant.query_points(
+            collection_name=self.vector_config.collection_name,
+            with_payload=True,
+            with_vectors=self.__with_vectors(mmr_lambda),
+            **self.__query(question, question_vector, self.__candidates(k, mmr_lambda), query_filter))
+        self.__record_search(started)
+        if not self.reranker and mmr_lambda is None:
+            return self.__to_documents(response.points)
+        # Keep CPU bound selection off the event loop.
+        return await asyncio.to_thread(self.__select, question, question_vector, response.points, k, mmr_lambda)
+
+    def __candidates(self, k: int, mmr_lambda: Optional[float]) -> int:
+        if mmr_lambda is not None:
+            return max(k, self.retrieval_config.mmr_fetch_k)
+        return max(k, self.retrieval_config.rerank_candidates) if self.reranker else k
+
+    def __with_vectors(self, mmr_lambda: Optional[float]):
+        needs_vectors = mmr_lambda is not None or (self.reranker and self.reranker.needs_vectors)
+        return [self.vector_config.vector_name] if needs_vectors else False
+
+    def __select(self, question: str, question_vector: List[float], points, k: int,
+                 mmr_lambda: Optional[float]) -> List[Tuple[Document, float]]:
+        """MMR selection replaces the reranker when it is requested."""
+        if mmr_lambda is not None:
+            return self.__mmr(question_vector, points, k, mmr_lambda)
+        return self.__rerank(question, question_vector, points, k)
+
+    def __mmr(self, question_vector: List[float], points, k: int, lambda_mult: float) -> List[Tuple[Document, float]]:
+        with fine_grained_span(self.tracer, "rag mmr") as span:
+            started = time.perf_counter()
+            scored_docs = self.__to_documents(points)
+            if scored_docs:
+                vectors = np.asarray([point.vector[self.vector_config.vector_name] for point in points],
+                                     dtype=np.float32)
+                scored_docs = [scored_docs[index] for index in mmr_select(question_vector, vectors, k, lambda_mult)]
+            span.set_attribute("rag.mmr.candidates", len(points))
+            span.set_attribute("rag.mmr.k", k)
+            span.set_attribute("rag.mmr.lambda", lambda_mult)
+            span.set_attribute("rag.mmr.latency_ms", (time.perf_counter() - started) * 1000)
+            return scored_docs
+
+    @staticmethod
+    def __mmr_lambda(search_type: str, lambda_mult: float) -> Optional[float]:
+        """The MMR lambda for search_type="mmr", None for plain similarity search."""
+        if search_type == "similarity":
+            return None
+        if search_type == "mmr":
+            return lambda_mult
+        raise ValueError(f"Unknown search_type: {search_type}. Use similarity or mmr.")
+
+    def __rerank(self, question: str, question_vector: List[float], points, k: int) -> List[Tuple[Document, float]]:
+        """Rescore the candidates with the local reranker and keep the best min(k, rerank_top_k)."""
+        scored_docs = self.__to_documents(points)
+        if not self.reranker:
+            return scored_docs
+        with fine_grained_span(self.tracer, "rag rerank") as span:
+            started = time.perf_counter()
+            top_k = min(k, self.retrieval_config.rerank_top_k)
+            if scored_docs:
+                vectors = None
+                if self.reranker.needs_vectors:
+                    vectors = np.asarray([point.vector[self.vector_config.vector_name] for point in points],
+                                         dtype=np.float32)
+                scores = self.reranker.score(question, question_vector, [doc for doc, _ in scored_docs], vectors)
+                scored_docs = [(scored_docs[index][0], float(scores[index])) for index in np.argsort(-scores)[:top_k]]
+            span.set_attribute("rag.rerank.reranker", self.reranker.name)
+            span.set_attribute("rag.rerank.candidates", len(points))
+            span.set_attribute("rag.rerank.top_k", top_k)
+            span.set_attribute("rag.rerank.latency_ms", (time.perf_counter() - started) * 1000)
+            return scored_docs
+
+    def __query(self, question: str, question_vector: List[float], k: int,
+                query_filter: Optional[rest.Filter]) -> Dict[str, Any]:
+        """query_points arguments for the retrieval mode.
+
+        Hybrid mode prefetches dense and sparse (BM25) candidates in the same request, Qdrant runs both
+        searches and merges them with reciprocal rank fusion.
+        """
+        if not self.hybrid:
+            return dict(query=question_vector, using=self.vector_config.vector_name, query_filter=query_filter,
+                        limit=k, search_params=self.search_params)
+        prefetch_limit = max(k, self.retrieval_config.hybrid_prefetch_limit)
+        return dict(
+            prefetch=[
+                rest.Prefetch(query=question_vector, using=self.vector_config.vector_name,
+                              filter=query_filter, limit=prefetch_limit, params=self.search_params),
+                rest.Prefetch(query=self.sparse_encoder.encode_query(question),
+                              using=self.vector_config.sparse_vector_name,
+                              filter=query_filter, limit=prefetch_limit),
+            ],
+            query=rest.FusionQuery(fusion=rest.Fusion.RRF),
+            limit=k)
+
+    @staticmethod
+    def __to_documents(points) -> List[Tuple[Document, float]]:
+        """Scored documents from points stored in the langchain_qdrant payload layout."""
+        return [
+            (Document(page_content=point.payload.get("page_content", ""),
+                      metadata=point.payload.get("metadata") or {}), point.score)
+            for point in points
+        ]
+
+    def __collection_fingerprint(self) -> Optional[Tuple[int, float]]:
+        """Point count and last ingestion time, to notice re-ingestion by another process (e.g. the notebook
+        kernel vs. a server), including content replaced by the same number of chunks. None while the
+        collection does not exist."""
+        collection_name = self.vector_config.collection_name
+        if not self.qdrant.collection_exists(collection_name):
+            return None
+        return self.qdrant.count(collection_name, exact=False).count, self.metadata_store.changed_at()
+
+    def __has_sparse_vectors(self) -> bool:
+        """Collections ingested before hybrid retrieval have no sparse vectors; those fall back to dense search."""
+        if self.vector_config.backend == "local":
+            self.logger.warning("The local vector index stores no sparse vectors, using dense retrieval.")
+            return False
+        collection_name = self.vector_config.collection_name
+        if not self.qdrant.collection_exists(collection_name):
+            return True
+        sparse_vectors = self.qdrant.get_collection(collection_name).config.params.sparse_vectors or {}
+        if self.vector_config.sparse_vector_name in sparse_vectors:
+            return True
+        self.logger.warning(f"Collection {collection_name} has no sparse vectors, using dense retrieval. "
+                            f"Re-ingest with drop_existing=True to enable hybrid retrieval.")
+        return False
+
+    def __retrieve(self, question: str, k: int, filters: Optional[Dict[str, Any]], mmr_lambda: Optional[float],
+                   scope: str, span) -> Tuple[Optional[str], List[float], str]:
+        """Return (cached answer, question vector, formatted context); the context is empty on a cache hit."""
+        if self.answer_cache:
+            # A cache hit skips retrieval and the LLM call entirely.
+            answer = self.answer_cache.get_exact(question, scope)
+            if answer is not None:
+                self.__record_cache_hit(span, "exact")
+                return answer, [], ""
+        question_vector = self.__embed_query(question)
+        if self.answer_cache:
+            answer = self.answer_cache.get_semantic(question_vector, scope)
+            if answer is not None:
+                self.__record_cache_hit(span, "semantic")
+                return answer, question_vector, ""
+            self.__record_cache_hit(span, "miss")
+
         # First retrieve the documents
-        retrieved_docs = self.vector_store.similarity_search(question, k=k)
-        formatted_context = self.__format_docs(retrieved_docs)
-        # Create and execute the RAG chain
-        chain = (
-            self.prompt | 
-            self.llm | 
-            StrOutputParser()
-        )        
-        # Execute the chain with the prepared context and question
-        response = chain.invoke({
-            "context": formatted_context,
-            "question": question
-        })        
-        return response
+        retrieved_docs = self.__search(question, question_vector, k, build_metadata_filter(filters), mmr_lambda)
+        return None, question_vector, self.__format_docs(retrieved_docs, question)
+
+    def __scope(self, k: int, filters: Optional[Dict[str, Any]], mmr_lambda: Optional[float] = None) -> str:
+        """Retrieval parameters a cached answer is only valid for."""
+        mode = "hybrid" if self.hybrid else "dense"
+        selection = self.reranker.name if self.reranker else "none"
+        if mmr_lambda is not None:
+            selection = f"mmr:{mmr_lambda}"
+        return f"{mode};select={selection};k={k};filters={filters_cache_key(filters)}"
+
+    def __record_cache_hit(self, span, result: str):
+        span.set_attribute("rag.answer_cache.result", result)
+        span.set_attribute("rag.answer_cache.hit_rate", self.answer_cache.hit_rate)
+        self.metrics.cache_lookups.add(1, {"rag.cache.name": "answer", "rag.cache.result": result})
+
+    def __embed_query(self, question: str) -> List[float]:
+        started = time.perf_counter()
+        question_vector = self.embeddings.embed_query(question)
+        self.metrics.embedding_duration.record((time.perf_counter() - started) * 1000, {"rag.stage": "query"})
+        return question_vector
+
+    def __record_search(self, started: float):
+        self.metrics.search_duration.record((time.perf_counter() - started) * 1000,
+                                            {"rag.retrieval_mode": "hybrid" if self.hybrid else "dense"})
+
+    def __record_generation(self, started: float, response: str):
+        self.metrics.generation_duration.record((time.perf_counter() - started) * 1000)
+        self.metrics.tokens.add(self.context_builder.estimate_tokens(response), {"rag.token.direction": "out"})
     
-    def get_relevant_chunks(self, question: str, k: int = 15) -> List[Dict]:
+    def get_relevant_chunks(self, question: str, k: int = 15, filters: Dict[str, Any] = None,
+                            search_type: str = "similarity", lambda_mult: float = 0.5,
+                            full_metadata: bool = False) -> List[Dict]:
         """
         Get the relevant chunks for a question without generating an answer.
         Useful for debugging and understanding what context is being used.
@@ -127,8 +460,20 @@ class LocalRAG:
         Args:
             question: User's question
             k: Number of documents to retrieve (default: 5)
+            filters: Metadata field values the chunks must match, e.g. {"file_type": [".md", ".yml"]}
+            search_type: "similarity" or "mmr" for diverse chunks
+            lambda_mult: MMR trade-off between relevance (1) and diversity (0)
+            full_metadata: Re-attach the repository and file metadata of chunks stored with a compact payload
             
         Returns:
             List[Dict]: List of relevant documents
         """
-        return self.vector_store.similarity_search(question, k=k)
+        question_vector = self.__embed_query(question)
+        mmr_lambda = self.__mmr_lambda(search_type, lambda_mult)
+        docs = [doc for doc, _ in self.__search(question, question_vector, k, build_metadata_filter(filters),
+                                                mmr_lambda)]
+        return self.attach_metadata(docs) if full_metadata else docs
+
+    def attach_metadata(self, documents: List[Document]) -> List[Document]:
+        """The documents with their repository and file metadata, for chunks stored with a compact payload."""
+        return self.metadata_store.attach(documents)
@@ -0,0 +1,53 @@
+"""Structured metadata filters for retrieval and the payload indexes that keep them fast."""
+import json
+from typing import Any, Dict, Optional
+from qdrant_client import QdrantClient
+from qdrant_client.http import models as rest
+
+# Chunk metadata is stored under the "metadata" payload key by the ingestion pipeline.
+METADATA_KEY = "metadata"
+
+# Metadata fields with a keyword payload index, so filtered HNSW search does not scan the collection.
+INDEXED_FIELDS = [
+    "repository_url",
+    "repository_name",
+    "directory",
+    "file_path",
+    "file_type",
+    "Header 1",
+    "Header 2",
+    "Header 3",
+    "Header 4",
+]
+
+
+def build_metadata_filter(filters: Optional[Dict[str, Any]]) -> Optional[rest.Filter]:
+    """Build a Qdrant filter from {metadata field: value or list of values}; all fields must match.
+
+    Example: {"repository_name": "docs-aspire", "file_type": [".md", ".yml"]}
+    """
+    if not filters:
+        return None
+    conditions = []
+    for field, value in filters.items():
+        key = f"{METADATA_KEY}.{field}"
+        if isinstance(value, (list, tuple, set)):
+            conditions.append(rest.FieldCondition(key=key, match=rest.MatchAny(any=list(value))))
+        else:
+            conditions.append(rest.FieldCondition(key=key, match=rest.MatchValue(value=value)))
+    return rest.Filter(must=conditions)
+
+
+def filters_cache_key(filters: Optional[Dict[str, Any]]) -> str:
+    """Stable text form of the filters, used to scope cached answers."""
+    return json.dumps(filters or {}, sort_keys=True, default=list)
+
+
+def create_payload_indexes(qdrant: QdrantClient, collection_name: str):
+    """Create keyword indexes for the filterable metadata fields. Existing indexes are left as they are."""
+    existing = qdrant.get_collection(collection_name).payload_schema or {}
+    for field in INDEXED_FIELDS:
+        key = f"{METADATA_KEY}.{field}"
+        if key not in existing:
+            qdrant.create_payload_index(collection_name=collection_name, field_name=key,
+                                        field_schema=rest.PayloadSchemaType.KEYWORD)
@@ -0,0 +1,120 @@
+"""Compact chunk payloads: repository and file metadata stored once, in a side collection next to the chunks.
+
+In compact mode a chunk's metadata only keeps the ids of its repository and file records, the fields that
+retrieval filters on, and what the manifest and the context builder read (hashes, chunk index). The side
+collection has no vectors; its points are the repository and file records, keyed by deterministic ids.
+It also holds the time of the last ingestion that changed the chunks, in every mode.
+"""
+import time
+import uuid
+from typing import Dict, Iterable, List
+from langchain_core.documents import Document
+from qdrant_client import QdrantClient
+from qdrant_client.http import models as rest
+from metadata_filters import INDEXED_FIELDS
+
+REPOSITORY_ID_KEY = "repository_id"
+INGESTED_AT_KEY = "ingested_at"
+FILE_ID_KEY = "file_id"
+
+# Chunk level fields kept in a compact payload besides the indexed filter fields and the record ids.
+CHUNK_FIELDS = ["chunk_index", "chunk_hash", "file_hash", "overlap_chars"]
+
+
+def metadata_collection_name(collection_name: str) -> str:
+    return f"{collection_name}-metadata"
+
+
+def repository_record_id(repo_url: str) -> str:
+    return str(uuid.uuid5(uuid.NAMESPACE_URL, repo_url))
+
+
+def file_record_id(repo_url: str, file_path: str) -> str:
+    return str(uuid.uuid5(uuid.NAMESPACE_URL, f"{repo_url}/{file_path}"))
+
+
+def collection_state_id() -> str:
+    return str(uuid.uuid5(uuid.NAMESPACE_URL, "collection-state"))
+
+
+def compact_metadata(metadata: Dict, repo_url: str) -> Dict:
+    """The chunk metadata to store when the repository and file records are stored separately."""
+    compact = {field: metadata[field] for field in INDEXED_FIELDS if field in metadata}
+    compact[REPOSITORY_ID_KEY] = repository_record_id(repo_url)
+    compact[FILE_ID_KEY] = file_record_id(repo_url, metadata["file_path"])
+    for field in CHUNK_FIELDS:
+        if field in metadata:
+            compact[field] = metadata[field]
+    return compact
+
+
+class MetadataStore:
+    """Repository and file records of a chunk collection, stored once per repository and file."""
+
+    def __init__(self, qdrant: QdrantClient, collection_name: str):
+        self.qdrant = qdrant
+        self.collection_name = metadata_collection_name(collection_name)
+
+    def exists(self) -> bool:
+        return self.qdrant.collection_exists(self.collection_name)
+
+    def ensure_collection(self):
+        if not self.exists():
+            self.qdrant.create_collection(collection_name=self.collection_name, vectors_config={})
+
+    def drop(self):
+        if self.exists():
+            self.qdrant.delete_collection(self.collection_name)
+
+    def put_repository(self, repo_url: str, metadata: Dict):
+        self.__upsert([(repository_record_id(repo_url), metadata)])
+
+    def put_files(self, repo_url: str, files_metadata: Iterable[Dict]):
+        self.__upsert([(file_record_id(repo_url, metadata["file_path"]), metadata) for metadata in files_metadata])
+
+    def delete_files(self, repo_url: str, file_paths: Iterable[str]):
+        ids = [file_record_id(repo_url, file_path) for file_path in file_paths]
+        if ids and self.exists():
+            self.qdrant.delete(self.collection_name, points_selector=rest.PointIdsList(points=ids))
+
+    def mark_changed(self):
+        """Record that the chunk collection has just changed, for other processes reading it."""
+        self.ensure_collection()
+        self.__upsert([(collection_state_id(), {INGESTED_AT_KEY: time.time()})])
+
+    def changed_at(self) -> float:
+        """Time of the last recorded change, 0.0 when none was recorded."""
+        if not self.exists():
+            return 0.0
+        records = self.qdrant.retrieve(self.collection_name, ids=[collection_state_id()], with_payload=True)
+        return (records[0].payload or {}).get(INGESTED_AT_KEY, 0.0) if records else 0.0
+
+    def attach(self, documents: List[Document]) -> List[Document]:
+        """Documents with the full metadata: repository record, file record, then the chunk's own fields.
+
+        Documents stored with the full payload are returned unchanged. Each record is fetched once per call.
+        """
+        ids = {doc.metadata[key] for doc in documents for key in (REPOSITORY_ID_KEY, FILE_ID_KEY) if key in doc.metadata}
+        if not ids or not self.exists():
+            return documents
+        records = {str(record.id): record.payload or {}
+                   for record in self.qdrant.retrieve(self.collection_name, ids=list(ids), with_payload=True)}
+        attached = []
+        for doc in documents:
+            if FILE_ID_KEY not in doc.metadata:
+                attached.append(doc)
+                continue
+            metadata = {
+                **records.get(doc.metadata[FILE_ID_KEY], {}),
+                **records.get(doc.metadata.get(REPOSITORY_ID_KEY), {}),
+                **doc.metadata,
+            }
+            attached.append(Document(page_content=doc.page_content, metadata=metadata))
+        return attached
+
+    def __upsert(self, records: List[tuple]):
+        if records:
+            self.qdrant.upsert(
+                collection_name=self.collection_name,
+                points=[rest.PointStruct(id=record_id, vector={}, payload=payload) for record_id, payload in records],
+                wait=True)
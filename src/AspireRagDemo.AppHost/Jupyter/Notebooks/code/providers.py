@@ -0,0 +1,74 @@
+"""Embedding and chat model providers keyed by ModelProvider.
+
+Each factory imports its provider package when it is called, so only the configured provider is loaded.
+"""
+import logging
+from typing import Callable, Dict
+from langchain_core.embeddings import Embeddings
+from langchain_core.language_models import BaseChatModel
+from config import ModelConfig
+from model_provider import ModelProvider
+
+logger = logging.getLogger(__name__)
+
+
+def _huggingface_embeddings(config: ModelConfig) -> Embeddings:
+    from langchain_community.embeddings import HuggingFaceInferenceAPIEmbeddings
+    return HuggingFaceInferenceAPIEmbeddings(api_key=config.api_key, model_name=config.model_name)
+
+
+def _openai_embeddings(config: ModelConfig) -> Embeddings:
+    from langchain_openai import OpenAIEmbeddings
+    return OpenAIEmbeddings(model=config.model_name, api_key=config.api_key)
+
+
+def _ollama_embeddings(config: ModelConfig) -> Embeddings:
+    from langchain_ollama import OllamaEmbeddings
+    return OllamaEmbeddings(model=config.model_name, base_url=config.base_url)
+
+
+def _huggingface_chat(config: ModelConfig) -> BaseChatModel:
+    from langchain_community.chat_models import ChatHuggingFace
+    return ChatHuggingFace(api_key=config.api_key, model_name=config.model_name)
+
+
+def _openai_chat(config: ModelConfig) -> BaseChatModel:
+    from langchain_openai import ChatOpenAI
+    return ChatOpenAI(model=config.model_name, api_key=config.api_key)
+
+
+def _ollama_chat(config: ModelConfig) -> BaseChatModel:
+    from langchain_ollama import ChatOllama
+    options = {}
+    if config.keep_alive:
+        # Ollama reads a number as seconds and a string as a duration such as "30m".
+        keep_alive = config.keep_alive
+        options["keep_alive"] = int(keep_alive) if keep_alive.lstrip('-').isdigit() else keep_alive
+    return ChatOllama(model=config.model_name, base_url=config.base_url, **options)
+
+
+EMBEDDING_PROVIDERS: Dict[ModelProvider, Callable[[ModelConfig], Embeddings]] = {
+    ModelProvider.Ollama: _ollama_embeddings,
+    ModelProvider.OllamaHost: _ollama_embeddings,
+    ModelProvider.OpenAI: _openai_embeddings,
+    ModelProvider.HuggingFace: _huggingface_embeddings,
+}
+
+CHAT_PROVIDERS: Dict[ModelProvider, Callable[[ModelConfig], BaseChatModel]] = {
+    ModelProvider.Ollama: _ollama_chat,
+    ModelProvider.OllamaHost: _ollama_chat,
+    ModelProvider.OpenAI: _openai_chat,
+    ModelProvider.HuggingFace: _huggingface_chat,
+}
+
+
+def create_embeddings(config: ModelConfig) -> Embeddings:
+    """Embedding client of the configured provider; anything unknown falls back to Ollama."""
+    logger.info(f"Using {config.model_provider.name} embedding model: {config.model_name}, base url: {config.base_url}")
+    return EMBEDDING_PROVIDERS.get(config.model_provider, _ollama_embeddings)(config)
+
+
+def create_chat_model(config: ModelConfig) -> BaseChatModel:
+    """Chat model of the configured provider; anything unknown falls back to Ollama."""
+    logger.info(f"Using {config.model_provider.name} chat model: {config.model_name}, base url: {config.base_url}")
+    return CHAT_PROVIDERS.get(config.model_provider, _ollama_chat)(config)
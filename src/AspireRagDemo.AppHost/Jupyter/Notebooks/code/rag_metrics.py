@@ -0,0 +1,38 @@
+"""OpenTelemetry metric instruments recorded by the ingestion pipeline and LocalRAG.
+
+Instruments are created on the global meter provider; until trace_setup installs one they are no-ops.
+"""
+from opentelemetry import metrics
+
+
+class RagMetrics:
+    """Latency histograms (milliseconds) and throughput counters of the RAG stages."""
+
+    def __init__(self, meter: metrics.Meter = None):
+        meter = meter or metrics.get_meter("rag")
+        self.embedding_duration = meter.create_histogram(
+            "rag.embedding.duration", unit="ms", description="Embedding request latency")
+        self.search_duration = meter.create_histogram(
+            "rag.search.duration", unit="ms", description="Vector store search latency")
+        self.time_to_first_token = meter.create_histogram(
+            "rag.llm.time_to_first_token", unit="ms", description="Time until the model produced its first token")
+        self.generation_duration = meter.create_histogram(
+            "rag.llm.generation.duration", unit="ms", description="Total LLM generation time")
+        self.chunks_produced = meter.create_counter(
+            "rag.ingestion.chunks_produced", unit="{chunk}", description="Chunks produced by the chunking stage")
+        self.chunks_embedded = meter.create_counter(
+            "rag.ingestion.chunks_embedded", unit="{chunk}", description="Chunks embedded and upserted")
+        self.cache_lookups = meter.create_counter(
+            "rag.cache.lookups", unit="{lookup}", description="Cache lookups by cache and result (hit or miss)")
+        self.tokens = meter.create_counter(
+            "rag.llm.tokens", unit="{token}", description="Prompt (in) and completion (out) tokens, estimated")
+
+
+_rag_metrics: RagMetrics = None
+
+
+def get_rag_metrics() -> RagMetrics:
+    global _rag_metrics
+    if _rag_metrics is None:
+        _rag_metrics = RagMetrics()
+    return _rag_metrics
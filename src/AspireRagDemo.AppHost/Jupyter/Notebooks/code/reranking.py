@@ -0,0 +1,90 @@
+"""Local rerankers for the second stage of LocalRAG retrieval."""
+import logging
+from typing import List
+import numpy as np
+from langchain_core.documents import Document
+from config import RetrievalConfig
+
+
+def cosine_similarities(query_vector: List[float], vectors: np.ndarray) -> np.ndarray:
+    """Cosine similarity of every row of vectors with the query vector, in one matrix product."""
+    query = np.asarray(query_vector, dtype=np.float32)
+    query_norm = np.linalg.norm(query)
+    norms = np.linalg.norm(vectors, axis=1) * query_norm
+    norms[norms == 0] = 1.0
+    return (vectors @ query) / norms
+
+
+def mmr_select(query_vector: List[float], vectors: np.ndarray, k: int, lambda_mult: float = 0.5) -> List[int]:
+    """Maximal marginal relevance: indexes of k rows that are relevant to the query but not to each other.
+
+    The pairwise similarities are computed once as a matrix product; each greedy step is a vector update
+    of the maximum similarity to the rows selected so far.
+    """
+    count = len(vectors)
+    if count == 0 or k <= 0:
+        return []
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    normalized = vectors / norms
+    relevance = cosine_similarities(query_vector, vectors)
+    similarity = normalized @ normalized.T
+
+    selected = [int(np.argmax(relevance))]
+    available = np.ones(count, dtype=bool)
+    available[selected[0]] = False
+    max_similarity = similarity[selected[0]].copy()
+    while len(selected) < min(k, count):
+        scores = lambda_mult * relevance - (1 - lambda_mult) * max_similarity
+        scores[~available] = -np.inf
+        best = int(np.argmax(scores))
+        selected.append(best)
+        available[best] = False
+        np.maximum(max_similarity, similarity[best], out=max_similarity)
+    return selected
+
+
+class CosineReranker:
+    """Exact float32 cosine over the candidate vectors returned by Qdrant.
+
+    Cheap, and it restores the dense ranking after quantized search or rank fusion.
+    """
+    name = "cosine"
+    needs_vectors = True
+
+    def score(self, question: str, question_vector: List[float], documents: List[Document],
+              vectors: np.ndarray) -> np.ndarray:
+        return cosine_similarities(question_vector, vectors)
+
+
+class CrossEncoderReranker:
+    """Scores (question, chunk) pairs with a small cross-encoder on the CPU; needs sentence-transformers."""
+    name = "cross-encoder"
+    needs_vectors = False
+
+    def __init__(self, model_name: str):
+        self.model_name = model_name
+        self._model = None
+
+    def score(self, question: str, question_vector: List[float], documents: List[Document],
+              vectors: np.ndarray) -> np.ndarray:
+        if self._model is None:
+            try:
+                from sentence_transformers import CrossEncoder
+            except ImportError:
+                raise ImportError("The cross-encoder reranker needs the sentence-transformers package: "
+                                  "pip install sentence-transformers")
+            logging.getLogger(__name__).info(f"Loading cross-encoder {self.model_name}")
+            self._model = CrossEncoder(self.model_name, device="cpu")
+        return np.asarray(self._model.predict([(question, doc.page_content) for doc in documents]))
+
+
+def create_reranker(config: RetrievalConfig):
+    """Reranker for the configuration, or None when reranking is off."""
+    if config.reranker in ("", "none"):
+        return None
+    if config.reranker == CosineReranker.name:
+        return CosineReranker()
+    if config.reranker == CrossEncoderReranker.name:
+        return CrossEncoderReranker(config.cross_encoder_model)
+    raise ValueError(f"Unknown reranker: {config.reranker}. Use none, cosine or cross-encoder.")
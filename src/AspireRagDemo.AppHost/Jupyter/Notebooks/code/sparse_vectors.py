@@ -0,0 +1,64 @@
+"""Local BM25 style sparse vectors for hybrid (dense + keyword) retrieval."""
+import re
+import zlib
+from collections import Counter
+from typing import Dict, List
+from qdrant_client.http import models as rest
+
+# Keeps config keys, package names, paths and CLI flags together, e.g. "ModelConfiguration__ChatModel",
+# "Aspire.Hosting.Qdrant", "--port"; a flag keeps its leading dashes.
+_TOKEN_PATTERN = re.compile(r"(?:--?)?[a-z0-9](?:[a-z0-9_.\-:/]*[a-z0-9])?")
+_PART_PATTERN = re.compile(r"[_.\-:/]+")
+
+
+def tokenize(text: str) -> List[str]:
+    """Lower case terms; compound terms and flags are also indexed by their parts, so "qdrant" matches
+    "aspire.hosting.qdrant" and "port" matches "--port"."""
+    tokens = []
+    for token in _TOKEN_PATTERN.findall(text.lower()):
+        tokens.append(token)
+        parts = [part for part in _PART_PATTERN.split(token) if part]
+        if parts != [token]:
+            tokens.extend(parts)
+    return tokens
+
+
+def sparse_vector_params() -> rest.SparseVectorParams:
+    """Qdrant applies the IDF part of BM25 over the whole collection at query time."""
+    return rest.SparseVectorParams(modifier=rest.Modifier.IDF)
+
+
+class SparseEncoder:
+    """BM25 term frequency weighting computed locally; term ids are stable hashes so no vocabulary is stored.
+
+    Document weights carry the saturated, length normalized term frequency and query weights are 1 per term,
+    so the dot product with the IDF modifier of the sparse vector gives the BM25 score.
+    """
+
+    def __init__(self, k1: float = 1.2, b: float = 0.75, average_length: float = 80):
+        self.k1 = k1
+        self.b = b
+        self.average_length = average_length
+
+    def encode_document(self, text: str) -> rest.SparseVector:
+        term_counts = Counter(tokenize(text))
+        length = sum(term_counts.values())
+        norm = self.k1 * (1 - self.b + self.b * length / self.average_length)
+        return self.__sparse_vector({
+            term: count * (self.k1 + 1) / (count + norm) for term, count in term_counts.items()
+        })
+
+    def encode_documents(self, texts: List[str]) -> List[rest.SparseVector]:
+        return [self.encode_document(text) for text in texts]
+
+    def encode_query(self, text: str) -> rest.SparseVector:
+        return self.__sparse_vector({term: 1.0 for term in tokenize(text)})
+
+    @staticmethod
+    def __sparse_vector(weights: Dict[str, float]) -> rest.SparseVector:
+        by_index: Dict[int, float] = {}
+        for term, weight in weights.items():
+            # Hash collisions are rare and only add a little noise, so colliding weights are summed.
+            index = zlib.crc32(term.encode("utf-8")) & 0x7FFFFFFF
+            by_index[index] = by_index.get(index, 0.0) + weight
+        return rest.SparseVector(indices=list(by_index), values=list(by_index.values()))
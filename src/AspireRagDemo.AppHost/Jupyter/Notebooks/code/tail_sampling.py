@@ -0,0 +1,73 @@
+"""Tail sampling in the process: a trace is exported or dropped once its local root span has ended.
+
+Every span is recorded, so the decision can look at the whole trace: traces with an error and traces whose
+root was slow are always kept, the rest are kept at sample_ratio. Kept spans go to the wrapped processor.
+"""
+import random
+import threading
+from collections import OrderedDict
+from typing import List, Optional
+from opentelemetry.context import Context
+from opentelemetry.sdk.trace import ReadableSpan, Span, SpanProcessor
+from opentelemetry.trace import StatusCode
+
+
+class TailSamplingSpanProcessor(SpanProcessor):
+    """Buffers ended spans per trace and forwards the kept traces to the delegate (e.g. a BatchSpanProcessor)."""
+
+    def __init__(self, delegate: SpanProcessor, slow_threshold_ms: float = 2000, sample_ratio: float = 0.1,
+                 max_pending_traces: int = 1000):
+        self.delegate = delegate
+        self.slow_threshold_ns = int(slow_threshold_ms * 1_000_000)
+        self.sample_ratio = sample_ratio
+        self.max_pending_traces = max_pending_traces
+        # trace id -> ended spans of traces whose local root is still running
+        self._pending: "OrderedDict[int, List[ReadableSpan]]" = OrderedDict()
+        # trace id -> decision, for spans that end after their root (e.g. a stream consumed late)
+        self._decisions: "OrderedDict[int, bool]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def on_start(self, span: Span, parent_context: Optional[Context] = None) -> None:
+        self.delegate.on_start(span, parent_context=parent_context)
+
+    def on_end(self, span: ReadableSpan) -> None:
+        trace_id = span.context.trace_id
+        with self._lock:
+            decision = self._decisions.get(trace_id)
+            if decision is not None:
+                kept = [span] if decision else []
+            else:
+                spans = self._pending.setdefault(trace_id, [])
+                spans.append(span)
+                if not self.__is_local_root(span):
+                    self.__trim(self._pending)
+                    return
+                del self._pending[trace_id]
+                decision = self.__keep(span, spans)
+                self._decisions[trace_id] = decision
+                self.__trim(self._decisions)
+                kept = spans if decision else []
+        for kept_span in kept:
+            self.delegate.on_end(kept_span)
+
+    def shutdown(self) -> None:
+        self.delegate.shutdown()
+
+    def force_flush(self, timeout_millis: int = 30000) -> bool:
+        return self.delegate.force_flush(timeout_millis)
+
+    def __keep(self, root: ReadableSpan, spans: List[ReadableSpan]) -> bool:
+        if any(span.status.status_code == StatusCode.ERROR for span in spans):
+            return True
+        if root.end_time - root.start_time >= self.slow_threshold_ns:
+            return True
+        return random.random() < self.sample_ratio
+
+    def __trim(self, traces: OrderedDict):
+        # Oldest first: a pending trace whose root never ends is dropped rather than kept forever.
+        while len(traces) > self.max_pending_traces:
+            traces.popitem(last=False)
+
+    @staticmethod
+    def __is_local_root(span: ReadableSpan) -> bool:
+        return span.parent is None or span.parent.is_remote
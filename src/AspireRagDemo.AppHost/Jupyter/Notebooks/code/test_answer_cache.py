@@ -0,0 +1,112 @@
+import pytest
+import answer_cache
+from answer_cache import AnswerCache, normalize_question, notify_collection_changed
+from config import AnswerCacheConfig
+
+SCOPE = "k=4"
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch) -> Clock:
+    clock = Clock()
+    monkeypatch.setattr(answer_cache.time, "monotonic", clock)
+    return clock
+
+
+def cache(collection_name: str = "docs", fingerprint=None, **config) -> AnswerCache:
+    return AnswerCache(AnswerCacheConfig(enabled=True, **config), collection_name, fingerprint)
+
+
+def test_normalize_question():
+    assert normalize_question("  What is   Aspire?! ") == "what is aspire"
+
+
+def test_exact_match_ignores_case_whitespace_and_punctuation():
+    answers = cache()
+    answers.put("What is Aspire?", [1.0, 0.0], SCOPE, "An application host.")
+    assert answers.get_exact("what is  aspire", SCOPE) == "An application host."
+    assert answers.get_exact("What is Aspire?", "k=8") is None
+    assert answers.exact_hits == 1
+
+
+def test_semantic_match_above_the_threshold_only():
+    answers = cache(similarity_threshold=0.9)
+    answers.put("What is Aspire?", [1.0, 0.0], SCOPE, "An application host.")
+    assert answers.get_semantic([0.99, 0.05], SCOPE) == "An application host."
+    assert answers.get_semantic([0.5, 0.5], SCOPE) is None
+    assert answers.get_semantic([0.99, 0.05], "k=8") is None
+    assert (answers.semantic_hits, answers.misses) == (1, 2)
+
+
+def test_entries_expire_after_the_ttl(clock):
+    answers = cache(ttl_seconds=60)
+    answers.put("What is Aspire?", [1.0, 0.0], SCOPE, "An application host.")
+    clock.now += 59
+    assert answers.get_exact("What is Aspire?", SCOPE) == "An application host."
+    clock.now += 2
+    assert answers.get_exact("What is Aspire?", SCOPE) is None
+    assert answers.get_semantic([1.0, 0.0], SCOPE) is None
+
+
+def test_least_recently_used_entry_is_evicted():
+    answers = cache(max_entries=2)
+    answers.put("first", [1.0, 0.0, 0.0], SCOPE, "1")
+    answers.put("second", [0.0, 1.0, 0.0], SCOPE, "2")
+    assert answers.get_exact("first", SCOPE) == "1"
+    answers.put("third", [0.0, 0.0, 1.0], SCOPE, "3")
+    assert answers.get_exact("second", SCOPE) is None
+    assert answers.get_semantic([0.0, 1.0, 0.0], SCOPE) is None
+    assert answers.get_exact("first", SCOPE) == "1"
+    assert answers.get_exact("third", SCOPE) == "3"
+    assert answers.stats()["entries"] == 2
+
+
+def test_collection_change_in_this_process_drops_everything():
+    answers = cache(collection_name="changed-docs")
+    answers.put("What is Aspire?", [1.0, 0.0], SCOPE, "An application host.")
+    notify_collection_changed("changed-docs")
+    assert answers.get_exact("What is Aspire?", SCOPE) is None
+    assert answers.stats()["entries"] == 0
+
+
+def test_fingerprint_is_computed_on_the_first_lookup():
+    calls = []
+
+    def fingerprint():
+        calls.append(1)
+        return None
+
+    answers = cache(fingerprint=fingerprint)
+    assert calls == []
+    assert answers.get_exact("What is Aspire?", SCOPE) is None
+    assert calls == [1]
+
+
+def test_fingerprint_change_drops_everything_after_the_validation_interval(clock):
+    fingerprint = {"value": None}
+    answers = cache(fingerprint=lambda: fingerprint["value"], validation_interval_seconds=30)
+    assert answers.get_exact("What is Aspire?", SCOPE) is None
+    answers.put("What is Aspire?", [1.0, 0.0], SCOPE, "An application host.")
+
+    # The collection is created by another process: checked only once the interval has passed.
+    fingerprint["value"] = (120, 1.0)
+    clock.now += 10
+    assert answers.get_exact("What is Aspire?", SCOPE) == "An application host."
+    clock.now += 30
+    assert answers.get_exact("What is Aspire?", SCOPE) is None
+
+    answers.put("What is Aspire?", [1.0, 0.0], SCOPE, "An application host.")
+    clock.now += 31
+    assert answers.get_exact("What is Aspire?", SCOPE) == "An application host."
+    # Same point count, new ingestion time: content replaced by the same number of chunks.
+    fingerprint["value"] = (120, 2.0)
+    clock.now += 31
+    assert answers.get_exact("What is Aspire?", SCOPE) is None
@@ -0,0 +1,122 @@
+import threading
+from typing import List
+import httpx
+import pytest
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+from qdrant_client import QdrantClient
+from qdrant_client.http import models as rest
+from batch_upsert import BatchUpsertStage, is_transient
+from config import IngestionConfig, LocalIndexConfig
+from local_index import LocalIndexClient
+from sparse_vectors import SparseEncoder
+
+COLLECTION = "docs"
+VECTOR_NAME = "page_content_vector"
+SPARSE_VECTOR_NAME = "page_content_sparse"
+
+
+class FlakyEmbeddings(Embeddings):
+    """Vectors derived from the chunk number; raises error on the first calls until failures runs out."""
+
+    def __init__(self, failures: int = 0, error: Exception = None):
+        self.failures = failures
+        self.error = error
+        self.batches: List[int] = []
+        self.lock = threading.Lock()
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        with self.lock:
+            if self.failures:
+                self.failures -= 1
+                raise self.error
+            self.batches.append(len(texts))
+        return [self.embed_query(text) for text in texts]
+
+    def embed_query(self, text: str) -> List[float]:
+        number = int(text.split()[-1])
+        return [1.0, float(number % 7) + 1.0, float(number % 5) + 1.0]
+
+
+def items(count: int):
+    return [(index + 1, Document(page_content=f"chunk {index}", metadata={"chunk_index": index}))
+            for index in range(count)]
+
+
+def stage(tmp_path, embeddings: Embeddings, **config) -> BatchUpsertStage:
+    client = LocalIndexClient(LocalIndexConfig(path=str(tmp_path)))
+    client.create_collection(COLLECTION, vectors_config={
+        VECTOR_NAME: rest.VectorParams(size=3, distance=rest.Distance.COSINE)})
+    options = {"batch_size": 8, "max_concurrency": 3, "upsert_workers": 2, "retry_backoff_seconds": 0.0, **config}
+    return BatchUpsertStage(client, embeddings, COLLECTION, VECTOR_NAME, IngestionConfig(**options))
+
+
+def test_every_chunk_is_upserted_with_its_payload(tmp_path):
+    embeddings = FlakyEmbeddings()
+    upsert = stage(tmp_path, embeddings)
+    stats = upsert.run(items(50))
+    assert (stats.chunks, stats.batches) == (50, 7)
+    assert sorted(embeddings.batches) == [2] + [8] * 6
+    assert upsert.qdrant.count(COLLECTION).count == 50
+    point = upsert.qdrant.retrieve(COLLECTION, [13])[0]
+    assert point.payload == {"page_content": "chunk 12", "metadata": {"chunk_index": 12}}
+
+
+def test_committed_batches_are_reported_in_input_order(tmp_path):
+    committed = []
+    stage(tmp_path, FlakyEmbeddings(), max_concurrency=4, upsert_workers=3).run(items(30), committed.append)
+    assert committed == [8, 8, 8, 6]
+
+
+def test_an_empty_input_upserts_nothing(tmp_path):
+    stats = stage(tmp_path, FlakyEmbeddings()).run([])
+    assert (stats.chunks, stats.batches, stats.chunks_per_second) == (0, 0, 0.0)
+
+
+def test_transient_failures_are_retried(tmp_path):
+    embeddings = FlakyEmbeddings(failures=2, error=ConnectionError("connection reset"))
+    stats = stage(tmp_path, embeddings, max_concurrency=1, max_retries=2).run(items(10))
+    assert stats.chunks == 10
+
+
+def test_retries_give_up_after_max_retries(tmp_path):
+    embeddings = FlakyEmbeddings(failures=3, error=TimeoutError("timed out"))
+    with pytest.raises(TimeoutError):
+        stage(tmp_path, embeddings, max_concurrency=1, max_retries=2).run(items(10))
+
+
+def test_permanent_failures_are_not_retried(tmp_path):
+    embeddings = FlakyEmbeddings(failures=1, error=ValueError("bad input"))
+    with pytest.raises(ValueError):
+        stage(tmp_path, embeddings, max_concurrency=1, max_retries=5).run(items(10))
+    assert embeddings.failures == 0 and embeddings.batches == []
+
+
+def test_sparse_vectors_are_stored_next_to_the_dense_vectors():
+    qdrant = QdrantClient(":memory:")
+    qdrant.create_collection(COLLECTION, vectors_config={
+        VECTOR_NAME: rest.VectorParams(size=3, distance=rest.Distance.COSINE)},
+        sparse_vectors_config={SPARSE_VECTOR_NAME: rest.SparseVectorParams()})
+    BatchUpsertStage(qdrant, FlakyEmbeddings(), COLLECTION, VECTOR_NAME, IngestionConfig(batch_size=2),
+                     SparseEncoder(), SPARSE_VECTOR_NAME).run(items(3))
+    point = qdrant.retrieve(COLLECTION, [1], with_vectors=True)[0]
+    assert set(point.vector) == {VECTOR_NAME, SPARSE_VECTOR_NAME}
+    assert point.vector[SPARSE_VECTOR_NAME].indices
+
+
+def status_error(status_code: int) -> httpx.HTTPStatusError:
+    request = httpx.Request("POST", "http://localhost/embed")
+    return httpx.HTTPStatusError("failed", request=request, response=httpx.Response(status_code, request=request))
+
+
+@pytest.mark.parametrize("error, transient", [
+    (ConnectionError(), True),
+    (TimeoutError(), True),
+    (httpx.ConnectError("refused"), True),
+    (status_error(429), True),
+    (status_error(503), True),
+    (status_error(400), False),
+    (ValueError("bad input"), False),
+])
+def test_is_transient(error, transient):
+    assert is_transient(error) == transient
@@ -0,0 +1,107 @@
+from langchain_core.documents import Document
+from chunking import ChunkingStrategyRegistry
+from config import ChunkingConfig, ContextConfig
+from context_builder import ContextBuilder
+
+
+def chunk(text: str, chunk_index: int, **metadata) -> Document:
+    return Document(page_content=text, metadata={"file_path": "docs/page.md", "chunk_index": chunk_index, **metadata})
+
+
+def build(*docs: Document, **config) -> str:
+    context, _ = ContextBuilder(ContextConfig(**config)).build([(doc, 1.0) for doc in docs])
+    return context
+
+
+def test_recorded_overlap_is_removed():
+    context = build(chunk("Start the AppHost with dotnet run", 0),
+                    chunk("dotnet run and open the dashboard.", 1, overlap_chars=10))
+    assert context == "Start the AppHost with dotnet run and open the dashboard."
+
+
+def test_chunks_without_overlap_are_not_merged_on_a_coincidental_match():
+    context = build(chunk("To start it, run dotnet run", 0, overlap_chars=0),
+                    chunk("nothing else is needed.", 1, overlap_chars=0))
+    assert context == "To start it, run dotnet run\n\nnothing else is needed."
+
+    context = build(chunk("ports:\n  - 8080", 0, overlap_chars=0),
+                    chunk("0.0.0.0 is the host", 1, overlap_chars=0))
+    assert context == "ports:\n  - 8080\n\n0.0.0.0 is the host"
+
+
+def test_chunks_stored_without_overlap_only_merge_on_a_long_match():
+    context = build(chunk("To start it, run dotnet run", 0), chunk("nothing else is needed.", 1))
+    assert context == "To start it, run dotnet run\n\nnothing else is needed."
+
+    context = build(chunk("ports:\n  - 8080", 0), chunk("0.0.0.0 is the host", 1))
+    assert context == "ports:\n  - 8080\n\n0.0.0.0 is the host"
+
+    shared = "the dashboard listens on port 18888"
+    context = build(chunk(f"After startup {shared}", 0), chunk(f"{shared} by default.", 1))
+    assert context == f"After startup {shared} by default."
+
+
+def test_merging_all_chunks_of_a_file_restores_its_text():
+    lines = [f"line {index}: apphost, qdrant" for index in range(80)]
+    text = "\n".join(lines)
+    file = {"path": "notes.txt", "content": text, "metadata": {"file_type": ".txt", "file_path": "notes.txt"}}
+    chunks = ChunkingStrategyRegistry(ChunkingConfig()).chunk_file(file, {})
+    assert len(chunks) > 2 and any(chunk.metadata["overlap_chars"] for chunk in chunks)
+
+    context, stats = ContextBuilder(ContextConfig(max_tokens=0)).build([(chunk, 1.0) for chunk in chunks])
+    assert stats.merged == len(chunks) - 1
+    assert context.replace("\n\n", "\n") == text
+
+
+def test_near_duplicates_are_dropped_keeping_the_best_score():
+    text = "Qdrant stores the chunk vectors and their payload in the collection configured for the notebook"
+    builder = ContextBuilder(ContextConfig())
+    context, stats = builder.build([
+        (Document(page_content=text + ".", metadata={"file_path": "a.md"}), 0.5),
+        (Document(page_content=text, metadata={"file_path": "b.md"}), 0.9),
+        (Document(page_content="Ollama serves the chat model.", metadata={"file_path": "c.md"}), 0.7),
+    ])
+    assert context == f"{text}\n\nOllama serves the chat model."
+    assert (stats.retrieved, stats.duplicates, stats.packed) == (3, 1, 2)
+
+
+def test_adjacent_chunks_merge_into_one_block_ordered_by_position():
+    builder = ContextBuilder(ContextConfig())
+    context, stats = builder.build([
+        (chunk("second part", 1, overlap_chars=0), 0.9),
+        (chunk("first part", 0, overlap_chars=0), 0.2),
+        (chunk("fourth part", 3, overlap_chars=0), 0.5),
+    ])
+    assert context == "first part\n\nsecond part\n\nfourth part"
+    assert (stats.merged, stats.packed) == (1, 2)
+
+
+def test_merge_adjacent_can_be_disabled():
+    context = build(chunk("first part", 0), chunk("second part", 1), merge_adjacent=False)
+    assert context == "first part\n\nsecond part"
+
+
+def test_blocks_are_packed_best_first_until_the_token_budget_is_used():
+    builder = ContextBuilder(ContextConfig(max_tokens=10, chars_per_token=4))
+    context, stats = builder.build([
+        (Document(page_content="a" * 24, metadata={"file_path": "a.md"}), 0.9),
+        (Document(page_content="b" * 24, metadata={"file_path": "b.md"}), 0.8),
+        (Document(page_content="c" * 12, metadata={"file_path": "c.md"}), 0.1),
+    ])
+    assert context == "a" * 24
+    assert (stats.packed, stats.tokens) == (1, 6)
+
+
+def test_the_best_block_is_truncated_rather_than_sending_an_empty_context():
+    builder = ContextBuilder(ContextConfig(max_tokens=5, chars_per_token=4))
+    context, stats = builder.build([(Document(page_content="x" * 100, metadata={}), 1.0)])
+    assert context == "x" * 20
+    assert (stats.packed, stats.tokens) == (1, 5)
+
+
+def test_no_budget_keeps_everything():
+    builder = ContextBuilder(ContextConfig(max_tokens=0))
+    docs = [(Document(page_content=f"chunk {index} " * 50, metadata={"file_path": f"{index}.md"}), 1.0)
+            for index in range(5)]
+    _, stats = builder.build(docs)
+    assert stats.packed == 5
@@ -0,0 +1,110 @@
+import os
+import zlib
+from typing import List
+import pytest
+from langchain_core.embeddings import Embeddings
+from client_registry import register_client
+from config import IngestionConfig, LocalIndexConfig, ModelConfig, VectorDBConfig
+from gitingest_reader import FILE_DELIMITER
+from ingestion_checkpoint import COMPLETED, CheckpointProgress, IngestionCheckpoint
+from ingestion_jobs import IngestionJobs
+
+REPO_URL = "https://github.com/example/checkpoint-docs"
+
+
+class CountingEmbeddings(Embeddings):
+    """Deterministic vectors; fails every call after fail_after calls until it is healed."""
+
+    def __init__(self, fail_after: int = None):
+        self.fail_after = fail_after
+        self.texts: List[str] = []
+        self.calls = 0
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        self.calls += 1
+        if self.fail_after is not None and self.calls > self.fail_after:
+            raise ValueError("embedding model crashed")
+        self.texts.extend(texts)
+        return [self.embed_query(text) for text in texts]
+
+    def embed_query(self, text: str) -> List[float]:
+        seed = zlib.crc32(text.encode("utf-8"))
+        return [((seed >> shift) & 0xFF) / 255.0 + 0.01 for shift in range(0, 32, 4)]
+
+
+def checkpoint(tmp_path, **fields) -> IngestionCheckpoint:
+    return IngestionCheckpoint(job_id="job", source="dump.txt", repo_url=REPO_URL, collection_name="docs",
+                               path=IngestionCheckpoint.file_path(str(tmp_path), "job"), **fields)
+
+
+def test_save_and_load_round_trip(tmp_path):
+    saved = checkpoint(tmp_path, alias="live", committed_files=3, committed_batches=2, committed_chunks=40)
+    saved.save()
+    assert os.listdir(tmp_path) == ["job.json"]
+    assert IngestionCheckpoint.load(str(tmp_path), "job") == saved
+
+
+def test_a_resumed_job_must_read_the_same_source(tmp_path):
+    job = checkpoint(tmp_path)
+    job.verify_source("first")
+    assert IngestionCheckpoint.load(str(tmp_path), "job").source_hash == "first"
+    job.verify_source("first")
+    with pytest.raises(ValueError):
+        job.verify_source("second")
+
+
+def test_files_are_committed_once_all_their_chunks_are(tmp_path):
+    progress = CheckpointProgress(checkpoint(tmp_path))
+    for file_index, chunks in enumerate([3, 2, 4]):
+        for _ in range(chunks):
+            progress.chunk_yielded()
+        progress.file_done(file_index)
+
+    progress.batch_committed(4)
+    assert progress.checkpoint.committed_files == 1
+    progress.batch_committed(1)
+    assert progress.checkpoint.committed_files == 2
+    progress.batch_committed(4)
+    assert progress.checkpoint.committed_files == 3
+    saved = IngestionCheckpoint.load(str(tmp_path), "job")
+    assert (saved.committed_files, saved.committed_batches, saved.committed_chunks) == (3, 3, 9)
+
+
+def test_only_committed_files_may_be_skipped_after_a_resume(tmp_path):
+    progress = CheckpointProgress(checkpoint(tmp_path, committed_files=2, committed_batches=1))
+    assert progress.is_committed(1) and not progress.is_committed(2)
+    assert progress.may_skip_file(1) and not progress.may_skip_file(2)
+    assert CheckpointProgress(checkpoint(tmp_path)).may_skip_file(5)
+
+
+def test_resume_continues_after_the_last_committed_batch(tmp_path):
+    dump = tmp_path / "dump.txt"
+    dump.write_text("".join(
+        f"{FILE_DELIMITER}\nFile: docs/page-{index}.md\n{FILE_DELIMITER}\n"
+        + "\n\n".join(f"## Section {section}\n\nPage {index} section {section} text." for section in range(4))
+        + "\n"
+        for index in range(12)))
+    vector_config = VectorDBConfig(url="", api_key="", collection_name="docs", backend="local",
+                                   local_index=LocalIndexConfig(path=str(tmp_path / "index")))
+    embedding_config = ModelConfig(model_name="checkpoint-test-embeddings")
+    ingestion_config = IngestionConfig(batch_size=8, max_concurrency=1, upsert_workers=1, max_retries=0,
+                                       checkpoint_dir=str(tmp_path / "checkpoints"))
+    embeddings = CountingEmbeddings(fail_after=2)
+    register_client("embeddings", embedding_config, embeddings)
+    jobs = IngestionJobs(vector_config, embedding_config, ingestion_config)
+
+    with pytest.raises(ValueError):
+        jobs.start(str(dump), REPO_URL, job_id="interrupted")
+    interrupted = jobs.status("interrupted")
+    assert interrupted.status != COMPLETED
+    assert interrupted.committed_batches >= 1 and 0 < interrupted.committed_files < 12
+    embedded_before = list(embeddings.texts)
+
+    embeddings.fail_after = None
+    jobs.resume("interrupted")
+    assert jobs.status("interrupted").status == COMPLETED
+    assert jobs.qdrant.count("docs").count == 48
+    # Chunks of the committed files are not embedded again.
+    resumed_texts = embeddings.texts[len(embedded_before):]
+    committed = {f"Page {index} " for index in range(interrupted.committed_files)}
+    assert not any(prefix in text for text in resumed_texts for prefix in committed)
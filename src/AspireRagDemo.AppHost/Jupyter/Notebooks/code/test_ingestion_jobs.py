@@ -0,0 +1,93 @@
+import zlib
+from typing import List
+import pytest
+from langchain_core.embeddings import Embeddings
+from qdrant_client.http import models as rest
+from client_registry import register_client
+from config import IngestionConfig, LocalIndexConfig, ModelConfig, VectorDBConfig
+from gitingest_reader import FILE_DELIMITER
+from ingestion_checkpoint import COMPLETED
+from ingestion_jobs import IngestionJobs
+
+REPO_URL = "https://github.com/example/shadow-docs"
+
+
+class HashEmbeddings(Embeddings):
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return [self.embed_query(text) for text in texts]
+
+    def embed_query(self, text: str) -> List[float]:
+        seed = zlib.crc32(text.encode("utf-8"))
+        return [((seed >> shift) & 0xFF) / 255.0 + 0.01 for shift in range(0, 32, 4)]
+
+
+def write_dump(path, pages: int) -> str:
+    path.write_text("".join(
+        f"{FILE_DELIMITER}\nFile: docs/page-{index}.md\n{FILE_DELIMITER}\n"
+        f"## Page {index}\n\nPage {index} describes how the AppHost starts.\n"
+        for index in range(pages)))
+    return str(path)
+
+
+@pytest.fixture
+def jobs(tmp_path) -> IngestionJobs:
+    vector_config = VectorDBConfig(url="", api_key="", collection_name="docs", backend="local",
+                                   local_index=LocalIndexConfig(path=str(tmp_path / "index")))
+    embedding_config = ModelConfig(model_name="shadow-test-embeddings")
+    register_client("embeddings", embedding_config, HashEmbeddings())
+    return IngestionJobs(vector_config, embedding_config,
+                         IngestionConfig(max_retries=0, checkpoint_dir=str(tmp_path / "checkpoints")))
+
+
+def aliases(jobs: IngestionJobs) -> dict:
+    return {description.alias_name: description.collection_name for description in jobs.qdrant.get_aliases().aliases}
+
+
+def collections(jobs: IngestionJobs) -> set:
+    return {description.name for description in jobs.qdrant.get_collections().collections}
+
+
+def test_shadow_jobs_swap_the_alias_and_drop_the_replaced_collection(tmp_path, jobs):
+    jobs.start(write_dump(tmp_path / "first.txt", 3), REPO_URL, shadow=True, job_id="first")
+    assert aliases(jobs)["docs"] == "docs-first"
+    assert jobs.qdrant.count("docs").count == 3
+
+    jobs.start(write_dump(tmp_path / "second.txt", 5), REPO_URL, shadow=True, job_id="second")
+    assert jobs.status("second").status == COMPLETED
+    assert aliases(jobs)["docs"] == "docs-second"
+    assert jobs.qdrant.count("docs").count == 5
+    assert "docs-first" not in collections(jobs)
+
+
+def test_shadow_jobs_swap_the_metadata_alias_with_compact_payloads(tmp_path, jobs):
+    jobs.ingestion_config.compact_payload = True
+    jobs.start(write_dump(tmp_path / "dump.txt", 3), REPO_URL, shadow=True, job_id="compact")
+    assert aliases(jobs) == {"docs": "docs-compact", "docs-metadata": "docs-compact-metadata"}
+
+
+@pytest.mark.parametrize("existing", ["docs", "docs-metadata"])
+def test_a_plain_collection_of_the_alias_name_is_never_replaced(tmp_path, jobs, existing):
+    jobs.qdrant.create_collection(existing, vectors_config={
+        "page_content_vector": rest.VectorParams(size=8, distance=rest.Distance.COSINE)})
+    with pytest.raises(ValueError, match="not an alias"):
+        jobs.start(write_dump(tmp_path / "dump.txt", 3), REPO_URL, shadow=True, job_id="refused")
+    assert collections(jobs) == {existing}
+    assert aliases(jobs) == {}
+
+
+def test_a_plain_collection_created_during_the_job_stops_the_swap(tmp_path, jobs, monkeypatch):
+    original = IngestionJobs._IngestionJobs__require_aliases
+    checks = []
+
+    def require_aliases(self, alias):
+        checks.append(alias)
+        if len(checks) == 2:
+            self.qdrant.create_collection(alias, vectors_config={})
+        original(self, alias)
+
+    monkeypatch.setattr(IngestionJobs, "_IngestionJobs__require_aliases", require_aliases)
+    with pytest.raises(ValueError):
+        jobs.start(write_dump(tmp_path / "dump.txt", 3), REPO_URL, shadow=True, job_id="raced")
+    assert jobs.status("raced").status != COMPLETED
+    assert aliases(jobs) == {}
+    assert jobs.qdrant.count("docs-raced").count == 3
@@ -0,0 +1,153 @@
+import json
+import os
+import uuid
+from typing import List
+import numpy as np
+import pytest
+from qdrant_client.http import models as rest
+from config import LocalIndexConfig
+from local_index import STATE_FILE, LocalIndexClient
+from metadata_filters import build_metadata_filter
+
+COLLECTION = "docs"
+VECTOR_NAME = "page_content_vector"
+FILE_TYPES = [".md", ".yml", ".txt"]
+POINTS = 3000
+DIMENSIONS = 32
+K = 10
+
+
+@pytest.fixture(scope="module")
+def data():
+    """Points around random centres, with queries near stored points, and point ids in row order."""
+    rng = np.random.default_rng(42)
+    centres = rng.normal(size=(30, DIMENSIONS))
+    vectors = (centres[rng.integers(len(centres), size=POINTS)]
+               + 0.5 * rng.normal(size=(POINTS, DIMENSIONS))).astype(np.float32)
+    queries = (vectors[rng.integers(POINTS, size=50)] + 0.2 * rng.normal(size=(50, DIMENSIONS))).astype(np.float32)
+    ids = [str(uuid.UUID(int=index + 1)) for index in range(POINTS)]
+    return vectors, queries, ids
+
+
+def exact_top(vectors: np.ndarray, query: np.ndarray, ids: List[str], rows: np.ndarray = None) -> List[str]:
+    rows = np.arange(len(vectors)) if rows is None else rows
+    normalized = vectors[rows] / np.linalg.norm(vectors[rows], axis=1, keepdims=True)
+    scores = normalized @ (query / np.linalg.norm(query))
+    return [ids[rows[index]] for index in np.argsort(-scores)[:K]]
+
+
+def create_client(tmp_path, data, **options) -> LocalIndexClient:
+    vectors, _, ids = data
+    client = LocalIndexClient(LocalIndexConfig(path=str(tmp_path), **options))
+    client.create_collection(COLLECTION, vectors_config={
+        VECTOR_NAME: rest.VectorParams(size=DIMENSIONS, distance=rest.Distance.COSINE)})
+    client.create_payload_index(COLLECTION, "metadata.file_type", rest.PayloadSchemaType.KEYWORD)
+    for start in range(0, POINTS, 500):
+        client.upsert(COLLECTION, points=[
+            rest.PointStruct(id=ids[row], vector={VECTOR_NAME: vectors[row].tolist()},
+                             payload={"page_content": f"chunk {row}",
+                                      "metadata": {"file_type": FILE_TYPES[row % len(FILE_TYPES)]}})
+            for row in range(start, min(start + 500, POINTS))])
+    return client
+
+
+def search(client: LocalIndexClient, query: np.ndarray, query_filter=None) -> List[str]:
+    response = client.query_points(COLLECTION, query=query.tolist(), using=VECTOR_NAME, limit=K,
+                                   query_filter=query_filter)
+    return [str(point.id) for point in response.points]
+
+
+def recall(client: LocalIndexClient, data) -> float:
+    vectors, queries, ids = data
+    return float(np.mean([len(set(search(client, query)) & set(exact_top(vectors, query, ids))) / K
+                          for query in queries]))
+
+
+def test_flat_search_is_exact(tmp_path, data):
+    vectors, queries, ids = data
+    client = create_client(tmp_path, data)
+    for query in queries[:10]:
+        response = client.query_points(COLLECTION, query=query.tolist(), using=VECTOR_NAME, limit=K)
+        assert [str(point.id) for point in response.points] == exact_top(vectors, query, ids)
+        best = vectors[ids.index(str(response.points[0].id))]
+        expected = best @ query / (np.linalg.norm(best) * np.linalg.norm(query))
+        assert response.points[0].score == pytest.approx(expected, abs=1e-5)
+
+
+def test_int8_search_keeps_the_recall(tmp_path, data):
+    client = create_client(tmp_path, data, quantization="int8")
+    assert recall(client, data) >= 0.95
+
+
+def test_ivf_search_keeps_the_recall(tmp_path, data):
+    client = create_client(tmp_path, data, ivf_lists=16, ivf_probes=4)
+    with open(os.path.join(tmp_path, COLLECTION, STATE_FILE)) as file:
+        assert json.load(file)["ivf_lists"] == 16
+    assert recall(client, data) >= 0.9
+
+
+def test_ivf_search_over_all_partitions_is_exact(tmp_path, data):
+    client = create_client(tmp_path, data, ivf_lists=16, ivf_probes=16)
+    assert recall(client, data) == 1.0
+
+
+def test_ivf_int8_search_keeps_the_recall(tmp_path, data):
+    client = create_client(tmp_path, data, ivf_lists=16, ivf_probes=4, quantization="int8")
+    assert recall(client, data) >= 0.85
+
+
+@pytest.mark.parametrize("options", [{}, {"ivf_lists": 16, "ivf_probes": 2}])
+def test_filtered_search_only_returns_matching_points(tmp_path, data, options):
+    vectors, queries, ids = data
+    client = create_client(tmp_path, data, **options)
+    markdown_rows = np.arange(0, POINTS, len(FILE_TYPES))
+    query_filter = build_metadata_filter({"file_type": ".md"})
+    for query in queries[:10]:
+        found = search(client, query, query_filter)
+        assert len(found) == K
+        assert set(found) <= {ids[row] for row in markdown_rows}
+    if not options:
+        assert search(client, queries[0], query_filter) == exact_top(vectors, queries[0], ids, markdown_rows)
+
+
+def test_batch_queries_match_single_queries(tmp_path, data):
+    _, queries, _ = data
+    client = create_client(tmp_path, data)
+    responses = client.query_batch_points(COLLECTION, [
+        rest.QueryRequest(query=query.tolist(), using=VECTOR_NAME, limit=K) for query in queries[:5]])
+    assert [[str(point.id) for point in response.points] for response in responses] == [
+        search(client, query) for query in queries[:5]]
+
+
+def test_deleted_and_overwritten_points(tmp_path, data):
+    vectors, queries, ids = data
+    client = create_client(tmp_path, data)
+    nearest = search(client, queries[0])
+    client.delete(COLLECTION, points_selector=rest.PointIdsList(points=nearest[:3]))
+    assert not set(search(client, queries[0])) & set(nearest[:3])
+    assert client.count(COLLECTION).count == POINTS - 3
+
+    # Overwriting a point moves it: the query's own vector is now stored under another id.
+    moved = ids[-1]
+    client.upsert(COLLECTION, points=[rest.PointStruct(id=moved, vector={VECTOR_NAME: queries[1].tolist()},
+                                                       payload={"metadata": {"file_type": ".md"}})])
+    assert search(client, queries[1])[0] == moved
+    assert client.count(COLLECTION).count == POINTS - 3
+
+
+def test_a_reopened_index_returns_the_same_results(tmp_path, data):
+    _, queries, _ = data
+    client = create_client(tmp_path, data, ivf_lists=16, ivf_probes=4)
+    before = [search(client, query) for query in queries[:10]]
+    client.close()
+    reopened = LocalIndexClient(LocalIndexConfig(path=str(tmp_path), ivf_lists=16, ivf_probes=4))
+    assert [search(reopened, query) for query in queries[:10]] == before
+    assert reopened.count(COLLECTION).count == POINTS
+
+
+def test_hybrid_queries_are_rejected(tmp_path, data):
+    _, queries, _ = data
+    client = create_client(tmp_path, data)
+    with pytest.raises(ValueError):
+        client.query_points(COLLECTION, prefetch=[rest.Prefetch(query=queries[0].tolist(), using=VECTOR_NAME)],
+                            query=rest.FusionQuery(fusion=rest.Fusion.RRF), limit=K)
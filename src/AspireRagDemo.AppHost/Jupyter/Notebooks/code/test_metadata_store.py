@@ -0,0 +1,124 @@
+import zlib
+from typing import List
+import pytest
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+from qdrant_client import QdrantClient
+from client_registry import register_client
+from config import IngestionConfig, LocalIndexConfig, ModelConfig, VectorDBConfig
+from gitingest_reader import FILE_DELIMITER
+from ingestion_pipeline import IngestionPipeline
+from metadata_store import (FILE_ID_KEY, REPOSITORY_ID_KEY, MetadataStore, compact_metadata, file_record_id,
+                            repository_record_id)
+
+REPO_URL = "https://github.com/example/compact-docs"
+
+
+class HashEmbeddings(Embeddings):
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return [self.embed_query(text) for text in texts]
+
+    def embed_query(self, text: str) -> List[float]:
+        seed = zlib.crc32(text.encode("utf-8"))
+        return [((seed >> shift) & 0xFF) / 255.0 + 0.01 for shift in range(0, 32, 4)]
+
+
+def file_metadata(file_path: str) -> dict:
+    return {"file_path": file_path, "file_type": ".md", "directory": "docs", "file_name": file_path.split("/")[-1],
+            "size_bytes": 120, "file_hash": f"hash-{file_path}"}
+
+
+def test_compact_metadata_keeps_the_filter_fields_and_record_ids():
+    metadata = {**file_metadata("docs/setup.md"), "repository_url": REPO_URL, "repository_total_files": 12,
+                "Header 1": "Setup", "chunk_index": 2, "chunk_hash": "abc", "overlap_chars": 14}
+    assert compact_metadata(metadata, REPO_URL) == {
+        "repository_url": REPO_URL, "directory": "docs", "file_path": "docs/setup.md", "file_type": ".md",
+        "Header 1": "Setup", REPOSITORY_ID_KEY: repository_record_id(REPO_URL),
+        FILE_ID_KEY: file_record_id(REPO_URL, "docs/setup.md"),
+        "chunk_index": 2, "chunk_hash": "abc", "file_hash": "hash-docs/setup.md", "overlap_chars": 14}
+
+
+def test_record_ids_are_deterministic_per_repository_and_file():
+    assert file_record_id(REPO_URL, "a.md") == file_record_id(REPO_URL, "a.md")
+    assert file_record_id(REPO_URL, "a.md") != file_record_id(REPO_URL + "-fork", "a.md")
+    assert repository_record_id(REPO_URL) != file_record_id(REPO_URL, "")
+
+
+@pytest.fixture
+def store() -> MetadataStore:
+    store = MetadataStore(QdrantClient(":memory:"), "docs")
+    store.ensure_collection()
+    return store
+
+
+def test_attach_restores_the_full_metadata(store):
+    store.put_repository(REPO_URL, {"repository_url": REPO_URL, "repository_total_files": 12})
+    store.put_files(REPO_URL, [file_metadata("docs/setup.md")])
+    compact = compact_metadata({**file_metadata("docs/setup.md"), "repository_url": REPO_URL, "chunk_index": 0},
+                               REPO_URL)
+    full = Document(page_content="stored in full", metadata={"file_path": "docs/other.md", "size_bytes": 1})
+
+    attached = store.attach([Document(page_content="compact", metadata=compact), full])
+    assert attached[0].metadata == {**file_metadata("docs/setup.md"), "repository_url": REPO_URL,
+                                    "repository_total_files": 12, **compact}
+    assert attached[1] is full
+
+
+def test_attach_without_records_returns_the_documents(store):
+    store.drop()
+    documents = [Document(page_content="compact", metadata={FILE_ID_KEY: file_record_id(REPO_URL, "a.md")})]
+    assert store.attach(documents) is documents
+
+
+def test_deleted_file_records_are_no_longer_attached(store):
+    store.put_files(REPO_URL, [file_metadata("docs/a.md"), file_metadata("docs/b.md")])
+    store.delete_files(REPO_URL, ["docs/a.md"])
+    documents = [Document(page_content=path, metadata={FILE_ID_KEY: file_record_id(REPO_URL, path)})
+                 for path in ("docs/a.md", "docs/b.md")]
+    attached = store.attach(documents)
+    assert "size_bytes" not in attached[0].metadata
+    assert attached[1].metadata["size_bytes"] == 120
+
+
+def test_changed_at_is_recorded_by_mark_changed():
+    store = MetadataStore(QdrantClient(":memory:"), "docs")
+    assert store.changed_at() == 0.0
+    store.mark_changed()
+    assert store.changed_at() > 0.0
+
+
+def write_dump(path, pages: range) -> str:
+    path.write_text("".join(
+        f"{FILE_DELIMITER}\nFile: docs/page-{index}.md\n{FILE_DELIMITER}\n"
+        f"## Page {index}\n\nPage {index} describes how the AppHost starts.\n"
+        for index in pages))
+    return str(path)
+
+
+def test_compact_ingestion_stores_file_records_once(tmp_path):
+    vector_config = VectorDBConfig(url="", api_key="", collection_name="compact", backend="local",
+                                   local_index=LocalIndexConfig(path=str(tmp_path / "index")))
+    embedding_config = ModelConfig(model_name="compact-test-embeddings")
+    register_client("embeddings", embedding_config, HashEmbeddings())
+    pipeline = IngestionPipeline(vector_config, embedding_config,
+                                 IngestionConfig(compact_payload=True, max_retries=0))
+
+    pipeline.process_single_file(write_dump(tmp_path / "dump.txt", range(4)), REPO_URL)
+    points, _ = pipeline.qdrant.scroll("compact", limit=100, with_payload=True)
+    assert len(points) == 4
+    metadata = points[0].payload["metadata"]
+    assert "size_bytes" not in metadata and "repository_total_files" not in metadata
+    assert metadata[FILE_ID_KEY] == file_record_id(REPO_URL, metadata["file_path"])
+
+    documents = [Document(page_content=point.payload["page_content"], metadata=point.payload["metadata"])
+                 for point in points]
+    for document in pipeline.metadata_store.attach(documents):
+        assert document.metadata["repository_total_files"] == 4
+        assert document.metadata["size_bytes"] > 0
+
+    # A file removed from the repository loses its record with its chunks.
+    report = pipeline.process_single_file(write_dump(tmp_path / "dump.txt", range(3)), REPO_URL, incremental=True)
+    assert (report.updated, report.deleted) == (0, 1)
+    removed = file_record_id(REPO_URL, "docs/page-3.md")
+    assert pipeline.qdrant.retrieve(pipeline.metadata_store.collection_name, ids=[removed]) == []
+    assert pipeline.metadata_store.changed_at() > 0.0
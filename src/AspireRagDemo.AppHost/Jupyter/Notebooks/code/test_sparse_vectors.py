@@ -0,0 +1,56 @@
+import zlib
+from qdrant_client.http import models as rest
+from sparse_vectors import SparseEncoder, tokenize
+
+
+def term_index(term: str) -> int:
+    return zlib.crc32(term.encode("utf-8")) & 0x7FFFFFFF
+
+
+def weights(vector: rest.SparseVector) -> dict:
+    return dict(zip(vector.indices, vector.values))
+
+
+def test_words_are_lower_cased():
+    assert tokenize("Start the AppHost") == ["start", "the", "apphost"]
+
+
+def test_compound_terms_are_kept_whole_and_indexed_by_their_parts():
+    assert tokenize("Aspire.Hosting.Qdrant") == ["aspire.hosting.qdrant", "aspire", "hosting", "qdrant"]
+    assert tokenize("ModelConfiguration__ChatModel") == [
+        "modelconfiguration__chatmodel", "modelconfiguration", "chatmodel"]
+    assert tokenize("./docs/setup.md") == ["docs/setup.md", "docs", "setup", "md"]
+
+
+def test_cli_flags_keep_their_dashes():
+    assert tokenize("dotnet run --port 8080 -v") == ["dotnet", "run", "--port", "port", "8080", "-v", "v"]
+
+
+def test_separators_and_punctuation_are_not_tokens():
+    assert tokenize("--- a, b; (c) - d.") == ["a", "b", "c", "d"]
+    assert tokenize("version 1-2") == ["version", "1-2", "1", "2"]
+
+
+def test_term_ids_are_stable_hashes():
+    vector = SparseEncoder().encode_query("qdrant port")
+    assert weights(vector) == {term_index("qdrant"): 1.0, term_index("port"): 1.0}
+
+
+def test_document_weights_saturate_with_the_term_frequency():
+    encoder = SparseEncoder()
+    once = weights(encoder.encode_document("qdrant"))[term_index("qdrant")]
+    many = weights(encoder.encode_document(" ".join(["qdrant"] * 50)))[term_index("qdrant")]
+    assert once < many < encoder.k1 + 1
+
+
+def test_longer_documents_weigh_a_term_less():
+    encoder = SparseEncoder()
+    short = weights(encoder.encode_document("qdrant stores vectors"))[term_index("qdrant")]
+    long = weights(encoder.encode_document("qdrant stores vectors " + "filler " * 200))[term_index("qdrant")]
+    assert long < short
+
+
+def test_query_matches_a_flag_in_a_document_by_its_name():
+    document = weights(SparseEncoder().encode_document("Pass --port to change it"))
+    query = weights(SparseEncoder().encode_query("which port"))
+    assert set(document) & set(query) == {term_index("port")}
@@ -1,22 +1,27 @@
 import os
 import logging
-from opentelemetry import trace
+from opentelemetry import metrics, trace
+from opentelemetry.exporter.otlp.proto.grpc.metric_exporter import OTLPMetricExporter
+from opentelemetry.sdk.metrics import MeterProvider
+from opentelemetry.sdk.metrics.export import PeriodicExportingMetricReader
 from opentelemetry.exporter.otlp.proto.grpc.trace_exporter import OTLPSpanExporter
 from opentelemetry.sdk.resources import SERVICE_NAME, Resource
-from opentelemetry.sdk.trace import TracerProvider
-from opentelemetry.sdk.trace.export import BatchSpanProcessor
-from opentelemetry.instrumentation.langchain import LangchainInstrumentor
+from opentelemetry.sdk.trace import SpanProcessor, TracerProvider
+from opentelemetry.sdk.trace.export import BatchSpanProcessor, SpanExporter
+from opentelemetry.sdk.trace.sampling import ALWAYS_OFF, ALWAYS_ON, ParentBased, Sampler, TraceIdRatioBased
 from opentelemetry._logs import set_logger_provider
 from opentelemetry.exporter.otlp.proto.grpc._log_exporter import (
     OTLPLogExporter
 )
 from opentelemetry.sdk._logs import LoggerProvider, LoggingHandler
 from opentelemetry.sdk._logs.export import BatchLogRecordProcessor
- 
-from opentelemetry.instrumentation.qdrant import QdrantInstrumentor
+from config import TracingConfig
+from tail_sampling import TailSamplingSpanProcessor
+from tracing_options import set_fine_grained_spans
 
 _telemetryInitialised = False
 _loggingInitialised = False
+_metricsInitialised = False
 
 resource = Resource(attributes={
     SERVICE_NAME:  os.getenv('OTEL_SERVICE_NAME', 'jupyter-notebook')
@@ -25,21 +30,61 @@ resource = Resource(attributes={
 def get_otlp_exporter():   
     return OTLPSpanExporter(endpoint=os.getenv("OTEL_EXPORTER_OTLP_ENDPOINT"))
 
-def get_tracer():
+def create_sampler(config: TracingConfig) -> Sampler:
+    """Head sampler of the tracing mode. Tail sampling records everything and decides in the span processor."""
+    if config.mode in ("always", "tail"):
+        return ALWAYS_ON
+    if config.mode == "ratio":
+        # Parent based, so a request traced by the caller (e.g. the UI) is traced here as well.
+        return ParentBased(TraceIdRatioBased(config.sample_ratio))
+    if config.mode == "off":
+        return ALWAYS_OFF
+    raise ValueError(f"Unknown tracing mode: {config.mode}. Use always, ratio, tail or off.")
+
+def create_span_processor(config: TracingConfig, exporter: SpanExporter) -> SpanProcessor:
+    processor = BatchSpanProcessor(exporter)
+    if config.mode == "tail":
+        return TailSamplingSpanProcessor(processor, config.slow_threshold_ms, config.sample_ratio,
+                                         config.tail_max_pending_traces)
+    return processor
+
+def create_tracer_provider(config: TracingConfig, exporter: SpanExporter) -> TracerProvider:
+    provider = TracerProvider(resource=resource, sampler=create_sampler(config))
+    provider.add_span_processor(create_span_processor(config, exporter))
+    return provider
+
+def get_tracer(config: TracingConfig = None):
+    """Set up tracing once; config selects the sampling mode and whether fine-grained spans are recorded."""
     global _telemetryInitialised
     if _telemetryInitialised == True:
         return trace.get_tracer(__name__)
     
     _telemetryInitialised = True
-    span_exporter = get_otlp_exporter()
-    processor = BatchSpanProcessor(span_exporter)
-    provider = TracerProvider(resource=resource)
-    provider.add_span_processor(processor)
-    trace.set_tracer_provider(provider)
-    LangchainInstrumentor().instrument()
-    QdrantInstrumentor().instrument()
+    config = config or TracingConfig()
+    set_fine_grained_spans(config.fine_grained_spans)
+    trace.set_tracer_provider(create_tracer_provider(config, get_otlp_exporter()))
+    get_meter()
+    if config.fine_grained_spans and config.mode != "off":
+        # The instrumentors pull in LangChain and the Qdrant client, so they are only imported once tracing is set up.
+        from opentelemetry.instrumentation.langchain import LangchainInstrumentor
+        from opentelemetry.instrumentation.qdrant import QdrantInstrumentor
+        LangchainInstrumentor().instrument()
+        QdrantInstrumentor().instrument()
     return trace.get_tracer(__name__)
 
+def get_meter():
+    """Meter provider exporting to the same OTLP endpoint as the traces; set up together with the tracer."""
+    global _metricsInitialised
+    if _metricsInitialised == True:
+        return metrics.get_meter(__name__)
+
+    _metricsInitialised = True
+    reader = PeriodicExportingMetricReader(
+        OTLPMetricExporter(endpoint=os.getenv("OTEL_EXPORTER_OTLP_ENDPOINT")),
+        export_interval_millis=int(os.getenv("OTEL_METRIC_EXPORT_INTERVAL", "10000")))
+    metrics.set_meter_provider(MeterProvider(resource=resource, metric_readers=[reader]))
+    return metrics.get_meter(__name__)
+
 def get_logger():
     global _loggingInitialised
     if _loggingInitialised == True:
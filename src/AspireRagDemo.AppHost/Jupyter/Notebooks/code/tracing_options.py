@@ -0,0 +1,26 @@
+"""Switch for the fine-grained spans in hot paths (per batch, rerank, context formatting).
+
+trace_setup sets it from TracingConfig.fine_grained_spans. When it is off those spans are not created at all,
+so the code that sets attributes on them gets the non-recording INVALID_SPAN instead.
+"""
+from contextlib import nullcontext
+from typing import ContextManager
+from opentelemetry import trace
+
+_fine_grained_spans = True
+
+
+def set_fine_grained_spans(enabled: bool):
+    global _fine_grained_spans
+    _fine_grained_spans = enabled
+
+
+def fine_grained_spans_enabled() -> bool:
+    return _fine_grained_spans
+
+
+def fine_grained_span(tracer: trace.Tracer, name: str) -> ContextManager[trace.Span]:
+    """tracer.start_as_current_span(name), or a no-op span when fine-grained spans are off."""
+    if _fine_grained_spans:
+        return tracer.start_as_current_span(name)
+    return nullcontext(trace.INVALID_SPAN)
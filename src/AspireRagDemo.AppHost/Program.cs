@@ -85,6 +85,8 @@ var jupyter = builder
     .WithEnvironment("ModelConfiguration__ChatModelProviderApiKey",GetApiProviderKey(chatConfiguration.ChatModelProvider))
     .WithEnvironment("ModelConfiguration__VectorStoreCollectionName",chatConfiguration.VectorStoreCollectionName)
     .WithEnvironment("ModelConfiguration__VectorStoreVectorName",chatConfiguration.VectorStoreVectorName)
+    .WithEnvironment("ModelConfiguration__EmbeddingCachePath","/home/jovyan/work/data/embedding-cache.sqlite")
+    .WithEnvironment("IngestionConfiguration__CheckpointDir","/home/jovyan/work/data/ingestion-jobs")
     .WithReference(vectorStore)
     .WithReference(apiService)
     .WaitFor(vectorStore)
@@ -21,7 +21,17 @@ resource = Resource(attributes={
 def get_otlp_exporter():   
     return OTLPSpanExporter(endpoint=os.getenv("OTEL_EXPORTER_OTLP_ENDPOINT"))
 
+_telemetryInitialised = False
+
 def get_tracer():
+    # Streamlit re-runs the script on every interaction; the provider must only be set up once.
+    # Sampling follows the standard OTEL_TRACES_SAMPLER / OTEL_TRACES_SAMPLER_ARG variables,
+    # e.g. parentbased_traceidratio and 0.1, which the TracerProvider reads itself.
+    global _telemetryInitialised
+    if _telemetryInitialised:
+        return trace.get_tracer(__name__)
+
+    _telemetryInitialised = True
     span_exporter = get_otlp_exporter()
     # Service name is required for most backends
 
@@ -28,7 +28,6 @@ def main():
             with tracer.start_as_current_span("Call API") as span1:
                 carrier = {}
                 TraceContextTextMapPropagator().inject(carrier)
-                logger.info(carrier)
                 header = {"traceparent": carrier["traceparent"]}    
                 response = requests.get(f"{API_BASE_URL}/{endpoint}", params={'query': query}, headers=header)
                 response.raise_for_status()
@@ -38,6 +37,23 @@ def main():
             logger.error(f"Error calling API: {str(e)}")
             return None
 
+    def stream_custom_api(endpoint, query):
+        """Yield the answer text as the API streams it."""
+        try:
+            with tracer.start_as_current_span("Call streaming API"):
+                carrier = {}
+                TraceContextTextMapPropagator().inject(carrier)
+                header = {"traceparent": carrier["traceparent"]}
+                with requests.get(f"{API_BASE_URL}/{endpoint}", params={'query': query}, headers=header,
+                                  stream=True) as response:
+                    response.raise_for_status()
+                    response.encoding = 'utf-8'
+                    for text in response.iter_content(chunk_size=None, decode_unicode=True):
+                        yield text
+        except requests.exceptions.RequestException as e:
+            st.error(f"Error calling API: {str(e)}")
+            logger.error(f"Error calling API: {str(e)}")
+
     # Streamlit UI
     st.title("RAG Demo")
     st.write("Enter your question below:")
@@ -46,18 +62,13 @@ def main():
     user_query = st.text_input("Question")
 
     # Query button
+    # The answer is rendered as it streams in rather than behind a spinner.
     if st.button('Search with context') and user_query:
-        with st.spinner('Searching...'):
-            results = call_custom_api('chat-with-context', user_query)
-            if results:
-                st.write("Results:")
-                st.write(results)
+        st.write("Results:")
+        st.write_stream(stream_custom_api('chat-with-context/stream', user_query))
     # Query button
     if st.button('Search without context') and user_query:
-        with st.spinner('Searching...'):
-            results = call_custom_api('chat', user_query)
-            if results:
-                st.write("Results:")
-                st.write(results)
+        st.write("Results:")
+        st.write_stream(stream_custom_api('chat/stream', user_query))
 if __name__ == '__main__':
     main()